@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+from typing import Generic, List, Optional, TypeVar
+
+from pydantic import BaseModel
+from sqlmodel import Session
+
+from app.core.serialization import rows_as_dicts
+
+T = TypeVar("T")
+
+
+class Page(BaseModel, Generic[T]):
+    """
+    Página de uma listagem paginada por cursor (keyset em `id`).
+
+    - next_cursor: continua na direção natural da listagem
+      (passar como `before` em listas decrescentes, `after` nas crescentes).
+    - prev_cursor: volta na direção oposta.
+    """
+
+    items: List[T]
+    next_cursor: Optional[int] = None
+    prev_cursor: Optional[int] = None
+
+
+def keyset_paginate(
+    session: Session,
+    query,
+    id_col,
+    *,
+    limit: int,
+    before: Optional[int] = None,
+    after: Optional[int] = None,
+    descending: bool = False,
+) -> Page:
+    """
+    Aplica paginação keyset (`id < before` / `id > after`) em `query`.
+
+    O custo de cada página é um range scan no índice, independente de quão
+    "fundo" o cursor está (sem OFFSET).
+    """
+    if before is not None:
+        query = query.where(id_col < before)
+    if after is not None:
+        query = query.where(id_col > after)
+
+    # Cursor "ao contrário" (ex.: after numa lista decrescente) = página anterior
+    reverse = (
+        (descending and after is not None and before is None)
+        or (not descending and before is not None and after is None)
+    )
+    scan_desc = descending != reverse
+
+    rows = session.exec(
+        query.order_by(id_col.desc() if scan_desc else id_col.asc()).limit(limit + 1)
+    ).all()
+
+    has_more = len(rows) > limit
+    rows = list(rows[:limit])
+    if reverse:
+        rows.reverse()
+
+    if not rows:
+        return Page(items=[])
+
+    first_id, last_id = rows[0].id, rows[-1].id
+    if reverse:
+        next_cursor = last_id
+        prev_cursor = first_id if has_more else None
+    else:
+        next_cursor = last_id if has_more else None
+        prev_cursor = first_id if (before is not None or after is not None) else None
+
+    return Page(items=rows, next_cursor=next_cursor, prev_cursor=prev_cursor)
+
+
+def page_as_dicts(page: Page) -> Page:
+    """Converte itens vindos de um select de colunas (Row) em dicts para o JSON."""
+    return page.model_copy(update={"items": rows_as_dicts(page.items)})
@@ -1,13 +1,16 @@
 from __future__ import annotations
 
-from typing import Optional
+from typing import Iterable, Optional
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
+from sqlalchemy import func
 from sqlmodel import Session, select
 
+from app.core.config import get_settings
+from app.core.serialization import ORJSONResponse
 from app.db.session import engine
 from app.models.bot import Bot
-from app.models.trade import Trade
+from app.models.stats import BotStats
 from app.models.indicator import Indicator
 
 router = APIRouter(prefix="/analysis", tags=["analysis"])
@@ -18,6 +21,11 @@ def ping_analysis():
   return {"message": "analysis endpoint ok"}
 
 
+ANALYSIS_INTERVAL = "5m"
+# Janelas (segundos) das estatísticas do ring buffer de ticks
+TICK_WINDOWS = (60.0, 300.0, 900.0)
+
+
 def _get_latest_indicator(session: Session, symbol: str) -> Optional[Indicator]:
   symbol = symbol.upper()
   return (
@@ -25,7 +33,7 @@ def _get_latest_indicator(session: Session, symbol: str) -> Optional[Indicator]:
       select(Indicator)
       .where(
         Indicator.symbol == symbol,
-        Indicator.interval == "5m",
+        Indicator.interval == ANALYSIS_INTERVAL,
       )
       .order_by(Indicator.close_time.desc())
     )
@@ -33,6 +41,234 @@ def _get_latest_indicator(session: Session, symbol: str) -> Optional[Indicator]:
   )
 
 
+def _get_latest_indicators(session: Session, symbols: Iterable[str]) -> dict[str, Indicator]:
+  """
+  Último indicador de cada símbolo em UMA query
+  (MAX(close_time) agrupado por símbolo + join de volta na tabela).
+  """
+  symbols = sorted({s.upper() for s in symbols})
+  if not symbols:
+    return {}
+
+  latest = (
+    select(
+      Indicator.symbol.label("symbol"),
+      func.max(Indicator.close_time).label("close_time"),
+    )
+    .where(
+      Indicator.symbol.in_(symbols),
+      Indicator.interval == ANALYSIS_INTERVAL,
+    )
+    .group_by(Indicator.symbol)
+    .subquery()
+  )
+  rows = session.exec(
+    select(Indicator).join(
+      latest,
+      (Indicator.symbol == latest.c.symbol)
+      & (Indicator.close_time == latest.c.close_time),
+    ).where(Indicator.interval == ANALYSIS_INTERVAL)
+  ).all()
+
+  return {ind.symbol: ind for ind in rows}
+
+
+def _tick_stats(symbol: str, windows: Iterable[float] = TICK_WINDOWS) -> Optional[dict]:
+  """
+  Estatísticas dos ticks gravados pelo engine para o símbolo (None se o
+  buffer está desligado ou o engine ainda não buscou preço dele).
+  """
+  from app.marketdata.ticks import get_tick_store  # numpy só quando usado
+
+  store = get_tick_store()
+  if store is None:
+    return None
+  return store.stats(symbol, windows)
+
+
+def _current_price(indicator: Optional[Indicator], ticks: Optional[dict]) -> tuple[Optional[float], Optional[str]]:
+  """
+  Preço para o P/L não realizado: último tick se recente (mesmo limite do
+  preço "stale" do engine), senão o close do último candle.
+  """
+  last = ticks["last"] if ticks else None
+  if last and last["age_seconds"] <= get_settings().engine_stale_price_max_age_seconds:
+    return last["price"], "tick"
+  if indicator and indicator.close:
+    return float(indicator.close), "indicator_close"
+  return None, None
+
+
+def _trades_stats(stats: Optional[BotStats]) -> dict:
+  return {
+    "num_trades": stats.num_trades if stats else 0,
+    "num_buys": stats.num_buys if stats else 0,
+    "num_sells": stats.num_sells if stats else 0,
+    "realized_pnl": stats.realized_pnl if stats else 0,
+    "total_fees_usdt": stats.total_fees_usdt if stats else 0,
+    "last_trade_at": stats.last_trade_at if stats else None,
+  }
+
+
+def _evaluate_bot(
+  bot: Bot,
+  stats: Optional[BotStats],
+  indicator: Optional[Indicator],
+  ticks: Optional[dict] = None,
+) -> dict:
+  """
+  Avaliação de um bot a partir dos dados já carregados (sem I/O):
+  estatísticas de trades, posição e recomendação por regras simples.
+  Usada tanto por /analysis/bot/{id} quanto por /analysis/bots.
+  """
+  trades_stats = _trades_stats(stats)
+  realized_pnl = trades_stats["realized_pnl"]
+
+  # Cálculo de P/L não realizado (aproximado)
+  unrealized_pnl = None
+  current_position_value = None
+  price, price_source = _current_price(indicator, ticks)
+  if bot.has_open_position and bot.qty_moeda and price:
+    current_position_value = float(bot.qty_moeda) * price
+    if bot.last_buy_price:
+      custo = float(bot.qty_moeda) * float(bot.last_buy_price)
+      unrealized_pnl = current_position_value - custo
+
+  # Construir recomendação simples (regra de bolso, NÃO é conselho financeiro)
+  recomendacao = "neutro"
+  motivos = []
+
+  # Situação da posição
+  if bot.has_open_position:
+    motivos.append("Bot está com posição aberta.")
+  else:
+    motivos.append("Bot está sem posição aberta.")
+
+  # Considerar stop loss configurado
+  if bot.stop_loss_percent is not None:
+    motivos.append(
+      f"Stop loss configurado em {bot.stop_loss_percent:.2f}% "
+      f"(vender_stop_loss={bot.vender_stop_loss})."
+    )
+
+  # Considerar performance histórica
+  if realized_pnl > 0:
+    motivos.append(
+      f"P/L realizado positivo em histórico: {realized_pnl:.6f} USDT."
+    )
+  elif realized_pnl < 0:
+    motivos.append(
+      f"P/L realizado negativo em histórico: {realized_pnl:.6f} USDT."
+    )
+
+  # Considerar os ticks recentes (intra-candle)
+  recent = ticks["windows"].get("300s") if ticks else None
+  if recent and recent["count"] > 1:
+    motivos.append(
+      f"Últimos 5min ({recent['count']} ticks): mín {recent['min']:.8g}, "
+      f"máx {recent['max']:.8g}, variação {recent['change_pct']:+.2f}%."
+    )
+    # mesma base do engine (handle_position): stop relativo ao valor_inicial
+    if bot.has_open_position and bot.valor_inicial and bot.stop_loss_percent:
+      stop_price = float(bot.valor_inicial) * (1 - bot.stop_loss_percent / 100.0)
+      if recent["min"] <= stop_price:
+        motivos.append(
+          f"A mínima dos últimos 5min tocou o preço de stop ({stop_price:.8g})."
+        )
+
+  # Considerar indicadores
+  if indicator:
+    if indicator.market_signal_compra and not indicator.market_signal_venda:
+      motivos.append("Indicadores marcam sinal de COMPRA.")
+    elif indicator.market_signal_venda and not indicator.market_signal_compra:
+      motivos.append("Indicadores marcam sinal de VENDA.")
+    elif indicator.market_signal_compra and indicator.market_signal_venda:
+      motivos.append(
+        "Indicadores mostram sinais mistos (COMPRA e VENDA ao mesmo tempo)."
+      )
+
+    if indicator.rsi14 is not None:
+      motivos.append(f"RSI14 atual: {indicator.rsi14:.2f}.")
+  else:
+    motivos.append("Ainda não há indicadores calculados para este símbolo.")
+
+  # Regras simples para recomendação
+  if bot.has_open_position and indicator:
+    # posição aberta
+    if indicator.market_signal_venda and realized_pnl > 0:
+      recomendacao = "avaliar_venda_lucro"
+      motivos.append(
+        "Bot está em lucro realizado e há sinal de VENDA: avaliar realizar parte ou total da posição."
+      )
+    elif indicator.market_signal_venda and unrealized_pnl and unrealized_pnl > 0:
+      recomendacao = "proteger_lucro"
+      motivos.append(
+        "P/L não realizado positivo com sinal de VENDA: considerar reduzir posição ou apertar stop."
+      )
+    elif indicator.market_signal_compra and (unrealized_pnl is not None and unrealized_pnl < 0):
+      recomendacao = "manter_mas_monitorar"
+      motivos.append(
+        "P/L não realizado negativo, mas com sinal de COMPRA: manter posição porém monitorar risco."
+      )
+    else:
+      recomendacao = "manter_em_observacao"
+      motivos.append(
+        "Sem sinal forte de compra/venda: manter em observação."
+      )
+  else:
+    # sem posição aberta
+    if indicator and indicator.market_signal_compra:
+      recomendacao = "avaliar_entrada"
+      motivos.append(
+        "Sem posição aberta e indicadores em COMPRA: avaliar possível entrada conforme estratégia."
+      )
+    elif indicator and indicator.market_signal_venda:
+      recomendacao = "evitar_entrada"
+      motivos.append(
+        "Indicadores em VENDA e bot sem posição: evitar novas entradas por enquanto."
+      )
+    else:
+      recomendacao = "neutro"
+      motivos.append(
+        "Sem posição e sem sinal claro nos indicadores: aguardar melhor configuração de mercado."
+      )
+
+  return {
+    "bot": {
+      "id": bot.id,
+      "name": bot.name,
+      "symbol": bot.symbol,
+      "status": bot.status,
+      "blocked": bot.blocked,
+      "saldo_usdt_limit": bot.saldo_usdt_limit,
+      "saldo_usdt_livre": bot.saldo_usdt_livre,
+      "has_open_position": bot.has_open_position,
+      "qty_moeda": bot.qty_moeda,
+      "last_buy_price": bot.last_buy_price,
+      "last_sell_price": bot.last_sell_price,
+      "valor_inicial": bot.valor_inicial,
+      "stop_loss_percent": bot.stop_loss_percent,
+      "vender_stop_loss": bot.vender_stop_loss,
+      "porcentagem_compra": bot.porcentagem_compra,
+      "porcentagem_venda": bot.porcentagem_venda,
+    },
+    "trades_stats": trades_stats,
+    # dump direto das colunas (sem passar pelo jsonable_encoder do FastAPI)
+    "indicator": indicator.model_dump() if indicator else None,
+    "position": {
+      "current_price": price,
+      "price_source": price_source,
+      "current_position_value": current_position_value,
+      "unrealized_pnl": unrealized_pnl,
+    },
+    "ticks": ticks,
+    "analysis": {
+      "recomendacao": recomendacao,
+      "motivos": motivos,
+    },
+  }
+
+
 @router.get("/bot/{bot_id}")
 def analyze_bot(bot_id: int):
   """
@@ -47,154 +283,58 @@ def analyze_bot(bot_id: int):
     if not bot:
       raise HTTPException(status_code=404, detail=f"Bot id={bot_id} não encontrado.")
 
-    trades = list(
-      session.exec(
-        select(Trade)
-        .where(Trade.bot_id == bot_id)
-        .order_by(Trade.created_at)
-      )
-    )
-
-    # Estatísticas de trades
-    num_trades = len(trades)
-    num_buys = sum(1 for t in trades if t.side == "BUY")
-    num_sells = sum(1 for t in trades if t.side == "SELL")
-    realized_pnl = sum((t.realized_pnl or 0) for t in trades)
-    total_fees_usdt = sum(
-      (t.fee_amount or 0) for t in trades if (t.fee_asset or "").upper() == "USDT"
-    )
-    last_trade_at = trades[-1].created_at if trades else None
+    # Estatísticas de trades (agregado incremental em bot_stats)
+    stats = session.get(BotStats, bot_id)
 
     # Indicador mais recente
     indicator = _get_latest_indicator(session, bot.symbol)
 
-    # Cálculo de P/L não realizado (aproximado)
-    unrealized_pnl = None
-    current_position_value = None
-    if bot.has_open_position and bot.qty_moeda and indicator and indicator.close:
-      current_position_value = float(bot.qty_moeda) * float(indicator.close)
-      if bot.last_buy_price:
-        custo = float(bot.qty_moeda) * float(bot.last_buy_price)
-        unrealized_pnl = current_position_value - custo
-
-    # Construir recomendação simples (regra de bolso, NÃO é conselho financeiro)
-    recomendacao = "neutro"
-    motivos = []
-
-    # Situação da posição
-    if bot.has_open_position:
-      motivos.append("Bot está com posição aberta.")
-    else:
-      motivos.append("Bot está sem posição aberta.")
+    return ORJSONResponse(_evaluate_bot(bot, stats, indicator, _tick_stats(bot.symbol)))
 
-    # Considerar stop loss configurado
-    if bot.stop_loss_percent is not None:
-      motivos.append(
-        f"Stop loss configurado em {bot.stop_loss_percent:.2f}% "
-        f"(vender_stop_loss={bot.vender_stop_loss})."
-      )
 
-    # Considerar performance histórica
-    if realized_pnl > 0:
-      motivos.append(
-        f"P/L realizado positivo em histórico: {realized_pnl:.6f} USDT."
-      )
-    elif realized_pnl < 0:
-      motivos.append(
-        f"P/L realizado negativo em histórico: {realized_pnl:.6f} USDT."
-      )
+@router.get("/bots")
+def analyze_bots(
+  status: Optional[str] = None,
+  symbol: Optional[str] = None,
+  blocked: Optional[bool] = None,
+):
+  """
+  Mesma análise de /analysis/bot/{id} para todos os bots (ou filtrados
+  por status/símbolo/bloqueio) em uma única requisição.
 
-    # Considerar indicadores
-    if indicator:
-      if indicator.market_signal_compra and not indicator.market_signal_venda:
-        motivos.append("Indicadores marcam sinal de COMPRA.")
-      elif indicator.market_signal_venda and not indicator.market_signal_compra:
-        motivos.append("Indicadores marcam sinal de VENDA.")
-      elif indicator.market_signal_compra and indicator.market_signal_venda:
-        motivos.append(
-          "Indicadores mostram sinais mistos (COMPRA e VENDA ao mesmo tempo)."
-        )
+  São 2 queries no total: bots + bot_stats (join) e o último indicador
+  de cada símbolo distinto. O custo cresce com o nº de bots, não de trades.
+  """
+  query = select(Bot, BotStats).outerjoin(BotStats, BotStats.bot_id == Bot.id)
+  if status is not None:
+    query = query.where(Bot.status == status)
+  if symbol is not None:
+    query = query.where(Bot.symbol == symbol.upper().strip())
+  if blocked is not None:
+    query = query.where(Bot.blocked == blocked)
 
-      if indicator.rsi14 is not None:
-        motivos.append(f"RSI14 atual: {indicator.rsi14:.2f}.")
-    else:
-      motivos.append("Ainda não há indicadores calculados para este símbolo.")
+  with Session(engine) as session:
+    rows = session.exec(query.order_by(Bot.id)).all()
+    indicators = _get_latest_indicators(session, (bot.symbol for bot, _ in rows))
+    ticks = {symbol: _tick_stats(symbol) for symbol in {bot.symbol.upper() for bot, _ in rows}}
+
+    return ORJSONResponse([
+      _evaluate_bot(bot, stats, indicators.get(bot.symbol.upper()), ticks[bot.symbol.upper()])
+      for bot, stats in rows
+    ])
 
-    # Regras simples para recomendação
-    if bot.has_open_position and indicator:
-      # posição aberta
-      if indicator.market_signal_venda and realized_pnl > 0:
-        recomendacao = "avaliar_venda_lucro"
-        motivos.append(
-          "Bot está em lucro realizado e há sinal de VENDA: avaliar realizar parte ou total da posição."
-        )
-      elif indicator.market_signal_venda and unrealized_pnl and unrealized_pnl > 0:
-        recomendacao = "proteger_lucro"
-        motivos.append(
-          "P/L não realizado positivo com sinal de VENDA: considerar reduzir posição ou apertar stop."
-        )
-      elif indicator.market_signal_compra and (unrealized_pnl is not None and unrealized_pnl < 0):
-        recomendacao = "manter_mas_monitorar"
-        motivos.append(
-          "P/L não realizado negativo, mas com sinal de COMPRA: manter posição porém monitorar risco."
-        )
-      else:
-        recomendacao = "manter_em_observacao"
-        motivos.append(
-          "Sem sinal forte de compra/venda: manter em observação."
-        )
-    else:
-      # sem posição aberta
-      if indicator and indicator.market_signal_compra:
-        recomendacao = "avaliar_entrada"
-        motivos.append(
-          "Sem posição aberta e indicadores em COMPRA: avaliar possível entrada conforme estratégia."
-        )
-      elif indicator and indicator.market_signal_venda:
-        recomendacao = "evitar_entrada"
-        motivos.append(
-          "Indicadores em VENDA e bot sem posição: evitar novas entradas por enquanto."
-        )
-      else:
-        recomendacao = "neutro"
-        motivos.append(
-          "Sem posição e sem sinal claro nos indicadores: aguardar melhor configuração de mercado."
-        )
 
-    return {
-      "bot": {
-        "id": bot.id,
-        "name": bot.name,
-        "symbol": bot.symbol,
-        "status": bot.status,
-        "blocked": bot.blocked,
-        "saldo_usdt_limit": bot.saldo_usdt_limit,
-        "saldo_usdt_livre": bot.saldo_usdt_livre,
-        "has_open_position": bot.has_open_position,
-        "qty_moeda": bot.qty_moeda,
-        "last_buy_price": bot.last_buy_price,
-        "last_sell_price": bot.last_sell_price,
-        "valor_inicial": bot.valor_inicial,
-        "stop_loss_percent": bot.stop_loss_percent,
-        "vender_stop_loss": bot.vender_stop_loss,
-        "porcentagem_compra": bot.porcentagem_compra,
-        "porcentagem_venda": bot.porcentagem_venda,
-      },
-      "trades_stats": {
-        "num_trades": num_trades,
-        "num_buys": num_buys,
-        "num_sells": num_sells,
-        "realized_pnl": realized_pnl,
-        "total_fees_usdt": total_fees_usdt,
-        "last_trade_at": last_trade_at,
-      },
-      "indicator": indicator,
-      "position": {
-        "current_position_value": current_position_value,
-        "unrealized_pnl": unrealized_pnl,
-      },
-      "analysis": {
-        "recomendacao": recomendacao,
-        "motivos": motivos,
-      },
-    }
+@router.get("/ticks/{symbol}")
+def analyze_ticks(
+  symbol: str,
+  windows: list[float] = Query(list(TICK_WINDOWS), description="Janelas em segundos"),
+):
+  """
+  Estatísticas dos ticks recentes do símbolo (ring buffer do engine) por
+  janela: contagem, primeiro/último, mín/máx, média, TWAP, variação e
+  volatilidade (desvio padrão dos log-retornos entre ticks, em %).
+  """
+  ticks = _tick_stats(symbol.upper().strip(), windows)
+  if ticks is None:
+    raise HTTPException(status_code=404, detail=f"Sem ticks gravados para {symbol.upper()}.")
+  return ORJSONResponse(ticks)
@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Optional
+
+import httpx
+from fastapi import APIRouter, HTTPException, status
+from pydantic import Field
+
+from app.backtest.data import MarketSource, load_market_arrays
+from app.backtest.engine import DEFAULT_FEE_RATE, run_backtest
+from app.backtest.sweep import (
+    RankBy,
+    SweepSpec,
+    cancel_sweep,
+    create_sweep,
+    load_results,
+    rank_results,
+    start_sweep_thread,
+    sweep_path,
+    sweep_state,
+)
+from app.models.bot import BotBase
+
+router = APIRouter(prefix="/backtest", tags=["backtest"])
+
+
+class BacktestRequest(BotBase):
+    """Parâmetros da estratégia (mesmos campos do bot) + janela de candles."""
+
+    name: str = "backtest"
+    interval: str = Field(default="5m", description="Intervalo dos candles replayados")
+    source: MarketSource = Field(
+        default="binance",
+        description="binance = últimos `limit` candles; archive = arquivo local (since/until)",
+    )
+    limit: int = Field(default=1000, ge=30, le=1000, description="Nº de candles (Binance: máx. 1000)")
+    since: Optional[datetime] = None
+    until: Optional[datetime] = None
+    fee_rate: float = Field(default=DEFAULT_FEE_RATE, ge=0)
+    max_points: Optional[int] = Field(
+        default=1000,
+        ge=1,
+        description="Máximo de pontos na curva de capital retornada",
+    )
+
+
+def _fetch_market(
+    source: MarketSource,
+    symbol: str,
+    interval: str,
+    limit: int,
+    since: Optional[datetime],
+    until: Optional[datetime],
+) -> dict:
+    try:
+        market = load_market_arrays(
+            source, symbol, interval, limit=limit, since=since, until=until
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except httpx.HTTPStatusError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Erro ao buscar candles na Binance: {e.response.text}",
+        )
+    except httpx.HTTPError as e:
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail=f"Falha de comunicação com a Binance: {e}",
+        )
+
+    if not len(market["prices"]):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Sem candles para {symbol} ({interval}).",
+        )
+    return market
+
+
+def _get_sweep_or_404(sweep_id: str):
+    try:
+        return sweep_path(sweep_id)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+
+
+@router.post("/run")
+def run_backtest_endpoint(req: BacktestRequest) -> dict:
+    """
+    Roda um backtest da estratégia sobre os últimos `limit` candles do símbolo
+    (ou sobre since/until do arquivo local, com source=archive).
+
+    Os sinais de mercado vêm dos indicadores 5m calculados sobre os candles
+    (alinhados pelo close_time). Nada é gravado no banco.
+    """
+    symbol = req.symbol.upper().strip()
+    market = _fetch_market(req.source, symbol, req.interval, req.limit, req.since, req.until)
+
+    result = run_backtest(
+        req,
+        market["prices"],
+        buy_signal=market["buy"],
+        sell_signal=market["sell"],
+        times=market["times"].astype("datetime64[ms]").tolist(),
+        fee_rate=req.fee_rate,
+    )
+    return {
+        "symbol": symbol,
+        "interval": req.interval,
+        **result.to_dict(max_points=req.max_points),
+    }
+
+
+@router.post("/sweeps", status_code=status.HTTP_202_ACCEPTED)
+def create_sweep_endpoint(spec: SweepSpec) -> dict:
+    """
+    Cria uma busca de parâmetros (produto das faixas informadas) e roda em
+    background num pool de processos. Acompanhe em GET /backtest/sweeps/{id}.
+    """
+    spec.symbol = spec.symbol.upper().strip()
+    total = len(spec.grid())
+    if total == 0:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Nenhuma combinação de parâmetros a testar.",
+        )
+
+    market = _fetch_market(
+        spec.source, spec.symbol, spec.interval, spec.limit, spec.since, spec.until
+    )
+    sweep_id = create_sweep(spec, market)
+    start_sweep_thread(sweep_id)
+    return {"sweep_id": sweep_id, "total": total}
+
+
+@router.get("/sweeps/{sweep_id}")
+def get_sweep(sweep_id: str, rank_by: RankBy = "pnl", top: int = 20) -> dict:
+    """Progresso da busca e o ranking (por P/L, drawdown ou nº de trades)."""
+    path = _get_sweep_or_404(sweep_id)
+    return {
+        "sweep_id": sweep_id,
+        **sweep_state(sweep_id),
+        "rank_by": rank_by,
+        "results": rank_results(load_results(path), rank_by, top),
+    }
+
+
+@router.post("/sweeps/{sweep_id}/cancel")
+def cancel_sweep_endpoint(sweep_id: str) -> dict:
+    """Cancela a busca; o que já terminou fica salvo e pode ser retomado."""
+    _get_sweep_or_404(sweep_id)
+    if not cancel_sweep(sweep_id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Sweep não está rodando.",
+        )
+    return {"sweep_id": sweep_id, "cancelling": True}
+
+
+@router.post("/sweeps/{sweep_id}/resume", status_code=status.HTTP_202_ACCEPTED)
+def resume_sweep_endpoint(sweep_id: str) -> dict:
+    """Retoma uma busca cancelada/interrompida (pula combinações já calculadas)."""
+    _get_sweep_or_404(sweep_id)
+    if not start_sweep_thread(sweep_id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Sweep já está rodando.",
+        )
+    return {"sweep_id": sweep_id, "resumed": True}
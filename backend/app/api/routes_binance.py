@@ -3,16 +3,26 @@ from __future__ import annotations
 from typing import Literal, Optional
 
 import httpx
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Query, Request, status
 from pydantic import BaseModel, Field
 
+from app.binance.breaker import CircuitOpenError, breakers_state
+from app.binance.signer import MissingCredentialsError, get_signer
+from app.binance.exchange_info import (
+    NormalizedOrder,
+    get_exchange_info_cache,
+    normalize_order,
+)
 from app.binance.client import (
     get_account_summary,
+    get_klines,
     validate_symbol as binance_validate_symbol,
     place_test_order as binance_place_test_order,
     place_order as binance_place_order,
 )
 from app.core.config import get_settings
+from app.export.columnar import CANDLE_COLUMNS, negotiate_format
+from app.export.response import export_response
 
 router = APIRouter(prefix="/binance", tags=["binance"])
 
@@ -55,13 +65,134 @@ class OrderTestRequest(BaseModel):
         }
 
 
+def _normalize_payload(payload: OrderTestRequest, symbol: str, order_type: str) -> NormalizedOrder:
+    """Arredonda quantity/price pelos filtros do símbolo e valida localmente (cache)."""
+    try:
+        filters = get_exchange_info_cache().get(symbol)
+    except CircuitOpenError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+        )
+    except httpx.HTTPError as e:
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail=f"Erro ao comunicar com a Binance: {e}",
+        )
+    if filters is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Símbolo '{symbol}' não existe ou não está disponível na Binance.",
+        )
+
+    try:
+        return normalize_order(
+            filters,
+            order_type=order_type,
+            quantity=payload.quantity,
+            quote_order_qty=payload.quoteOrderQty,
+            price=payload.price,
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
+
+
+def _as_float(value: Optional[str]) -> Optional[float]:
+    return float(value) if value is not None else None
+
+
 @router.get("/symbol/{symbol}/validate")
 def validate_symbol_route(symbol: str) -> dict:
     """Valida se o símbolo existe na Binance."""
-    ok = binance_validate_symbol(symbol)
+    try:
+        ok = binance_validate_symbol(symbol)
+    except CircuitOpenError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+        )
     return {"symbol": symbol.upper(), "valid": ok}
 
 
+@router.get("/symbol/{symbol}/filters")
+def symbol_filters(symbol: str) -> dict:
+    """Filtros de negociação do símbolo (stepSize, tickSize, minNotional...), do cache."""
+    try:
+        filters = get_exchange_info_cache().get(symbol)
+    except CircuitOpenError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+        )
+    except httpx.HTTPError as e:
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail=f"Erro ao comunicar com a Binance: {e}",
+        )
+    if filters is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Símbolo '{symbol.upper()}' não encontrado.",
+        )
+    return filters.to_dict()
+
+
+@router.get("/klines/{symbol}/export")
+def export_klines(
+    symbol: str,
+    request: Request,
+    interval: str = "5m",
+    limit: int = Query(500, ge=1, le=1000),
+    fmt: Optional[str] = Query(
+        None,
+        alias="format",
+        description="csv | arrow | parquet (ou via header Accept)",
+    ),
+):
+    """Exporta candles (klines) da Binance em CSV, Arrow IPC ou Parquet."""
+    try:
+        out_format = negotiate_format(fmt, request.headers.get("accept"))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    symbol = symbol.upper()
+    try:
+        klines = get_klines(symbol=symbol, interval=interval, limit=limit)
+    except httpx.HTTPError as e:
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail=f"Erro ao comunicar com a Binance: {e}",
+        )
+
+    names = [name for name, _kind in CANDLE_COLUMNS]
+    rows = [tuple(k[name] for name in names) for k in klines]
+
+    return export_response(
+        out_format,
+        CANDLE_COLUMNS,
+        [rows],
+        f"klines_{symbol}_{interval}",
+    )
+
+
+@router.get("/latency")
+def signed_latency() -> dict:
+    """
+    Latências das requisições assinadas deste processo: assinatura (local)
+    e transporte (ida e volta HTTP) separados, mais o offset do relógio.
+    """
+    return get_signer().stats()
+
+
+@router.get("/breakers")
+def breakers() -> dict:
+    """Estado dos circuit breakers por endpoint da Binance (neste processo)."""
+    return breakers_state()
+
+
 @router.get("/account/summary")
 def account_summary() -> dict:
     """Retorna um resumo simples da conta Binance.
@@ -81,7 +212,12 @@ def account_summary() -> dict:
 
     try:
         summary = get_account_summary()
-    except RuntimeError as e:
+    except CircuitOpenError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+        )
+    except MissingCredentialsError as e:
         # Erro de configuração (chaves)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -143,18 +279,21 @@ def test_order(payload: OrderTestRequest) -> dict:
 
     time_in_force = payload.timeInForce or ("GTC" if order_type == "LIMIT" else None)
 
+    # Quantidade/preço arredondados para stepSize/tickSize (sem rede: cache)
+    order = _normalize_payload(payload, symbol, order_type)
+
     try:
         binance_result = binance_place_test_order(
             symbol=symbol,
             side=side,
             type_=order_type,
-            quantity=payload.quantity,
-            quote_order_qty=payload.quoteOrderQty,
-            price=payload.price,
+            quantity=order.quantity,
+            quote_order_qty=order.quote_order_qty,
+            price=order.price,
             time_in_force=time_in_force,
         )
-    except RuntimeError as e:
-        # Erros de configuração/proteção
+    except MissingCredentialsError as e:
+        # Erro de configuração (chaves)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e),
@@ -179,9 +318,9 @@ def test_order(payload: OrderTestRequest) -> dict:
         "symbol": symbol,
         "side": side,
         "type": order_type,
-        "quantity": payload.quantity,
-        "quoteOrderQty": payload.quoteOrderQty,
-        "price": payload.price,
+        "quantity": _as_float(order.quantity),
+        "quoteOrderQty": _as_float(order.quote_order_qty),
+        "price": _as_float(order.price),
         "timeInForce": time_in_force,
         "binance_response": binance_result,  # normalmente {}
     }
@@ -237,17 +376,20 @@ def place_order_route(payload: OrderTestRequest) -> dict:
 
     time_in_force = payload.timeInForce or ("GTC" if order_type == "LIMIT" else None)
 
+    # Quantidade/preço arredondados para stepSize/tickSize (sem rede: cache)
+    order = _normalize_payload(payload, symbol, order_type)
+
     try:
         binance_result = binance_place_order(
             symbol=symbol,
             side=side,
             type_=order_type,
-            quantity=payload.quantity,
-            quote_order_qty=payload.quoteOrderQty,
-            price=payload.price,
+            quantity=order.quantity,
+            quote_order_qty=order.quote_order_qty,
+            price=order.price,
             time_in_force=time_in_force,
         )
-    except RuntimeError as e:
+    except MissingCredentialsError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e),
@@ -270,9 +412,9 @@ def place_order_route(payload: OrderTestRequest) -> dict:
         "symbol": symbol,
         "side": side,
         "type": order_type,
-        "quantity": payload.quantity,
-        "quoteOrderQty": payload.quoteOrderQty,
-        "price": payload.price,
+        "quantity": _as_float(order.quantity),
+        "quoteOrderQty": _as_float(order.quote_order_qty),
+        "price": _as_float(order.price),
         "timeInForce": time_in_force,
         "binance_response": binance_result,
     }
@@ -1,21 +1,31 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import List
+from typing import Optional
 import httpx
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import delete
 from sqlmodel import Session, select
 
+from app.api.pagination import Page, keyset_paginate, page_as_dicts
+from app.core.http_cache import cached_json
+from app.core.versions import mark_changed
+from app.core.serialization import ORJSONResponse, columns_for
 from app.db.session import get_session
+from app.db.writer import run_write
 from app.models.bot import Bot, BotCreate, BotRead
 from app.models.trade import Trade, TradeRead
+from app.models.order import ORDER_OPEN_STATUSES, BotOrder
+from app.binance.breaker import CircuitOpenError
 from app.binance.client import (
     validate_symbol as binance_validate_symbol,
     get_symbol_price,
 )
 from app.core.config import get_settings
-from app.engine.runner import simulate_sell
+from app.engine.records import bot_snapshot, project_diffs
+from app.stats.service import remove_bot_stats
+from app.engine.runner import execute_sell
 
 
 router = APIRouter(prefix="/bots", tags=["bots"])
@@ -43,12 +53,34 @@ def ping_bots() -> dict:
     return {"message": "bots endpoint ok"}
 
 
-@router.get("/", response_model=List[BotRead])
-def list_bots(session: Session = Depends(get_session)) -> List[Bot]:
-    """Lista todos os bots cadastrados (por enquanto, sem filtros)."""
+@router.get("/", response_model=Page[BotRead])
+def list_bots(
+    request: Request,
+    limit: int = Query(100, ge=1, le=1000),
+    before: Optional[int] = Query(None, description="Cursor: bots com id < before"),
+    after: Optional[int] = Query(None, description="Cursor: bots com id > after"),
+    session: Session = Depends(get_session),
+) -> Response:
+    """
+    Lista os bots cadastrados em ordem de id (por enquanto, sem filtros).
+    Paginação por cursor: use `next_cursor` da resposta como `after`.
+    Suporta ETag/If-None-Match (304 enquanto nenhum bot mudar).
+    """
+
+    def _build() -> Page:
+        # Só as colunas de BotRead, direto das linhas (sem ORM/revalidação)
+        page = keyset_paginate(
+            session,
+            select(*columns_for(BotRead, Bot)),
+            Bot.id,
+            limit=limit,
+            before=before,
+            after=after,
+        )
+        return page_as_dicts(page)
+
     try:
-        bots = session.exec(select(Bot)).all()
-        return bots
+        return cached_json(request, ("bots",), _build)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -65,7 +97,7 @@ def get_bot(bot_id: int, session: Session = Depends(get_session)) -> Bot:
 
 
 @router.post("/", response_model=BotRead, status_code=status.HTTP_201_CREATED)
-def create_bot(bot_in: BotCreate, session: Session = Depends(get_session)) -> Bot:
+def create_bot(bot_in: BotCreate) -> Bot:
     """
     Cria um novo bot (começa offline, desbloqueado e com saldo_usdt_livre = saldo_usdt_limit).
     Não permite dois bots com o mesmo nome.
@@ -82,30 +114,37 @@ def create_bot(bot_in: BotCreate, session: Session = Depends(get_session)) -> Bo
                 detail=f"Símbolo '{symbol}' não existe ou não está disponível na Binance.",
             )
 
-        # Validação simples: nome único
-        existing = session.exec(select(Bot).where(Bot.name == bot_in.name)).first()
-        if existing:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Já existe um bot com esse nome.",
-            )
+        def _create(session: Session) -> Bot:
+            # Validação simples: nome único
+            existing = session.exec(select(Bot).where(Bot.name == bot_in.name)).first()
+            if existing:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Já existe um bot com esse nome.",
+                )
 
-        data = bot_in.model_dump()
-        data["symbol"] = symbol  # salva normalizado em maiúsculo
-        bot = Bot(**data)
+            data = bot_in.model_dump()
+            data["symbol"] = symbol  # salva normalizado em maiúsculo
+            bot = Bot(**data)
 
-        # Regras iniciais
-        bot.status = "offline"
-        bot.blocked = False
-        bot.saldo_usdt_livre = bot.saldo_usdt_limit
+            # Regras iniciais
+            bot.status = "offline"
+            bot.blocked = False
+            bot.saldo_usdt_livre = bot.saldo_usdt_limit
 
-        session.add(bot)
-        session.commit()
-        session.refresh(bot)
+            session.add(bot)
+            session.flush()
+            return bot
 
-        return bot
+        return run_write(_create)
     except HTTPException:
         raise
+    except CircuitOpenError as e:
+        # Binance em pausa (circuit breaker): não dá para validar o símbolo agora
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -118,7 +157,7 @@ def create_bot(bot_in: BotCreate, session: Session = Depends(get_session)) -> Bo
 # Ações em um único bot: ligar/desligar/bloquear/desbloquear/remover
 # ---------------------------------------------------------------------
 @router.post("/{bot_id}/start", response_model=BotRead)
-def start_bot(bot_id: int, session: Session = Depends(get_session)) -> Bot:
+def start_bot(bot_id: int) -> Bot:
     """
     Coloca o bot online.
     Regras:
@@ -126,96 +165,123 @@ def start_bot(bot_id: int, session: Session = Depends(get_session)) -> Bot:
       - Se já está online, apenas retorna o estado atual.
       - Se nunca foi iniciado, define started_at.
     """
-    bot = _get_bot_or_404(bot_id, session)
 
-    if bot.blocked:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Bot está bloqueado e não pode ser colocado online.",
-        )
+    def _start(session: Session) -> Bot:
+        bot = _get_bot_or_404(bot_id, session)
 
-    if bot.status == "online":
-        return bot
+        if bot.blocked:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Bot está bloqueado e não pode ser colocado online.",
+            )
 
-    bot.status = "online"
-    if bot.started_at is None:
-        bot.started_at = datetime.utcnow()
+        if bot.status == "online":
+            return bot
 
-    session.add(bot)
-    session.commit()
-    session.refresh(bot)
-    return bot
+        bot.status = "online"
+        if bot.started_at is None:
+            bot.started_at = datetime.utcnow()
+
+        session.add(bot)
+        return bot
+
+    return run_write(_start)
 
 
 @router.post("/{bot_id}/stop", response_model=BotRead)
-def stop_bot(bot_id: int, session: Session = Depends(get_session)) -> Bot:
+def stop_bot(bot_id: int) -> Bot:
     """
     Coloca o bot offline.
     Se já estiver offline, apenas retorna.
     """
-    bot = _get_bot_or_404(bot_id, session)
 
-    if bot.status == "offline":
+    def _stop(session: Session) -> Bot:
+        bot = _get_bot_or_404(bot_id, session)
+
+        if bot.status == "offline":
+            return bot
+
+        bot.status = "offline"
+        session.add(bot)
         return bot
 
-    bot.status = "offline"
-    session.add(bot)
-    session.commit()
-    session.refresh(bot)
-    return bot
+    return run_write(_stop)
 
 
 @router.post("/{bot_id}/block", response_model=BotRead)
-def block_bot(bot_id: int, session: Session = Depends(get_session)) -> Bot:
+def block_bot(bot_id: int) -> Bot:
     """
     Bloqueia o bot.
     Regras:
       - blocked = True
       - status = offline (bot não roda mais)
     """
-    bot = _get_bot_or_404(bot_id, session)
 
-    bot.blocked = True
-    bot.status = "offline"
+    def _block(session: Session) -> Bot:
+        bot = _get_bot_or_404(bot_id, session)
 
-    session.add(bot)
-    session.commit()
-    session.refresh(bot)
-    return bot
+        bot.blocked = True
+        bot.status = "offline"
+
+        session.add(bot)
+        return bot
+
+    return run_write(_block)
 
 
 @router.post("/{bot_id}/unblock", response_model=BotRead)
-def unblock_bot(bot_id: int, session: Session = Depends(get_session)) -> Bot:
+def unblock_bot(bot_id: int) -> Bot:
     """
     Desbloqueia o bot.
     Não altera o status (continua online/offline como está),
     mas pela nossa regra prática ele sempre estará offline,
     pois bloqueio sempre o deixa offline.
     """
-    bot = _get_bot_or_404(bot_id, session)
 
-    if not bot.blocked:
-        return bot
+    def _unblock(session: Session) -> Bot:
+        bot = _get_bot_or_404(bot_id, session)
 
-    bot.blocked = False
+        if not bot.blocked:
+            return bot
 
-    session.add(bot)
-    session.commit()
-    session.refresh(bot)
-    return bot
+        bot.blocked = False
+
+        session.add(bot)
+        return bot
+
+    return run_write(_unblock)
 
 
 @router.delete("/{bot_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_bot(bot_id: int, session: Session = Depends(get_session)) -> None:
+def delete_bot(bot_id: int) -> None:
     """
-    Remove o bot e tudo que temos sobre ele.
-    Por enquanto só temos o registro na tabela bots.
-    Futuramente, quando tivermos tabelas de trades/logs, vamos apagar tudo relacionado.
+    Remove o bot e tudo que temos sobre ele: trades, ordens, bot_stats e
+    buckets de rollup. Os agregados globais (global_stats e o rollup
+    global) são descontados na mesma transação.
+    Bot com ordem em aberto na Binance (pending/submitted) não é removido
+    (409): o fill ainda pode chegar.
     """
-    bot = _get_bot_or_404(bot_id, session)
 
-    session.delete(bot)
-    session.commit()
+    def _delete(session: Session) -> None:
+        bot = _get_bot_or_404(bot_id, session)
+        open_order = session.exec(
+            select(BotOrder.id).where(
+                BotOrder.bot_id == bot_id,
+                BotOrder.status.in_(ORDER_OPEN_STATUSES),
+            )
+        ).first()
+        if open_order is not None:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Bot tem ordem em aberto; aguarde o fill ou a expiração antes de remover.",
+            )
+        remove_bot_stats(session, bot_id)
+        session.execute(delete(Trade).where(Trade.bot_id == bot_id))
+        session.execute(delete(BotOrder).where(BotOrder.bot_id == bot_id))
+        mark_changed(session, "trades", "orders")
+        session.delete(bot)
+
+    run_write(_delete)
     # 204 No Content -> corpo vazio
     return None
 
@@ -224,61 +290,75 @@ def delete_bot(bot_id: int, session: Session = Depends(get_session)) -> None:
 # Ações em massa: ligar/desligar todos
 # ---------------------------------------------------------------------
 @router.post("/actions/start_all")
-def start_all_bots(session: Session = Depends(get_session)) -> dict:
+def start_all_bots() -> dict:
     """
     Coloca online todos os bots que:
       - não estão bloqueados
       - estão offline
     Retorna quantos foram alterados.
     """
-    bots = session.exec(select(Bot)).all()
-    updated = 0
-
-    for bot in bots:
-        if not bot.blocked and bot.status != "online":
-            bot.status = "online"
-            if bot.started_at is None:
-                bot.started_at = datetime.utcnow()
-            updated += 1
-            session.add(bot)
 
-    if updated > 0:
-        session.commit()
+    def _start_all(session: Session) -> int:
+        bots = session.exec(select(Bot)).all()
+        updated = 0
 
-    return {"updated": updated}
+        for bot in bots:
+            if not bot.blocked and bot.status != "online":
+                bot.status = "online"
+                if bot.started_at is None:
+                    bot.started_at = datetime.utcnow()
+                updated += 1
+                session.add(bot)
+
+        return updated
+
+    return {"updated": run_write(_start_all)}
 
 
 @router.post("/actions/stop_all")
-def stop_all_bots(session: Session = Depends(get_session)) -> dict:
+def stop_all_bots() -> dict:
     """
     Coloca offline todos os bots que estão online (independente de bloqueio).
     Retorna quantos foram alterados.
     """
-    bots = session.exec(select(Bot)).all()
-    updated = 0
 
-    for bot in bots:
-        if bot.status != "offline":
-            bot.status = "offline"
-            updated += 1
-            session.add(bot)
+    def _stop_all(session: Session) -> int:
+        bots = session.exec(select(Bot)).all()
+        updated = 0
+
+        for bot in bots:
+            if bot.status != "offline":
+                bot.status = "offline"
+                updated += 1
+                session.add(bot)
 
-    if updated > 0:
-        session.commit()
+        return updated
 
-    return {"updated": updated}
+    return {"updated": run_write(_stop_all)}
 
 
-@router.get("/{bot_id}/trades", response_model=List[TradeRead])
-def list_bot_trades(bot_id: int, session: Session = Depends(get_session)) -> List[Trade]:
+@router.get("/{bot_id}/trades", response_model=Page[TradeRead])
+def list_bot_trades(
+    bot_id: int,
+    limit: int = Query(500, ge=1, le=5000),
+    before: Optional[int] = Query(None, description="Cursor: trades com id < before"),
+    after: Optional[int] = Query(None, description="Cursor: trades com id > after"),
+    session: Session = Depends(get_session),
+) -> ORJSONResponse:
     """
     Lista os trades de um bot, em ordem de criação.
+    Paginação por cursor: use `next_cursor` da resposta como `after`.
     """
     bot = _get_bot_or_404(bot_id, session)
-    trades = session.exec(
-        select(Trade).where(Trade.bot_id == bot.id).order_by(Trade.id)
-    ).all()
-    return trades
+    page = keyset_paginate(
+        session,
+        select(*columns_for(TradeRead, Trade)).where(Trade.bot_id == bot.id),
+        Trade.id,
+        limit=limit,
+        before=before,
+        after=after,
+    )
+    return ORJSONResponse(page_as_dicts(page))
 
 
 @router.post("/{bot_id}/close_position", response_model=BotRead)
@@ -286,6 +366,8 @@ def close_position(bot_id: int, session: Session = Depends(get_session)) -> Bot:
     """
     Fecha manualmente a posição do bot, vendendo tudo ao preço de mercado atual.
     Não bloqueia o bot, diferente do stop-loss.
+    Em app_mode == "real" grava a ordem de venda; o engine a envia e o bot
+    é atualizado quando o fill for reconciliado.
     """
     bot = _get_bot_or_404(bot_id, session)
 
@@ -297,6 +379,11 @@ def close_position(bot_id: int, session: Session = Depends(get_session)) -> Bot:
 
     try:
         price = get_symbol_price(bot.symbol)
+    except CircuitOpenError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Binance indisponível (circuit breaker): {e}",
+        )
     except httpx.HTTPError as e:
         raise HTTPException(
             status_code=status.HTTP_502_BAD_GATEWAY,
@@ -304,7 +391,23 @@ def close_position(bot_id: int, session: Session = Depends(get_session)) -> Bot:
         )
 
     settings = get_settings()
-    # Reutiliza a mesma lógica de venda simulada do engine
-    simulate_sell(bot, session, settings, price, reason="manual_close")
-    session.refresh(bot)
-    return bot
+
+    def _close(write_session: Session) -> Bot:
+        # Recarrega na sessão de escrita: o engine pode ter vendido nesse meio tempo
+        write_bot = _get_bot_or_404(bot_id, write_session)
+        # Reutiliza a mesma lógica de venda do engine
+        diff = execute_sell(
+            bot_snapshot(write_bot),
+            write_session,
+            settings,
+            price,
+            reason="manual_close",
+            now=datetime.utcnow(),
+        )
+        if diff is not None:
+            # venda pela API: projetada direto (o journal é do processo do engine)
+            project_diffs(write_session, [diff])
+            write_session.refresh(write_bot)
+        return write_bot
+
+    return run_write(_close)
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import asyncio
+from typing import AsyncIterator, Optional
+
+from fastapi import APIRouter, Header, Query
+from fastapi.responses import StreamingResponse
+
+from app.core.events import format_event_id, get_event_hub, parse_event_id
+
+router = APIRouter(prefix="/events", tags=["events"])
+
+HEARTBEAT_SECONDS = 15.0
+
+
+@router.get("/ping")
+def events_ping() -> dict:
+    return {"message": "events endpoint ok", "last_seq": get_event_hub().last_seq}
+
+
+async def _sse_stream(last_seq: Optional[int]) -> AsyncIterator[bytes]:
+    hub = get_event_hub()
+    if last_seq is None:
+        # Cliente novo: começa do ponto atual (o replay cobre o que chegar
+        # até a inscrição) e recebe esse ponto como id inicial.
+        last_seq = hub.last_seq
+        yield f"id: {format_event_id(last_seq)}\nevent: hello\ndata: {{}}\n\n".encode()
+    events = hub.subscribe(last_seq).__aiter__()
+
+    next_event = asyncio.ensure_future(events.__anext__())
+    try:
+        while True:
+            done, _ = await asyncio.wait({next_event}, timeout=HEARTBEAT_SECONDS)
+            if not done:
+                # comentário SSE: mantém a conexão viva atrás de proxies
+                yield b": ping\n\n"
+                continue
+
+            event = next_event.result()
+            next_event = asyncio.ensure_future(events.__anext__())
+
+            if event is None:
+                yield b"event: resync\ndata: {}\n\n"
+                continue
+
+            seq, kind, data = event
+            yield (
+                f"id: {format_event_id(seq)}\nevent: {kind}\ndata: ".encode()
+                + data
+                + b"\n\n"
+            )
+    finally:
+        # espera o __anext__ pendente terminar antes de fechar o gerador
+        next_event.cancel()
+        try:
+            await next_event
+        except (asyncio.CancelledError, StopAsyncIteration):
+            pass
+        await events.aclose()
+
+
+@router.get("/stream")
+async def stream_events(
+    since: Optional[str] = Query(
+        None,
+        description="Retoma a partir deste id de evento (igual ao Last-Event-ID)",
+    ),
+    last_event_id: Optional[str] = Header(None),
+) -> StreamingResponse:
+    """
+    Server-sent events com deltas de bots, trades e indicadores.
+
+    Tipos: hello (só na primeira conexão), bot (id + campos alterados),
+    bot_deleted, trade, indicator e resync (cliente deve recarregar as listas).
+    Reconexões do EventSource mandam Last-Event-ID e recebem o que perderam.
+    """
+    last_seq = parse_event_id(last_event_id or since)
+    return StreamingResponse(
+        _sse_stream(last_seq),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -2,11 +2,17 @@ from __future__ import annotations
 
 import sys
 import traceback
+from datetime import datetime
+from typing import Optional
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Request
 from sqlmodel import Session, select
 
+from app.core.http_cache import cached_json
 from app.db.session import engine
+from app.export.columnar import INDICATOR_COLUMNS, negotiate_format
+from app.export.response import export_response
+from app.export.rows import iter_query_partitions
 from app.indicators.service import sync_indicators_for_symbol
 from app.models.indicator import Indicator
 
@@ -41,26 +47,73 @@ def sync_symbol_indicators(symbol: str):
 
 
 @router.get("/latest/{symbol}")
-def get_latest_indicator(symbol: str):
+def get_latest_indicator(symbol: str, request: Request):
+    """
+    Último indicador 5m do símbolo.
+    Suporta ETag/If-None-Match (304 enquanto nenhum indicador novo for inserido).
+    """
     symbol = symbol.upper()
 
-    with Session(engine) as session:
-        ind = (
-            session.exec(
-                select(Indicator)
-                .where(
-                    Indicator.symbol == symbol,
-                    Indicator.interval == "5m",
+    def _build() -> Indicator:
+        with Session(engine) as session:
+            ind = (
+                session.exec(
+                    select(Indicator)
+                    .where(
+                        Indicator.symbol == symbol,
+                        Indicator.interval == "5m",
+                    )
+                    .order_by(Indicator.close_time.desc())
                 )
-                .order_by(Indicator.close_time.desc())
+                .first()
             )
-            .first()
-        )
 
-        if not ind:
-            raise HTTPException(
-                status_code=404,
-                detail="Nenhum indicador encontrado para esse símbolo.",
-            )
+            if not ind:
+                raise HTTPException(
+                    status_code=404,
+                    detail="Nenhum indicador encontrado para esse símbolo.",
+                )
+
+            return ind
+
+    return cached_json(request, ("indicators",), _build)
+
+
+@router.get("/export/{symbol}")
+def export_indicators(
+    symbol: str,
+    request: Request,
+    interval: str = "5m",
+    since: Optional[datetime] = Query(None, description="open_time >= since (UTC)"),
+    until: Optional[datetime] = Query(None, description="open_time < until (UTC)"),
+    fmt: Optional[str] = Query(
+        None,
+        alias="format",
+        description="csv | arrow | parquet (ou via header Accept)",
+    ),
+):
+    """
+    Exporta o histórico de indicadores de um símbolo em CSV, Arrow IPC
+    ou Parquet (streaming em lotes, tipos preservados).
+    """
+    try:
+        out_format = negotiate_format(fmt, request.headers.get("accept"))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    symbol = symbol.upper()
+    query = select(*(getattr(Indicator, name) for name, _kind in INDICATOR_COLUMNS)).where(
+        Indicator.symbol == symbol,
+        Indicator.interval == interval,
+    )
+    if since is not None:
+        query = query.where(Indicator.open_time >= since)
+    if until is not None:
+        query = query.where(Indicator.open_time < until)
 
-        return ind
+    return export_response(
+        out_format,
+        INDICATOR_COLUMNS,
+        iter_query_partitions(query.order_by(Indicator.open_time)),
+        f"indicators_{symbol}_{interval}",
+    )
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
+from sqlmodel import Session, select
+
+from app.api.pagination import Page, keyset_paginate, page_as_dicts
+from app.core.serialization import ORJSONResponse, columns_for
+from app.db.session import get_session
+from app.models.order import BotOrder, BotOrderRead
+
+router = APIRouter(prefix="/orders", tags=["orders"])
+
+
+@router.get("/recent", response_model=Page[BotOrderRead])
+def list_recent_orders(
+    limit: int = Query(50, ge=1, le=500),
+    bot_id: Optional[int] = None,
+    status: Optional[str] = None,
+    before: Optional[int] = Query(None, description="Cursor: ordens com id < before"),
+    after: Optional[int] = Query(None, description="Cursor: ordens com id > after"),
+    session: Session = Depends(get_session),
+) -> ORJSONResponse:
+    """Ordens reais (app_mode == "real") mais recentes, com status e latência."""
+    query = select(*columns_for(BotOrderRead, BotOrder))
+    if bot_id is not None:
+        query = query.where(BotOrder.bot_id == bot_id)
+    if status is not None:
+        query = query.where(BotOrder.status == status)
+
+    page = keyset_paginate(
+        session,
+        query,
+        BotOrder.id,
+        limit=limit,
+        before=before,
+        after=after,
+        descending=True,
+    )
+    return ORJSONResponse(page_as_dicts(page))
+
+
+@router.get("/latency")
+def orders_latency(
+    last: int = Query(500, ge=1, le=10000, description="Quantas ordens recentes considerar"),
+    session: Session = Depends(get_session),
+) -> dict:
+    """
+    Latência de envio (ida e volta até a confirmação da Binance) das últimas
+    ordens: média, p50, p95 e máximo, em ms.
+    """
+    values = sorted(
+        session.exec(
+            select(BotOrder.latency_ms)
+            .where(BotOrder.latency_ms.is_not(None))
+            .order_by(BotOrder.id.desc())
+            .limit(last)
+        ).all()
+    )
+    if not values:
+        return {"count": 0, "avg_ms": None, "p50_ms": None, "p95_ms": None, "max_ms": None}
+
+    def _pct(p: float) -> float:
+        return values[min(len(values) - 1, int(p * len(values)))]
+
+    return {
+        "count": len(values),
+        "avg_ms": sum(values) / len(values),
+        "p50_ms": _pct(0.50),
+        "p95_ms": _pct(0.95),
+        "max_ms": values[-1],
+    }
@@ -1,46 +1,89 @@
 from __future__ import annotations
 
 from datetime import datetime, timezone
-from typing import List
+from typing import Literal, Optional
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request, Response
+from sqlalchemy import case, func
 from sqlmodel import Session, select
 
+from app.core.http_cache import cached_json
 from app.db.session import get_session
-from app.models import Bot, Trade
+from app.db.writer import run_write
+from app.models import Bot, BotStats, GlobalStats, Trade, TradeRollup
+from app.stats.rollups import GLOBAL_BOT_ID
+from app.stats.service import GLOBAL_STATS_ID, rebuild_stats, trade_aggregate_columns
 
 router = APIRouter(prefix="/stats", tags=["stats"])
 
 
+def _normalize_symbol(symbol: Optional[str]) -> Optional[str]:
+    return symbol.upper().strip() if symbol else None
+
+
+def _filtered_trades_query(query, symbol: Optional[str], since: Optional[datetime]):
+    if symbol is not None:
+        query = query.where(Trade.symbol == symbol)
+    if since is not None:
+        query = query.where(Trade.created_at >= since)
+    return query
+
+
 @router.get("/ping")
 def stats_ping() -> dict:
     return {"message": "stats endpoint ok"}
 
 
 @router.get("/summary")
-def stats_summary(db: Session = Depends(get_session)) -> dict:
-    """Resumo global dos bots e trades."""
-    bots: List[Bot] = db.exec(select(Bot)).all()
-    trades: List[Trade] = db.exec(select(Trade)).all()
-
-    total_bots = len(bots)
-    total_bots_online = sum(1 for b in bots if b.status == "online")
-    total_bots_blocked = sum(1 for b in bots if b.blocked)
-    total_bots_with_open_position = sum(1 for b in bots if b.has_open_position)
-
-    total_saldo_usdt_livre = sum(float(b.saldo_usdt_livre or 0) for b in bots)
-
-    total_realized_pnl = sum(
-        float(t.realized_pnl or 0)
-        for t in trades
-        if t.realized_pnl is not None
+def stats_summary(
+    request: Request,
+    symbol: Optional[str] = None,
+    since: Optional[datetime] = None,
+    db: Session = Depends(get_session),
+) -> Response:
+    """
+    Resumo global dos bots e trades.
+
+    Tudo é agregado no banco (só uma linha de resultado é materializada).
+    Sem filtros, os totais de trades vêm do rollup global_stats;
+    com `symbol`/`since`, de um agregado direto sobre a tabela trade.
+    Suporta ETag/If-None-Match.
+    """
+    return cached_json(
+        request,
+        ("bots", "trades"),
+        lambda: _build_summary(db, _normalize_symbol(symbol), since),
     )
 
-    total_fees_usdt = sum(
-        float(t.fee_amount or 0)
-        for t in trades
-        if t.fee_amount is not None and t.fee_asset == "USDT"
+
+def _build_summary(db: Session, symbol: Optional[str], since: Optional[datetime]) -> dict:
+
+    bots_query = select(
+        func.count(Bot.id),
+        func.coalesce(func.sum(case((Bot.status == "online", 1), else_=0)), 0),
+        func.coalesce(func.sum(case((Bot.blocked == True, 1), else_=0)), 0),  # noqa: E712
+        func.coalesce(func.sum(case((Bot.has_open_position == True, 1), else_=0)), 0),  # noqa: E712
+        func.coalesce(func.sum(Bot.saldo_usdt_livre), 0.0),
     )
+    if symbol is not None:
+        bots_query = bots_query.where(Bot.symbol == symbol)
+
+    (
+        total_bots,
+        total_bots_online,
+        total_bots_blocked,
+        total_bots_with_open_position,
+        total_saldo_usdt_livre,
+    ) = db.exec(bots_query).one()
+
+    if symbol is None and since is None:
+        global_stats = db.get(GlobalStats, GLOBAL_STATS_ID)
+        total_realized_pnl = global_stats.realized_pnl if global_stats else 0
+        total_fees_usdt = global_stats.total_fees_usdt if global_stats else 0
+    else:
+        _n, _buys, _sells, total_realized_pnl, total_fees_usdt, _last = db.exec(
+            _filtered_trades_query(select(*trade_aggregate_columns()), symbol, since)
+        ).one()
 
     return {
         "total_bots": total_bots,
@@ -55,49 +98,139 @@ def stats_summary(db: Session = Depends(get_session)) -> dict:
 
 
 @router.get("/by_bot")
-def stats_by_bot(db: Session = Depends(get_session)) -> list[dict]:
-    """Resumo de performance por bot."""
-    bots: List[Bot] = db.exec(select(Bot)).all()
-    result: list[dict] = []
-
-    for bot in bots:
-        trades: List[Trade] = db.exec(
-            select(Trade).where(Trade.bot_id == bot.id)
-        ).all()
-
-        # ordena em memória para pegar o último trade
-        trades.sort(key=lambda t: t.created_at or datetime.min)
+def stats_by_bot(
+    request: Request,
+    symbol: Optional[str] = None,
+    since: Optional[datetime] = None,
+    db: Session = Depends(get_session),
+) -> Response:
+    """
+    Resumo de performance por bot, em uma única query.
+
+    Sem `since`, lê de bot_stats; com `since`, faz GROUP BY bot_id sobre
+    a tabela trade filtrada. Só as linhas agregadas são materializadas.
+    Suporta ETag/If-None-Match.
+    """
+    return cached_json(
+        request,
+        ("bots", "trades"),
+        lambda: _build_by_bot(db, _normalize_symbol(symbol), since),
+    )
 
-        num_trades = len(trades)
-        num_buys = sum(1 for t in trades if t.side == "BUY")
-        num_sells = sum(1 for t in trades if t.side == "SELL")
 
-        realized_pnl = sum(
-            float(t.realized_pnl or 0)
-            for t in trades
-            if t.realized_pnl is not None
+def _build_by_bot(
+    db: Session,
+    symbol: Optional[str],
+    since: Optional[datetime],
+) -> list[dict]:
+
+    if since is None:
+        query = select(
+            Bot.id,
+            Bot.name,
+            Bot.symbol,
+            BotStats.num_trades,
+            BotStats.num_buys,
+            BotStats.num_sells,
+            BotStats.realized_pnl,
+            BotStats.total_fees_usdt,
+            BotStats.last_trade_at,
+        ).outerjoin(BotStats, BotStats.bot_id == Bot.id)
+    else:
+        agg = (
+            _filtered_trades_query(
+                select(Trade.bot_id, *trade_aggregate_columns()), symbol, since
+            )
+            .group_by(Trade.bot_id)
+            .subquery()
         )
-
-        total_fees_usdt = sum(
-            float(t.fee_amount or 0)
-            for t in trades
-            if t.fee_amount is not None and t.fee_asset == "USDT"
+        cols = list(agg.c)
+        query = select(Bot.id, Bot.name, Bot.symbol, *cols[1:]).outerjoin(
+            agg, agg.c.bot_id == Bot.id
         )
 
-        last_trade_at = trades[-1].created_at if trades else None
+    if symbol is not None:
+        query = query.where(Bot.symbol == symbol)
 
+    result: list[dict] = []
+    for row in db.exec(query.order_by(Bot.id)):
+        (
+            bot_id,
+            bot_name,
+            bot_symbol,
+            num_trades,
+            num_buys,
+            num_sells,
+            realized_pnl,
+            total_fees_usdt,
+            last_trade_at,
+        ) = row
         result.append(
             {
-                "bot_id": bot.id,
-                "bot_name": bot.name,
-                "symbol": bot.symbol,
-                "num_trades": num_trades,
-                "num_buys": num_buys,
-                "num_sells": num_sells,
-                "realized_pnl": realized_pnl,
-                "total_fees_usdt": total_fees_usdt,
+                "bot_id": bot_id,
+                "bot_name": bot_name,
+                "symbol": bot_symbol,
+                "num_trades": num_trades or 0,
+                "num_buys": num_buys or 0,
+                "num_sells": num_sells or 0,
+                "realized_pnl": realized_pnl or 0,
+                "total_fees_usdt": total_fees_usdt or 0,
                 "last_trade_at": last_trade_at,
             }
         )
 
     return result
+
+
+@router.get("/timeseries")
+def stats_timeseries(
+    bucket: Literal["minute", "hour", "day"] = "hour",
+    bot_id: Optional[int] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    db: Session = Depends(get_session),
+) -> dict:
+    """
+    Série temporal de P/L realizado, taxas, nº de trades e volume (USDT)
+    por bucket de tempo, para um bot (`bot_id`) ou global.
+
+    Lida direto de trade_rollup (range scan na chave primária).
+    """
+    scope_bot_id = bot_id if bot_id is not None else GLOBAL_BOT_ID
+
+    query = select(
+        TradeRollup.bucket_start,
+        TradeRollup.realized_pnl,
+        TradeRollup.fees_usdt,
+        TradeRollup.num_trades,
+        TradeRollup.quote_volume,
+    ).where(
+        TradeRollup.bucket == bucket,
+        TradeRollup.bot_id == scope_bot_id,
+    )
+    if since is not None:
+        query = query.where(TradeRollup.bucket_start >= since)
+    if until is not None:
+        query = query.where(TradeRollup.bucket_start < until)
+
+    points = [
+        {
+            "bucket_start": start,
+            "realized_pnl": pnl,
+            "fees_usdt": fees,
+            "num_trades": n,
+            "quote_volume": volume,
+        }
+        for start, pnl, fees, n, volume in db.exec(
+            query.order_by(TradeRollup.bucket_start)
+        )
+    ]
+
+    return {"bucket": bucket, "bot_id": bot_id, "points": points}
+
+
+@router.post("/rebuild")
+def stats_rebuild() -> dict:
+    """Reconstrói bot_stats/global_stats/trade_rollup a partir da tabela trade (backfill)."""
+    total = run_write(rebuild_stats)
+    return {"rebuilt_bots": total}
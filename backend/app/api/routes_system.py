@@ -1,10 +1,16 @@
 from __future__ import annotations
 
-from fastapi import APIRouter
+from typing import Any
+
+from fastapi import APIRouter, Body, status
 
 from app.core.config import get_settings
+from app.core.serialization import ORJSONResponse
+from app.core.startup import get_startup
 from app.core.state import (
     get_system_running,
+    list_engine_flags,
+    set_engine_flag,
     toggle_system_running,
     set_system_running,
 )
@@ -23,9 +29,23 @@ def health() -> dict:
     }
 
 
+@router.get("/ready")
+def ready() -> ORJSONResponse:
+    """
+    Prontidão do processo (diferente do /health, que só diz que a API
+    responde): 503 enquanto o warm-up do boot não terminou, 200 depois.
+    Traz a duração de cada fase (imports, init_db, warm-up).
+    """
+    startup = get_startup()
+    return ORJSONResponse(
+        startup.to_dict(),
+        status_code=status.HTTP_200_OK if startup.ready else status.HTTP_503_SERVICE_UNAVAILABLE,
+    )
+
+
 @router.get("/state")
 def get_state() -> dict:
-    """Retorna se o sistema está ligado ou desligado (em memória)."""
+    """Retorna se o sistema está ligado ou desligado (estado compartilhado no banco)."""
     return {"system_running": get_system_running()}
 
 
@@ -44,3 +64,19 @@ def set_state(system_running: bool) -> dict:
     """
     value = set_system_running(system_running)
     return {"system_running": value}
+
+
+@router.get("/engines/{engine_name}/flags")
+def get_engine_flags(engine_name: str) -> dict:
+    """Flags de runtime de um engine (ex.: paused), guardadas no system_state."""
+    return {"engine": engine_name, "flags": list_engine_flags(engine_name)}
+
+
+@router.put("/engines/{engine_name}/flags/{flag}")
+def put_engine_flag(engine_name: str, flag: str, value: Any = Body(..., embed=True)) -> dict:
+    """
+    Grava uma flag de runtime do engine. O engine enxerga a mudança no
+    próximo ciclo. Ex.: {"value": true} em /engines/main/flags/paused.
+    """
+    set_engine_flag(flag, value, engine_name)
+    return {"engine": engine_name, "flags": list_engine_flags(engine_name)}
@@ -1,15 +1,21 @@
 from __future__ import annotations
 
-from typing import List, Optional
-from io import StringIO
-import csv
+from datetime import datetime
+from typing import Iterator, Optional
+import zlib
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from fastapi.responses import StreamingResponse
 from sqlmodel import Session, select
 
+from app.api.pagination import Page, keyset_paginate, page_as_dicts
+from app.core.serialization import ORJSONResponse, columns_for
 from app.db.session import get_session
+from app.export.columnar import TRADE_COLUMNS, negotiate_format
+from app.export.response import export_response
+from app.export.rows import iter_csv, iter_query_partitions
 from app.models import Trade
+from app.models.trade import TradeRead
 
 router = APIRouter(prefix="/trades", tags=["trades"])
 
@@ -19,18 +25,24 @@ def trades_ping() -> dict:
     return {"message": "trades endpoint ok"}
 
 
-@router.get("/recent")
+@router.get("/recent", response_model=Page[TradeRead])
 def list_recent_trades(
     limit: int = Query(50, ge=1, le=500),
     bot_id: Optional[int] = None,
     symbol: Optional[str] = None,
+    before: Optional[int] = Query(None, description="Cursor: trades com id < before"),
+    after: Optional[int] = Query(None, description="Cursor: trades com id > after"),
     session: Session = Depends(get_session),
-) -> List[Trade]:
+) -> ORJSONResponse:
     """
     Lista os trades mais recentes, opcionalmente filtrando por bot_id e/ou symbol.
     Ordena do mais recente para o mais antigo.
+
+    Paginação por cursor: use `next_cursor` da resposta como `before`
+    para buscar a próxima página (mais antiga).
     """
-    query = select(Trade)
+    # Só as colunas de TradeRead, direto das linhas (sem ORM/revalidação)
+    query = select(*columns_for(TradeRead, Trade))
 
     if bot_id is not None:
         query = query.where(Trade.bot_id == bot_id)
@@ -39,82 +51,107 @@ def list_recent_trades(
         symbol = symbol.upper().strip()
         query = query.where(Trade.symbol == symbol)
 
-    query = query.order_by(Trade.id.desc()).limit(limit)
+    page = keyset_paginate(
+        session,
+        query,
+        Trade.id,
+        limit=limit,
+        before=before,
+        after=after,
+        descending=True,
+    )
+    return ORJSONResponse(page_as_dicts(page))
+
+
+EXPORT_COLUMNS = [name for name, _kind in TRADE_COLUMNS]
+
+
+def _export_query(
+    bot_id: Optional[int],
+    symbol: Optional[str],
+    since: Optional[datetime],
+    until: Optional[datetime],
+    limit: Optional[int],
+):
+    # Só as colunas necessárias (sem montar objetos ORM por linha)
+    query = select(*(getattr(Trade, col) for col in EXPORT_COLUMNS))
+
+    if bot_id is not None:
+        query = query.where(Trade.bot_id == bot_id)
+
+    if symbol is not None:
+        query = query.where(Trade.symbol == symbol)
+
+    if since is not None:
+        query = query.where(Trade.created_at >= since)
+
+    if until is not None:
+        query = query.where(Trade.created_at < until)
+
+    # exporta ordenado do mais recente para o mais antigo
+    query = query.order_by(Trade.id.desc())
+    if limit is not None:
+        query = query.limit(limit)
+    return query
 
-    trades = session.exec(query).all()
-    return trades
+
+def _gzip_chunks(chunks: Iterator[str]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)  # formato gzip
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode("utf-8"))
+        if data:
+            yield data
+    yield compressor.flush()
 
 
 @router.get("/export")
-def export_trades_csv(
-    limit: int = Query(200, ge=1, le=2000),
+def export_trades(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, description="Sem limite se omitido"),
     bot_id: Optional[int] = None,
     symbol: Optional[str] = None,
-    session: Session = Depends(get_session),
+    since: Optional[datetime] = Query(None, description="created_at >= since (UTC)"),
+    until: Optional[datetime] = Query(None, description="created_at < until (UTC)"),
+    gzip: bool = Query(
+        False,
+        description="Comprime o CSV (.csv.gz); só vale para format=csv (400 com arrow/parquet)",
+    ),
+    fmt: Optional[str] = Query(
+        None,
+        alias="format",
+        description="csv | arrow | parquet (ou via header Accept)",
+    ),
 ) -> StreamingResponse:
     """
-    Exporta trades em formato CSV, com os mesmos filtros de /recent.
+    Exporta trades em CSV, Arrow IPC stream ou Parquet, com os mesmos
+    filtros de /recent mais intervalo de datas. O arquivo é gerado em
+    streaming, então pode ter milhões de linhas sem carregar tudo em memória.
     """
-    query = select(Trade)
-
-    if bot_id is not None:
-        query = query.where(Trade.bot_id == bot_id)
+    try:
+        out_format = negotiate_format(fmt, request.headers.get("accept"))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if gzip and out_format != "csv":
+        # Parquet já sai comprimido (zstd); Arrow IPC é para leitura direta
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"gzip=true só vale para format=csv (pedido: {out_format}).",
+        )
 
     if symbol is not None:
         symbol = symbol.upper().strip()
-        query = query.where(Trade.symbol == symbol)
 
-    # exporta ordenado do mais recente para o mais antigo
-    query = query.order_by(Trade.id.desc()).limit(limit)
-    trades = session.exec(query).all()
-
-    output = StringIO()
-    writer = csv.writer(output)
-
-    # cabeçalho
-    writer.writerow(
-        [
-            "id",
-            "bot_id",
-            "symbol",
-            "side",
-            "price",
-            "qty",
-            "quote_qty",
-            "fee_amount",
-            "fee_asset",
-            "realized_pnl",
-            "is_simulated",
-            "info",
-            "created_at",
-        ]
-    )
+    query = _export_query(bot_id, symbol, since, until, limit)
 
-    # linhas
-    for t in trades:
-        writer.writerow(
-            [
-                t.id,
-                t.bot_id,
-                t.symbol,
-                t.side,
-                t.price,
-                t.qty,
-                t.quote_qty,
-                t.fee_amount,
-                t.fee_asset,
-                t.realized_pnl,
-                t.is_simulated,
-                (t.info or ""),
-                t.created_at.isoformat() if t.created_at else "",
-            ]
-        )
+    partitions = iter_query_partitions(query)
 
-    output.seek(0)
-    filename = "trades_export.csv"
+    if out_format == "csv" and gzip:
+        return StreamingResponse(
+            _gzip_chunks(iter_csv(EXPORT_COLUMNS, partitions)),
+            media_type="application/gzip",
+            headers={
+                "Content-Disposition": 'attachment; filename="trades_export.csv.gz"'
+            },
+        )
 
-    return StreamingResponse(
-        output,
-        media_type="text/csv",
-        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
-    )
+    return export_response(out_format, TRADE_COLUMNS, partitions, "trades_export")
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from typing import Literal, Optional
+
+import numpy as np
+
+from app.backtest.engine import align_signals, compute_signals
+from app.binance.client import get_klines
+from app.marketdata.archive import INTERVAL_MS, read_klines
+
+MarketSource = Literal["binance", "archive"]
+
+# Histórico extra de 5m antes do período para "aquecer" EMAs/MACD/RSI
+_WARMUP = timedelta(milliseconds=200 * INTERVAL_MS["5m"])
+
+INDICATOR_INTERVAL = "5m"  # mesmo intervalo dos indicadores usados pelo engine
+
+
+def _times_ms(klines: list[dict], key: str) -> np.ndarray:
+    return np.array([k[key] for k in klines], dtype="datetime64[ms]").astype(np.int64)
+
+
+def market_arrays_from_klines(
+    klines: list[dict],
+    indicator_klines: list[dict] | None = None,
+) -> dict[str, np.ndarray]:
+    """
+    Converte candles em arrays para o backtest: close, close_time (ms) e os
+    sinais de compra/venda dos indicadores 5m alinhados pelo close_time.
+    Sem `indicator_klines`, os sinais são calculados sobre os próprios candles.
+    """
+    prices = np.array([k["close"] for k in klines], dtype=np.float64)
+    times = _times_ms(klines, "close_time")
+
+    source = indicator_klines if indicator_klines is not None else klines
+    buy, sell = compute_signals([k["close"] for k in source])
+    if indicator_klines is not None:
+        ind_times = _times_ms(indicator_klines, "close_time")
+        buy = align_signals(times, ind_times, buy)
+        sell = align_signals(times, ind_times, sell)
+
+    return {"prices": prices, "times": times, "buy": buy, "sell": sell}
+
+
+def fetch_market_arrays(symbol: str, interval: str, limit: int) -> dict[str, np.ndarray]:
+    """Últimos `limit` candles da Binance (máx. 1000) já no formato do backtest."""
+    klines = get_klines(symbol=symbol, interval=interval, limit=limit)
+    indicator_klines = (
+        None
+        if interval == INDICATOR_INTERVAL
+        else get_klines(symbol=symbol, interval=INDICATOR_INTERVAL, limit=1000)
+    )
+    return market_arrays_from_klines(klines, indicator_klines)
+
+
+def archive_market_arrays(
+    symbol: str,
+    interval: str,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+) -> dict[str, np.ndarray]:
+    """
+    Mesmo formato de fetch_market_arrays, lido do arquivo colunar local
+    (ver app.marketdata.backfill). `prices`/`times` são views np.memmap.
+    """
+    candles = read_klines(symbol, interval, since, until, fields=("close", "close_time"))
+    ind_since = since - _WARMUP if since is not None else None
+    indicators = read_klines(
+        symbol, INDICATOR_INTERVAL, ind_since, until, fields=("close", "close_time")
+    )
+
+    buy, sell = compute_signals(indicators["close"])
+    times = candles["close_time"]
+    return {
+        "prices": candles["close"],
+        "times": times,
+        "buy": align_signals(times, indicators["close_time"], buy),
+        "sell": align_signals(times, indicators["close_time"], sell),
+    }
+
+
+def load_market_arrays(
+    source: MarketSource,
+    symbol: str,
+    interval: str,
+    *,
+    limit: int = 1000,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+) -> dict[str, np.ndarray]:
+    if source == "archive":
+        return archive_market_arrays(symbol, interval, since, until)
+    return fetch_market_arrays(symbol, interval, limit)
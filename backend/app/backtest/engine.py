@@ -0,0 +1,313 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Callable, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from app.indicators.service import compute_trend_and_signals, ema, macd_series, rsi
+
+# Busca de eventos em blocos crescentes: o custo de achar o próximo trade é
+# proporcional à distância até ele, não ao tamanho da série inteira.
+_CHUNK_START = 512
+_CHUNK_MAX = 1 << 16
+
+DEFAULT_FEE_RATE = 0.001  # mesmo padrão de simulate_buy/simulate_sell
+
+
+class BacktestTrade(NamedTuple):
+    index: int  # posição do candle na série
+    time: Any  # times[index] (se informado)
+    side: str
+    price: float
+    qty: float
+    quote_qty: float
+    fee_amount: float
+    realized_pnl: Optional[float]
+    reason: Optional[str]
+
+
+@dataclass
+class BacktestResult:
+    trades: list[BacktestTrade]
+    equity: np.ndarray  # saldo livre + posição a preço de mercado, por candle
+    summary: dict = field(default_factory=dict)
+
+    def to_dict(self, max_points: Optional[int] = None) -> dict:
+        """Formato JSON; `max_points` reduz a curva de capital (amostragem uniforme)."""
+        equity = self.equity
+        step = 1
+        if max_points and len(equity) > max_points:
+            step = -(-len(equity) // max_points)
+        idx = np.arange(0, len(equity), step)
+        return {
+            "summary": self.summary,
+            "trades": [t._asdict() for t in self.trades],
+            "equity": {"index": idx.tolist(), "value": equity[idx].tolist()},
+        }
+
+
+# ---------------------------------------------------------------------
+# Sinais de mercado
+# ---------------------------------------------------------------------
+def compute_signals(closes: Sequence[float]) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Série de market_signal_compra / market_signal_venda a partir dos closes,
+    com as mesmas funções usadas por sync_indicators_for_symbol.
+    None vira False (o engine só age com sinal `is True`).
+
+    Obs.: o engine recalcula as EMAs sobre janelas de 200 candles; aqui a
+    série é contínua, então os primeiros valores podem diferir levemente.
+    """
+    closes = [float(c) for c in closes]
+    ema9 = ema(closes, 9)
+    ema21 = ema(closes, 21)
+    rsi14 = rsi(closes, 14)
+    macd_line, macd_signal, _hist = macd_series(closes)
+
+    n = len(closes)
+    buy = np.zeros(n, dtype=bool)
+    sell = np.zeros(n, dtype=bool)
+    for i in range(n):
+        _score, _label, m_buy, m_sell = compute_trend_and_signals(
+            ema9[i], ema21[i], macd_line[i], macd_signal[i], None, rsi14[i]
+        )
+        buy[i] = m_buy is True
+        sell[i] = m_sell is True
+    return buy, sell
+
+
+def align_signals(
+    times: np.ndarray,
+    indicator_times: np.ndarray,
+    values: np.ndarray,
+) -> np.ndarray:
+    """
+    Para cada candle, o sinal do último indicador com close_time <= time
+    (o que o engine enxergaria naquele momento). Antes do primeiro → False.
+    """
+    idx = np.searchsorted(indicator_times, times, side="right") - 1
+    out = np.zeros(len(times), dtype=bool)
+    ok = idx >= 0
+    out[ok] = np.asarray(values, dtype=bool)[idx[ok]]
+    return out
+
+
+# ---------------------------------------------------------------------
+# Replay
+# ---------------------------------------------------------------------
+def _first_true(mask_fn: Callable[[int, int], np.ndarray], start: int, end: int) -> int:
+    """Primeiro índice em [start, end) onde mask_fn(lo, hi) é True; -1 se nenhum."""
+    size = _CHUNK_START
+    lo = start
+    while lo < end:
+        hi = min(end, lo + size)
+        mask = mask_fn(lo, hi)
+        k = int(mask.argmax())
+        if mask[k]:
+            return lo + k
+        lo = hi
+        size = min(size * 2, _CHUNK_MAX)
+    return -1
+
+
+def run_backtest(
+    params,
+    prices: np.ndarray,
+    buy_signal: Optional[np.ndarray] = None,
+    sell_signal: Optional[np.ndarray] = None,
+    times: Optional[Sequence[Any]] = None,
+    fee_rate: float = DEFAULT_FEE_RATE,
+) -> BacktestResult:
+    """
+    Replay em memória da estratégia de um bot sobre uma série de preços,
+    com a mesma semântica de handle_no_position / handle_position /
+    simulate_buy / simulate_sell (um "ciclo" do engine por candle).
+
+    `params` é qualquer objeto com os campos de BotBase (Bot, BotCreate...).
+    O bot começa zerado: sem trades, sem posição e saldo = saldo_usdt_limit.
+
+    Em vez de iterar candle a candle, salta direto para o próximo evento
+    (compra/venda) com buscas vetorizadas no NumPy. Nada é gravado no banco.
+    """
+    prices = np.ascontiguousarray(prices, dtype=np.float64)
+    n = len(prices)
+    buy_signal = (
+        np.zeros(n, dtype=bool) if buy_signal is None else np.asarray(buy_signal, dtype=bool)
+    )
+    sell_signal = (
+        np.zeros(n, dtype=bool) if sell_signal is None else np.asarray(sell_signal, dtype=bool)
+    )
+    if len(buy_signal) != n or len(sell_signal) != n:
+        raise ValueError("buy_signal/sell_signal precisam ter o mesmo tamanho de prices.")
+
+    valor_trade = float(params.valor_de_trade_usdt)
+    perc_compra = params.porcentagem_compra or 0.0
+    take_profit = params.porcentagem_venda or 0.0
+    stop_loss_percent = params.stop_loss_percent or 0.0
+
+    initial_balance = float(params.saldo_usdt_limit)
+    saldo = initial_balance
+    qty_moeda = 0.0
+    has_trades = False
+    has_open_position = False
+    valor_inicial: Optional[float] = None
+    last_buy_price: Optional[float] = None
+    stopped = False
+
+    trades: list[BacktestTrade] = []
+    cash_delta = np.zeros(n, dtype=np.float64)
+    qty_delta = np.zeros(n, dtype=np.float64)
+
+    def _time(i: int):
+        return times[i] if times is not None else None
+
+    def _buy(i: int) -> None:
+        nonlocal saldo, qty_moeda, has_trades, has_open_position, valor_inicial, last_buy_price
+        price = float(prices[i])
+        qty = valor_trade / price
+        has_open_position = True
+        has_trades = True
+        qty_moeda += qty
+        saldo -= valor_trade
+        last_buy_price = price
+        valor_inicial = price
+        cash_delta[i] -= valor_trade
+        qty_delta[i] += qty
+        trades.append(
+            BacktestTrade(i, _time(i), "BUY", price, qty, valor_trade, valor_trade * fee_rate, None, None)
+        )
+
+    def _sell(i: int, reason: str) -> None:
+        nonlocal saldo, qty_moeda, has_open_position, valor_inicial
+        price = float(prices[i])
+        qty = qty_moeda
+        quote_value = qty * price
+        base_price = last_buy_price or valor_inicial or price
+        realized_pnl = quote_value - qty * base_price
+        has_open_position = False
+        qty_moeda = 0.0
+        saldo += quote_value
+        valor_inicial = price
+        cash_delta[i] += quote_value
+        qty_delta[i] -= qty
+        trades.append(
+            BacktestTrade(
+                i, _time(i), "SELL", price, qty, quote_value, quote_value * fee_rate, realized_pnl, reason
+            )
+        )
+
+    positive = prices > 0
+    i = 0
+    while i < n:
+        if not has_open_position:
+            if saldo < valor_trade:
+                break  # simulate_buy nunca mais executa: nada muda até o fim
+
+            if not has_trades and params.comprar_ao_iniciar:
+                # 1) compra inicial (opcionalmente esperando market_signal_compra)
+                if params.compra_mercado:
+                    j = _first_true(lambda lo, hi: buy_signal[lo:hi] & positive[lo:hi], i, n)
+                else:
+                    j = _first_true(lambda lo, hi: positive[lo:hi], i, n)
+                if j < 0:
+                    break
+                _buy(j)
+                i = j + 1
+                continue
+
+            if perc_compra <= 0:
+                break
+
+            if valor_inicial is None:
+                valor_inicial = float(prices[i])
+                i += 1
+                continue
+
+            # 2) compra por porcentagem_compra (mesma expressão do engine)
+            v = valor_inicial
+
+            def _entry(lo: int, hi: int) -> np.ndarray:
+                p = prices[lo:hi]
+                mask = ((p - v) / v * 100.0 <= -perc_compra) & positive[lo:hi]
+                if params.compra_mercado:
+                    mask &= buy_signal[lo:hi]
+                return mask
+
+            j = _first_true(_entry, i, n)
+            if j < 0:
+                break
+            _buy(j)
+            i = j + 1
+            continue
+
+        # --- posição aberta: stop loss tem prioridade sobre take profit ---
+        v = valor_inicial
+        base = last_buy_price or valor_inicial
+        sl_on = stop_loss_percent > 0 and bool(v)
+        tp_on = take_profit > 0 and bool(v)
+        if not sl_on and not tp_on:
+            break
+
+        def _exit(lo: int, hi: int) -> np.ndarray:
+            p = prices[lo:hi]
+            mask = np.zeros(hi - lo, dtype=bool)
+            sl = np.zeros(hi - lo, dtype=bool)
+            if sl_on:
+                sl = (p - v) / v * 100.0 <= -stop_loss_percent
+                if params.vender_stop_loss:
+                    mask |= sl & positive[lo:hi]
+            if tp_on:
+                tp = ((p - base) / base * 100.0 >= take_profit) & ~sl & positive[lo:hi]
+                if params.venda_mercado:
+                    tp &= sell_signal[lo:hi]
+                mask |= tp
+            return mask
+
+        j = _first_true(_exit, i, n)
+        if j < 0:
+            break
+        p = float(prices[j])
+        if sl_on and params.vender_stop_loss and (p - v) / v * 100.0 <= -stop_loss_percent:
+            _sell(j, "stop_loss_triggered")
+            stopped = True  # engine bloqueia e desliga o bot
+            break
+        _sell(j, "take_profit")
+        i = j + 1
+
+    cash = initial_balance + np.cumsum(cash_delta)
+    equity = cash + np.cumsum(qty_delta) * prices
+
+    sells = [t for t in trades if t.side == "SELL"]
+    realized = float(sum(t.realized_pnl for t in sells))
+    fees = float(sum(t.fee_amount for t in trades))
+    final_equity = float(equity[-1]) if n else initial_balance
+    if n:
+        drawdown = np.maximum.accumulate(equity) - equity
+        k = int(drawdown.argmax())
+        max_dd = float(drawdown[k])
+        peak = float(equity[k] + drawdown[k])
+        max_dd_pct = max_dd / peak * 100.0 if peak > 0 else 0.0
+    else:
+        max_dd = max_dd_pct = 0.0
+
+    summary = {
+        "candles": n,
+        "initial_balance": initial_balance,
+        "final_equity": final_equity,
+        "return_pct": (final_equity - initial_balance) / initial_balance * 100.0
+        if initial_balance
+        else 0.0,
+        "num_trades": len(trades),
+        "num_buys": len(trades) - len(sells),
+        "num_sells": len(sells),
+        "realized_pnl": realized,
+        "total_fees_usdt": fees,
+        "net_pnl": realized - fees,
+        "win_rate": sum(1 for t in sells if t.realized_pnl > 0) / len(sells) if sells else None,
+        "max_drawdown": max_dd,
+        "max_drawdown_pct": max_dd_pct,
+        "open_position": has_open_position,
+        "stopped_by_stop_loss": stopped,
+    }
+    return BacktestResult(trades=trades, equity=equity, summary=summary)
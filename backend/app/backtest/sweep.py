@@ -0,0 +1,409 @@
+from __future__ import annotations
+
+import itertools
+import json
+import os
+import signal
+import threading
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime
+from multiprocessing import shared_memory
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Callable, Literal, Optional, Union
+
+import numpy as np
+from pydantic import BaseModel, Field
+
+from app.backtest.engine import DEFAULT_FEE_RATE, run_backtest
+from app.core.config import get_settings
+
+# Campos da estratégia que podem variar na busca (o resto vem de SweepSpec)
+SWEPT_FIELDS = (
+    "porcentagem_compra",
+    "porcentagem_venda",
+    "stop_loss_percent",
+    "comprar_ao_iniciar",
+    "compra_mercado",
+    "venda_mercado",
+    "vender_stop_loss",
+)
+MARKET_FIELDS = ("prices", "buy", "sell")
+
+RankBy = Literal["pnl", "drawdown", "trades"]
+
+
+class ParamRange(BaseModel):
+    """Faixa inclusiva start..stop com passo `step`."""
+
+    start: float
+    stop: float
+    step: float = Field(gt=0)
+
+    def values(self) -> list[float]:
+        count = int(np.floor((self.stop - self.start) / self.step + 1e-9)) + 1
+        return [round(self.start + k * self.step, 10) for k in range(max(count, 0))]
+
+
+FloatValues = Union[ParamRange, list[float]]
+
+
+class SweepSpec(BaseModel):
+    """Definição de uma busca: mercado, parâmetros fixos e faixas a combinar."""
+
+    symbol: str
+    interval: str = "5m"
+    source: Literal["binance", "archive"] = "binance"
+    limit: int = Field(default=1000, ge=30, le=1000)  # só para source=binance
+    since: Optional[datetime] = None  # só para source=archive
+    until: Optional[datetime] = None
+
+    saldo_usdt_limit: float = 100.0
+    valor_de_trade_usdt: float = 10.0
+    fee_rate: float = Field(default=DEFAULT_FEE_RATE, ge=0)
+
+    porcentagem_compra: FloatValues = [0.0]
+    porcentagem_venda: FloatValues = [0.0]
+    stop_loss_percent: FloatValues = [0.0]
+    comprar_ao_iniciar: list[bool] = [False]
+    compra_mercado: list[bool] = [True]
+    venda_mercado: list[bool] = [True]
+    vender_stop_loss: list[bool] = [True]
+
+    def grid(self) -> list[dict]:
+        axes = []
+        for name in SWEPT_FIELDS:
+            values = getattr(self, name)
+            axes.append(values.values() if isinstance(values, ParamRange) else list(values))
+        return [dict(zip(SWEPT_FIELDS, combo)) for combo in itertools.product(*axes)]
+
+
+def combo_key(combo: dict) -> str:
+    return json.dumps([combo[name] for name in SWEPT_FIELDS])
+
+
+# ---------------------------------------------------------------------
+# Arquivos da busca: data/sweeps/<id>/{spec.json, *.npy, results.jsonl, status.json}
+# ---------------------------------------------------------------------
+def sweeps_dir() -> Path:
+    return Path(get_settings().sweeps_dir)
+
+
+def sweep_path(sweep_id: str) -> Path:
+    path = sweeps_dir() / sweep_id
+    if not sweep_id.isalnum() or not path.is_dir():
+        raise FileNotFoundError(f"Sweep '{sweep_id}' não encontrado.")
+    return path
+
+
+def create_sweep(spec: SweepSpec, market: dict[str, np.ndarray]) -> str:
+    """Grava spec + arrays de mercado (a busca pode ser retomada com os mesmos dados)."""
+    sweep_id = uuid.uuid4().hex[:12]
+    path = sweeps_dir() / sweep_id
+    path.mkdir(parents=True)
+    for name in MARKET_FIELDS:
+        np.save(path / f"{name}.npy", market[name])
+    (path / "spec.json").write_text(spec.model_dump_json(indent=2))
+    _write_status(path, "created")
+    return sweep_id
+
+
+def load_spec(path: Path) -> SweepSpec:
+    return SweepSpec.model_validate_json((path / "spec.json").read_text())
+
+
+def load_results(path: Path) -> list[dict]:
+    results_file = path / "results.jsonl"
+    if not results_file.exists():
+        return []
+    rows = []
+    with results_file.open() as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                rows.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue  # linha truncada (processo interrompido no meio da escrita)
+    return rows
+
+
+def _truncate_partial_tail(results_file: Path) -> None:
+    """Corta results.jsonl no fim da última linha completa (o próximo append começa limpo)."""
+    if not results_file.exists():
+        return
+    with results_file.open("rb+") as f:
+        size = f.seek(0, os.SEEK_END)
+        end = size
+        while end > 0:
+            step = min(4096, end)
+            f.seek(end - step)
+            block = f.read(step)
+            newline = block.rfind(b"\n")
+            if newline >= 0:
+                end = end - step + newline + 1
+                break
+            end -= step
+        if end != size:
+            f.truncate(end)
+
+
+def read_status(path: Path) -> dict:
+    try:
+        return json.loads((path / "status.json").read_text())
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {"status": "unknown"}
+
+
+def _write_status(path: Path, status: str, **extra) -> None:
+    tmp = path / "status.json.tmp"
+    tmp.write_text(json.dumps({"status": status, **extra}))
+    tmp.replace(path / "status.json")
+
+
+def rank_results(rows: list[dict], by: RankBy = "pnl", top: Optional[int] = None) -> list[dict]:
+    """
+    Ordena os resultados:
+    - pnl: maior P/L líquido, depois menor drawdown
+    - drawdown: menor drawdown %, depois maior P/L líquido
+    - trades: mais trades, depois maior P/L líquido
+    """
+    if by == "drawdown":
+        key = lambda r: (r["max_drawdown_pct"], -r["net_pnl"])  # noqa: E731
+    elif by == "trades":
+        key = lambda r: (-r["num_trades"], -r["net_pnl"])  # noqa: E731
+    else:
+        key = lambda r: (-r["net_pnl"], r["max_drawdown_pct"])  # noqa: E731
+    ranked = sorted(rows, key=key)
+    return ranked[:top] if top else ranked
+
+
+# ---------------------------------------------------------------------
+# Workers: arrays de mercado em memória compartilhada (nada é serializado
+# por tarefa; cada tarefa leva só uma lista de combinações de parâmetros)
+# ---------------------------------------------------------------------
+_worker_market: dict[str, np.ndarray] = {}
+_worker_blocks: list[shared_memory.SharedMemory] = []
+_worker_base: dict = {}
+
+
+def _share_arrays(arrays: dict[str, np.ndarray]):
+    blocks = []
+    descriptors = {}
+    for name, arr in arrays.items():
+        shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+        np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)[:] = arr
+        blocks.append(shm)
+        descriptors[name] = (shm.name, arr.dtype.str, arr.shape)
+    return blocks, descriptors
+
+
+def _worker_init(descriptors: dict, base: dict) -> None:
+    # Ctrl+C é tratado só pelo processo pai (cancela e grava o que já terminou)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    for name, (shm_name, dtype, shape) in descriptors.items():
+        shm = shared_memory.SharedMemory(name=shm_name)
+        _worker_blocks.append(shm)  # mantém o mapeamento vivo
+        _worker_market[name] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+    _worker_base.update(base)
+
+
+def _worker_run(combos: list[dict]) -> list[dict]:
+    fee_rate = _worker_base["fee_rate"]
+    rows = []
+    for combo in combos:
+        params = SimpleNamespace(**_worker_base, **combo)
+        result = run_backtest(
+            params,
+            _worker_market["prices"],
+            buy_signal=_worker_market["buy"],
+            sell_signal=_worker_market["sell"],
+            fee_rate=fee_rate,
+        )
+        rows.append({"params": combo, **result.summary})
+    return rows
+
+
+def run_sweep(
+    sweep_id: str,
+    *,
+    workers: Optional[int] = None,
+    cancel_event: Optional[threading.Event] = None,
+    on_progress: Optional[Callable[[int, int], None]] = None,
+) -> str:
+    """
+    Executa (ou retoma) uma busca: combinações já presentes em results.jsonl
+    são puladas. Retorna o status final: done | cancelled.
+    """
+    path = sweep_path(sweep_id)
+    spec = load_spec(path)
+    grid = spec.grid()
+    total = len(grid)
+
+    # resto de uma linha de uma execução interrompida: sem isso o próximo
+    # append cola no fragmento e a linha inteira vira lixo
+    _truncate_partial_tail(path / "results.jsonl")
+    done_keys = {combo_key(r["params"]) for r in load_results(path)}
+    todo = [c for c in grid if combo_key(c) not in done_keys]
+    completed = total - len(todo)
+
+    settings = get_settings()
+    workers = workers or settings.sweep_workers or os.cpu_count() or 1
+    # Vários lotes por worker: equilibra a carga sem pagar IPC por combinação
+    chunk = max(1, min(256, -(-len(todo) // (workers * 8))))
+    chunks = [todo[i : i + chunk] for i in range(0, len(todo), chunk)]
+
+    _write_status(path, "running", total=total, completed=completed)
+    if on_progress:
+        on_progress(completed, total)
+    if not chunks:
+        _write_status(path, "done", total=total, completed=completed)
+        return "done"
+
+    market = {name: np.load(path / f"{name}.npy") for name in MARKET_FIELDS}
+    base = {
+        "saldo_usdt_limit": spec.saldo_usdt_limit,
+        "valor_de_trade_usdt": spec.valor_de_trade_usdt,
+        "fee_rate": spec.fee_rate,
+    }
+    blocks, descriptors = _share_arrays(market)
+    status = "done"
+    try:
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(chunks)),
+            initializer=_worker_init,
+            initargs=(descriptors, base),
+        ) as pool, (path / "results.jsonl").open("a") as out:
+            pending = {pool.submit(_worker_run, c) for c in chunks}
+            try:
+                while pending:
+                    finished, pending = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+                    for fut in finished:
+                        rows = fut.result()
+                        out.write("".join(json.dumps(r) + "\n" for r in rows))
+                        completed += len(rows)
+                    if finished:
+                        out.flush()
+                        _write_status(path, "running", total=total, completed=completed)
+                        if on_progress:
+                            on_progress(completed, total)
+                    if cancel_event is not None and cancel_event.is_set():
+                        status = "cancelled"
+                        break
+            except KeyboardInterrupt:
+                status = "cancelled"
+            if status == "cancelled":
+                for fut in pending:
+                    fut.cancel()
+                pool.shutdown(wait=True, cancel_futures=True)
+    except Exception as e:
+        _write_status(path, "failed", total=total, completed=completed, error=str(e))
+        raise
+    finally:
+        for shm in blocks:
+            shm.close()
+            shm.unlink()
+
+    _write_status(path, status, total=total, completed=completed)
+    return status
+
+
+# ---------------------------------------------------------------------
+# Buscas em background (API)
+# ---------------------------------------------------------------------
+_running: dict[str, threading.Event] = {}
+_running_lock = threading.Lock()
+
+
+def start_sweep_thread(sweep_id: str) -> bool:
+    """Roda (ou retoma) a busca numa thread; False se ela já está rodando."""
+    sweep_path(sweep_id)
+    with _running_lock:
+        if sweep_id in _running:
+            return False
+        cancel_event = threading.Event()
+        _running[sweep_id] = cancel_event
+
+    def _target() -> None:
+        try:
+            status = run_sweep(sweep_id, cancel_event=cancel_event)
+            print(f"[SWEEP] {sweep_id} finalizado: {status}")
+        except Exception as e:
+            print(f"[SWEEP] ERRO no sweep {sweep_id}: {e.__class__.__name__}: {e}")
+        finally:
+            with _running_lock:
+                _running.pop(sweep_id, None)
+
+    threading.Thread(target=_target, name=f"bbot-sweep-{sweep_id}", daemon=True).start()
+    return True
+
+
+def cancel_sweep(sweep_id: str) -> bool:
+    with _running_lock:
+        cancel_event = _running.get(sweep_id)
+    if cancel_event is None:
+        return False
+    cancel_event.set()
+    return True
+
+
+def sweep_state(sweep_id: str) -> dict:
+    """Status em disco; 'running' sem thread viva vira 'interrupted' (pode retomar)."""
+    status = read_status(sweep_path(sweep_id))
+    with _running_lock:
+        alive = sweep_id in _running
+    if status.get("status") == "running" and not alive:
+        status["status"] = "interrupted"
+    return status
+
+
+if __name__ == "__main__":
+    # python -m app.backtest.sweep new spec.json [--workers N]
+    # python -m app.backtest.sweep resume <id> [--workers N]
+    # python -m app.backtest.sweep show <id> [--rank-by pnl|drawdown|trades] [--top N]
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="python -m app.backtest.sweep")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_new = sub.add_parser("new", help="cria e roda uma busca a partir de um spec JSON")
+    p_new.add_argument("spec")
+    p_new.add_argument("--workers", type=int)
+    p_resume = sub.add_parser("resume", help="retoma uma busca interrompida/cancelada")
+    p_resume.add_argument("sweep_id")
+    p_resume.add_argument("--workers", type=int)
+    p_show = sub.add_parser("show", help="mostra o ranking de uma busca")
+    p_show.add_argument("sweep_id")
+    p_show.add_argument("--rank-by", choices=["pnl", "drawdown", "trades"], default="pnl")
+    p_show.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    def _print_progress(done: int, total: int) -> None:
+        print(f"\r[SWEEP] {done}/{total}", end="", flush=True)
+
+    if args.command == "new":
+        from app.backtest.data import load_market_arrays
+
+        spec = SweepSpec.model_validate_json(Path(args.spec).read_text())
+        spec.symbol = spec.symbol.upper().strip()
+        market = load_market_arrays(
+            spec.source,
+            spec.symbol,
+            spec.interval,
+            limit=spec.limit,
+            since=spec.since,
+            until=spec.until,
+        )
+        sweep_id = create_sweep(spec, market)
+        print(f"[SWEEP] id={sweep_id} combinações={len(spec.grid())}")
+        status = run_sweep(sweep_id, workers=args.workers, on_progress=_print_progress)
+        print(f"\n[SWEEP] {sweep_id}: {status}")
+    elif args.command == "resume":
+        status = run_sweep(args.sweep_id, workers=args.workers, on_progress=_print_progress)
+        print(f"\n[SWEEP] {args.sweep_id}: {status}")
+    else:
+        path = sweep_path(args.sweep_id)
+        print(json.dumps(read_status(path)))
+        for row in rank_results(load_results(path), args.rank_by, args.top):
+            print(json.dumps(row))
@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+import httpx
+
+from app.binance.breaker import get_breaker
+from app.binance.client import (
+    BASE_URL,
+    WEIGHT_ORDER,
+    WEIGHT_PING,
+    WEIGHT_TICKER_PRICE,
+    sync_server_time,
+)
+from app.binance.ratelimit import get_rate_limiter
+from app.binance.signer import ERR_TIMESTAMP, get_signer
+from app.core.config import get_settings
+
+WEIGHT_QUERY_ORDER = 4
+
+# Códigos de erro da Binance usados na reconciliação
+ERR_UNKNOWN_ORDER = -2013  # "Order does not exist."
+
+
+class BinanceAPIError(Exception):
+    """Resposta de erro da Binance com código/mensagem (ordem recusada etc.)."""
+
+    def __init__(self, status_code: int, code: Optional[int], msg: str) -> None:
+        super().__init__(f"HTTP {status_code} code={code}: {msg}")
+        self.status_code = status_code
+        self.code = code
+        self.msg = msg
+
+    @property
+    def outcome_unknown(self) -> bool:
+        """5xx: a Binance pode ter executado a ordem mesmo respondendo erro."""
+        return self.status_code >= 500
+
+
+class AsyncBinanceClient:
+    """
+    Cliente assíncrono dos endpoints privados usados pelo envio de ordens
+    (e do preço por símbolo do ciclo do engine). Um único httpx.AsyncClient
+    (pool de conexões keep-alive) é compartilhado por todas as chamadas em
+    paralelo.
+    """
+
+    def __init__(self) -> None:
+        self.settings = get_settings()
+        self.limiter = get_rate_limiter()
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _http(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=BASE_URL,
+                timeout=self.settings.order_timeout_seconds,
+                limits=httpx.Limits(
+                    max_connections=self.settings.order_max_concurrency,
+                    max_keepalive_connections=self.settings.order_max_concurrency,
+                ),
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def ping(self) -> None:
+        """Abre as conexões do pool de ordens antes da primeira ordem."""
+        await self.limiter.acquire_async(WEIGHT_PING)
+        resp = await self._http().get("/api/v3/ping")
+        self.limiter.observe(resp)
+        resp.raise_for_status()
+
+    async def get_symbol_price(self, symbol: str, timeout: Optional[float] = None) -> float:
+        """
+        GET /api/v3/ticker/price. Cancelar a task cancela a requisição em
+        curso; `timeout` (orçamento do chamador) estourado não conta como
+        falha no circuit breaker.
+        """
+        with get_breaker("ticker_price").guard(budgeted=timeout is not None):
+            await self.limiter.acquire_async(WEIGHT_TICKER_PRICE)
+            resp = await self._http().get(
+                "/api/v3/ticker/price",
+                params={"symbol": symbol.upper()},
+                timeout=timeout if timeout is not None else httpx.USE_CLIENT_DEFAULT,
+            )
+            self.limiter.observe(resp)
+            resp.raise_for_status()
+        return float(resp.json()["price"])
+
+    async def signed_request(
+        self,
+        method: str,
+        path: str,
+        params: Dict[str, Any],
+        weight: int,
+    ) -> dict:
+        signer = get_signer()
+        for attempt in range(2):
+            query = signer.signed_query(params)
+            await self.limiter.acquire_async(weight)
+            started = time.perf_counter()
+            resp = await self._http().request(method, f"{path}?{query}", headers=signer.headers)
+            signer.transport_latency.add((time.perf_counter() - started) * 1000.0)
+            self.limiter.observe(resp)
+            if resp.status_code < 400:
+                return resp.json()
+
+            try:
+                body = resp.json()
+                code, msg = body.get("code"), body.get("msg", resp.text)
+            except ValueError:
+                code, msg = None, resp.text
+            if attempt == 0 and code == ERR_TIMESTAMP:
+                # recusada antes de executar: ressincroniza o relógio e reenvia
+                await asyncio.to_thread(sync_server_time)
+                continue
+            raise BinanceAPIError(resp.status_code, code, msg)
+
+    async def new_order(
+        self,
+        *,
+        symbol: str,
+        side: str,
+        type_: str,
+        client_order_id: str,
+        quantity: Optional[str] = None,
+        quote_order_qty: Optional[str] = None,
+    ) -> dict:
+        """POST /api/v3/order com newClientOrderId (resposta FULL, com fills)."""
+        params: Dict[str, Any] = {
+            "symbol": symbol,
+            "side": side,
+            "type": type_,
+            "newClientOrderId": client_order_id,
+            "newOrderRespType": "FULL",
+        }
+        if quantity is not None:
+            params["quantity"] = quantity
+        if quote_order_qty is not None:
+            params["quoteOrderQty"] = quote_order_qty
+        return await self.signed_request("POST", "/api/v3/order", params, WEIGHT_ORDER)
+
+    async def query_order(self, *, symbol: str, client_order_id: str) -> Optional[dict]:
+        """GET /api/v3/order por origClientOrderId; None se a Binance não conhece a ordem."""
+        try:
+            return await self.signed_request(
+                "GET",
+                "/api/v3/order",
+                {"symbol": symbol, "origClientOrderId": client_order_id},
+                WEIGHT_QUERY_ORDER,
+            )
+        except BinanceAPIError as e:
+            if e.code == ERR_UNKNOWN_ORDER:
+                return None
+            raise
+
+
+@lru_cache
+def get_async_binance_client() -> AsyncBinanceClient:
+    return AsyncBinanceClient()
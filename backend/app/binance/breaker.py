@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+import httpx
+
+from app.core.config import get_settings
+
+
+class CircuitOpenError(RuntimeError):
+    """Endpoint em pausa após falhas seguidas: a chamada falha na hora, sem rede."""
+
+
+def _is_failure(exc: BaseException) -> bool:
+    """Conta como falha do endpoint: rede/timeout, 5xx e rate limit (429/418)."""
+    if isinstance(exc, httpx.HTTPStatusError):
+        code = exc.response.status_code
+        return code >= 500 or code in (418, 429)
+    return isinstance(exc, httpx.TransportError)
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker por endpoint da Binance.
+
+    Após `failure_threshold` falhas seguidas o circuito abre e as chamadas
+    falham imediatamente (CircuitOpenError) por um backoff exponencial
+    (base * 2^n, até max). Passado o backoff, UMA chamada de teste passa
+    (half-open): sucesso fecha o circuito, falha reabre com o dobro do tempo.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 3,
+        base_backoff: float = 2.0,
+        max_backoff: float = 60.0,
+    ) -> None:
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self._failures = 0
+        self._opens = 0
+        self._open_until = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self._opens == 0:
+            return "closed"
+        return "open" if time.monotonic() < self._open_until else "half_open"
+
+    def before_call(self) -> None:
+        with self._lock:
+            if self._opens == 0:
+                return
+            now = time.monotonic()
+            if now < self._open_until or self._probing:
+                raise CircuitOpenError(
+                    f"Circuito '{self.name}' aberto "
+                    f"({max(0.0, self._open_until - now):.1f}s restantes)."
+                )
+            self._probing = True  # half-open: só esta chamada passa
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._opens:
+                print(f"[BINANCE] Circuito '{self.name}' fechado (endpoint respondeu).")
+            self._failures = 0
+            self._opens = 0
+            self._probing = False
+
+    def release(self) -> None:
+        """Chamada sem veredito sobre o endpoint (cancelada, orçamento do chamador)."""
+        with self._lock:
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self._opens or self._failures >= self.failure_threshold:
+                backoff = min(self.max_backoff, self.base_backoff * (2 ** self._opens))
+                self._opens += 1
+                self._open_until = time.monotonic() + backoff
+                print(
+                    f"[BINANCE] Circuito '{self.name}' aberto por {backoff:.1f}s "
+                    f"após {self._failures} falha(s)."
+                )
+
+    @contextmanager
+    def guard(self, budgeted: bool = False) -> Iterator[None]:
+        """
+        `budgeted`: o timeout da chamada é o que resta do orçamento do
+        chamador (ciclo do engine), não o do cliente. Estourar esse timeout
+        não diz nada sobre a Binance e não conta como falha.
+        """
+        self.before_call()
+        try:
+            yield
+        except BaseException as e:
+            if budgeted and isinstance(e, httpx.TimeoutException):
+                self.release()
+            elif _is_failure(e):
+                self.record_failure()
+            elif isinstance(e, httpx.HTTPStatusError):
+                # endpoint respondeu (ex.: 400 símbolo inválido): não é falha dele
+                self.record_success()
+            else:
+                # cancelada / erro local: sem veredito
+                self.release()
+            raise
+        self.record_success()
+
+    def to_dict(self) -> dict:
+        remaining: Optional[float] = None
+        if self._opens:
+            remaining = max(0.0, self._open_until - time.monotonic())
+        return {
+            "state": self.state,
+            "consecutive_failures": self._failures,
+            "open_seconds_remaining": remaining,
+        }
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+_registry_lock = threading.Lock()
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    breaker = _breakers.get(name)
+    if breaker is None:
+        with _registry_lock:
+            breaker = _breakers.get(name)
+            if breaker is None:
+                settings = get_settings()
+                breaker = CircuitBreaker(
+                    name,
+                    failure_threshold=settings.binance_breaker_failures,
+                    base_backoff=settings.binance_breaker_backoff_seconds,
+                    max_backoff=settings.binance_breaker_max_backoff_seconds,
+                )
+                _breakers[name] = breaker
+    return breaker
+
+
+def breakers_state() -> dict[str, dict]:
+    return {name: breaker.to_dict() for name, breaker in sorted(_breakers.items())}
@@ -1,17 +1,28 @@
 from __future__ import annotations
 
-import hashlib
-import hmac
+import asyncio
 import time
 from datetime import datetime, timezone
 from typing import Any, Dict, Optional
-from urllib.parse import urlencode
 
 import httpx
 
+from app.binance.breaker import get_breaker
+from app.binance.ratelimit import get_rate_limiter
+from app.binance.signer import ERR_TIMESTAMP, get_signer
 from app.core.config import get_settings
 
 settings = get_settings()
+limiter = get_rate_limiter()
+
+# Pesos (request weight) dos endpoints usados
+WEIGHT_EXCHANGE_INFO = 20
+WEIGHT_TICKER_PRICE = 2
+WEIGHT_KLINES = 2
+WEIGHT_ACCOUNT = 20
+WEIGHT_ORDER = 1
+WEIGHT_TIME = 1
+WEIGHT_PING = 1
 
 
 def _get_base_url() -> str:
@@ -23,6 +34,21 @@ def _get_base_url() -> str:
 
 BASE_URL = _get_base_url()
 
+# Cliente único (pool de conexões keep-alive) para todas as chamadas
+# síncronas: evita um handshake TCP/TLS por requisição.
+_http = httpx.Client(
+    base_url=BASE_URL,
+    timeout=getattr(settings, "binance_http_timeout", 10.0),
+)
+
+
+def ping() -> None:
+    """GET /api/v3/ping: abre a conexão do pool (TCP/TLS) antes do primeiro ciclo."""
+    limiter.acquire(WEIGHT_PING)
+    resp = _http.get("/api/v3/ping")
+    limiter.observe(resp)
+    resp.raise_for_status()
+
 
 def get_exchange_info(symbol: Optional[str] = None) -> dict:
     """Chama /api/v3/exchangeInfo na Binance.
@@ -33,63 +59,89 @@ def get_exchange_info(symbol: Optional[str] = None) -> dict:
     if symbol:
         params["symbol"] = symbol.upper()
 
-    resp = httpx.get(
-        f"{BASE_URL}/api/v3/exchangeInfo",
-        params=params,
-        timeout=10.0,
-    )
-    resp.raise_for_status()
+    with get_breaker("exchange_info").guard():
+        limiter.acquire(WEIGHT_EXCHANGE_INFO)
+        resp = _http.get("/api/v3/exchangeInfo", params=params)
+        limiter.observe(resp)
+        resp.raise_for_status()
     return resp.json()
 
 
-def get_symbol_price(symbol: str) -> float:
+def get_symbol_price(symbol: str, timeout: Optional[float] = None) -> float:
     """Busca o último preço de um símbolo na Binance Spot.
 
-    Usa um timeout configurável (se existir em settings) ou 10s por padrão.
+    Usa um timeout configurável (se existir em settings) ou 10s por padrão;
+    `timeout` sobrescreve (ex.: o que resta do orçamento do ciclo do engine)
+    e, se estourar, não conta como falha no circuit breaker.
     """
-    url = f"{BASE_URL}/api/v3/ticker/price"
     params = {"symbol": symbol.upper()}
 
-    timeout = getattr(settings, "binance_http_timeout", 10.0)
-    with httpx.Client(timeout=timeout) as client:
-        resp = client.get(url, params=params)
+    with get_breaker("ticker_price").guard(budgeted=timeout is not None):
+        limiter.acquire(WEIGHT_TICKER_PRICE)
+        resp = _http.get(
+            "/api/v3/ticker/price",
+            params=params,
+            timeout=timeout if timeout is not None else httpx.USE_CLIENT_DEFAULT,
+        )
+        limiter.observe(resp)
         resp.raise_for_status()
-        data = resp.json()
+    data = resp.json()
 
     return float(data["price"])
 
 
 def validate_symbol(symbol: str) -> bool:
-    """Retorna True se o símbolo existir na Binance, False caso contrário."""
+    """Retorna True se o símbolo existir na Binance, False caso contrário.
+
+    Consulta o cache do exchangeInfo (sem chamada de rede após o carregamento).
+    Com o circuito do exchangeInfo aberto não dá para saber: CircuitOpenError
+    sobe para o chamador (503), em vez de "símbolo inválido".
+    """
+    from app.binance.exchange_info import get_exchange_info_cache
+
     symbol = symbol.upper().strip()
     if not symbol:
         return False
 
     try:
-        data = get_exchange_info(symbol)
-    except httpx.HTTPStatusError:
-        return False
+        return get_exchange_info_cache().get(symbol) is not None
     except httpx.HTTPError:
         return False
 
-    syms = data.get("symbols", [])
-    return any(s.get("symbol") == symbol for s in syms)
-
 
 def get_klines(
     symbol: str,
     interval: str = "5m",
     limit: int = 200,
-) -> list[dict]:
-    """Busca candles (klines) da Binance Spot."""
-    url = f"{BASE_URL}/api/v3/klines"
-    params = {"symbol": symbol, "interval": interval, "limit": limit}
-
-    timeout = getattr(settings, "binance_http_timeout", 10.0)
-    with httpx.Client(timeout=timeout) as client:
-        resp = client.get(url, params=params)
+    start_time: Optional[int] = None,
+    end_time: Optional[int] = None,
+    raw: bool = False,
+    timeout: Optional[float] = None,
+) -> list:
+    """Busca candles (klines) da Binance Spot.
+
+    start_time/end_time em ms (epoch UTC) selecionam uma janela (máx. 1000 candles).
+    Com raw=True devolve as linhas da Binance sem conversão (usado pelo backfill).
+    """
+    params: Dict[str, Any] = {"symbol": symbol, "interval": interval, "limit": limit}
+    if start_time is not None:
+        params["startTime"] = start_time
+    if end_time is not None:
+        params["endTime"] = end_time
+
+    with get_breaker("klines").guard(budgeted=timeout is not None):
+        limiter.acquire(WEIGHT_KLINES)
+        resp = _http.get(
+            "/api/v3/klines",
+            params=params,
+            timeout=timeout if timeout is not None else httpx.USE_CLIENT_DEFAULT,
+        )
+        limiter.observe(resp)
         resp.raise_for_status()
-        data = resp.json()
+    data = resp.json()
+
+    if raw:
+        return data
 
     klines: list[dict] = []
     for row in data:
@@ -117,48 +169,77 @@ def get_klines(
     return klines
 
 
+def sync_server_time() -> float:
+    """Mede o offset do relógio local contra /api/v3/time. Retorna o offset (ms)."""
+    signer = get_signer()
+    limiter.acquire(WEIGHT_TIME)
+    sent_at = time.time()
+    resp = _http.get("/api/v3/time")
+    received_at = time.time()
+    limiter.observe(resp)
+    resp.raise_for_status()
+    signer.update_offset(resp.json()["serverTime"], sent_at, received_at)
+    return signer.offset_ms
+
+
+async def server_time_sync_loop() -> None:
+    """Ressincroniza o offset do relógio a cada binance_time_sync_seconds (se há chaves)."""
+    signer = get_signer()
+    while True:
+        age = signer.sync_age_seconds()
+        if age is not None and age < settings.binance_time_sync_seconds:
+            # sincronizado há pouco (warm-up do startup)
+            await asyncio.sleep(settings.binance_time_sync_seconds - age)
+            continue
+        if signer.configured:
+            try:
+                offset = await asyncio.to_thread(sync_server_time)
+                if abs(offset) >= 500:
+                    print(f"[BINANCE] Relógio local defasado em {offset:.0f}ms (compensado).")
+            except Exception as e:
+                print(f"[BINANCE] ERRO ao sincronizar horário: {e.__class__.__name__}: {e}")
+        await asyncio.sleep(settings.binance_time_sync_seconds)
+
+
+def _is_timestamp_error(resp: httpx.Response) -> bool:
+    if resp.status_code != 400:
+        return False
+    try:
+        return resp.json().get("code") == ERR_TIMESTAMP
+    except ValueError:
+        return False
+
+
 def _signed_request(
     method: str,
     path: str,
     params: Optional[Dict[str, Any]] = None,
 ) -> dict:
     """Faz uma requisição assinada à Binance (endpoints privados)."""
-    if not settings.binance_api_key or not settings.binance_api_secret:
-        raise RuntimeError("Chaves da Binance não configuradas.")
-
-    if params is None:
-        params = {}
-
-    params.setdefault("timestamp", int(time.time() * 1000))
-    params.setdefault("recvWindow", 5000)
-
-    query_str = urlencode(params, doseq=True)
-
-    signature = hmac.new(
-        settings.binance_api_secret.encode("utf-8"),
-        query_str.encode("utf-8"),
-        hashlib.sha256,
-    ).hexdigest()
-
-    params["signature"] = signature
-
-    headers = {"X-MBX-APIKEY": settings.binance_api_key}
-    url = f"{BASE_URL}{path}"
+    signer = get_signer()
+    weight = WEIGHT_ACCOUNT if path == "/api/v3/account" else WEIGHT_ORDER
+
+    for attempt in range(2):
+        query = signer.signed_query(params or {})
+        limiter.acquire(weight)
+        started = time.perf_counter()
+        resp = _http.request(method, f"{path}?{query}", headers=signer.headers)
+        signer.transport_latency.add((time.perf_counter() - started) * 1000.0)
+        limiter.observe(resp)
+        if attempt == 0 and _is_timestamp_error(resp):
+            # relógio saiu do recvWindow desde a última sincronização
+            sync_server_time()
+            continue
+        break
 
-    resp = httpx.request(
-        method,
-        url,
-        params=params,
-        headers=headers,
-        timeout=10.0,
-    )
     resp.raise_for_status()
     return resp.json()
 
 
 def get_account_summary() -> dict:
     """Retorna um resumo simples da conta: canTrade + saldos > 0."""
-    data = _signed_request("GET", "/api/v3/account")
+    with get_breaker("account").guard():
+        data = _signed_request("GET", "/api/v3/account")
 
     balances_raw = data.get("balances", [])
     balances = []
@@ -185,10 +266,10 @@ def place_test_order(
     symbol: str,
     side: str,
     type_: str,
-    quantity: Optional[float] = None,
-    quote_order_qty: Optional[float] = None,
+    quantity: Optional[float | str] = None,
+    quote_order_qty: Optional[float | str] = None,
     time_in_force: Optional[str] = None,
-    price: Optional[float] = None,
+    price: Optional[float | str] = None,
     extra_params: Optional[Dict[str, Any]] = None,
 ) -> dict:
     """Envia um /api/v3/order/test (não executa ordem real)."""
@@ -222,10 +303,10 @@ def place_order(
     symbol: str,
     side: str,
     type_: str,
-    quantity: Optional[float] = None,
-    quote_order_qty: Optional[float] = None,
+    quantity: Optional[float | str] = None,
+    quote_order_qty: Optional[float | str] = None,
     time_in_force: Optional[str] = None,
-    price: Optional[float] = None,
+    price: Optional[float | str] = None,
     extra_params: Optional[Dict[str, Any]] = None,
 ) -> dict:
     """Envia uma ordem real (/api/v3/order).
@@ -0,0 +1,277 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from dataclasses import dataclass
+from decimal import ROUND_DOWN, ROUND_HALF_EVEN, Decimal
+from functools import lru_cache
+from typing import Any, NamedTuple, Optional
+
+from app.binance.client import get_exchange_info
+from app.core.config import get_settings
+
+_ZERO = Decimal(0)
+
+
+def _dec(value: Any) -> Decimal:
+    # str() evita herdar o ruído binário do float (0.1 -> 0.1000000000000000055...)
+    return Decimal(str(value)) if value is not None else _ZERO
+
+
+def _fmt(value: Decimal) -> str:
+    """Formato aceito pela Binance (sem notação científica, sem zeros à direita)."""
+    text = format(value, "f")
+    if "." in text:
+        text = text.rstrip("0").rstrip(".")
+    return text or "0"
+
+
+def _floor_to_step(value: Decimal, step: Decimal) -> Decimal:
+    if step <= 0:
+        return value
+    return (value / step).to_integral_value(rounding=ROUND_DOWN) * step
+
+
+@dataclass(frozen=True)
+class SymbolFilters:
+    """Regras de negociação de um par (filtros do /api/v3/exchangeInfo)."""
+
+    symbol: str
+    status: str
+    base_asset: str
+    quote_asset: str
+    # LOT_SIZE
+    min_qty: Decimal = _ZERO
+    max_qty: Decimal = _ZERO
+    step_size: Decimal = _ZERO
+    # MARKET_LOT_SIZE (ordens MARKET); zero = usa LOT_SIZE
+    market_max_qty: Decimal = _ZERO
+    # PRICE_FILTER
+    min_price: Decimal = _ZERO
+    max_price: Decimal = _ZERO
+    tick_size: Decimal = _ZERO
+    # MIN_NOTIONAL / NOTIONAL
+    min_notional: Decimal = _ZERO
+    min_notional_market: bool = True
+    # casas decimais aceitas em valores na moeda de cotação (quoteOrderQty)
+    quote_precision: int = 8
+
+    @classmethod
+    def from_exchange_info(cls, raw: dict) -> "SymbolFilters":
+        fields: dict[str, Any] = {
+            "symbol": raw["symbol"],
+            "status": raw.get("status", ""),
+            "base_asset": raw.get("baseAsset", ""),
+            "quote_asset": raw.get("quoteAsset", ""),
+            "quote_precision": int(raw.get("quoteAssetPrecision", raw.get("quotePrecision", 8))),
+        }
+        for f in raw.get("filters", []):
+            kind = f.get("filterType")
+            if kind == "LOT_SIZE":
+                fields["min_qty"] = _dec(f.get("minQty"))
+                fields["max_qty"] = _dec(f.get("maxQty"))
+                fields["step_size"] = _dec(f.get("stepSize"))
+            elif kind == "MARKET_LOT_SIZE":
+                fields["market_max_qty"] = _dec(f.get("maxQty"))
+            elif kind == "PRICE_FILTER":
+                fields["min_price"] = _dec(f.get("minPrice"))
+                fields["max_price"] = _dec(f.get("maxPrice"))
+                fields["tick_size"] = _dec(f.get("tickSize"))
+            elif kind == "MIN_NOTIONAL":
+                fields["min_notional"] = _dec(f.get("minNotional"))
+                fields["min_notional_market"] = bool(f.get("applyToMarket", True))
+            elif kind == "NOTIONAL":
+                fields["min_notional"] = _dec(f.get("minNotional"))
+                fields["min_notional_market"] = bool(f.get("applyMinToMarket", True))
+        return cls(**fields)
+
+    @property
+    def trading(self) -> bool:
+        return self.status == "TRADING"
+
+    def round_qty(self, qty: float) -> Decimal:
+        """Arredonda a quantidade PARA BAIXO no múltiplo de stepSize."""
+        return _floor_to_step(_dec(qty), self.step_size)
+
+    def round_quote(self, value: float) -> Decimal:
+        """Arredonda um valor na moeda de cotação PARA BAIXO em quote_precision casas."""
+        return _floor_to_step(_dec(value), Decimal(1).scaleb(-self.quote_precision))
+
+    def round_price(self, price: float) -> Decimal:
+        """Arredonda o preço para o tickSize mais próximo."""
+        value = _dec(price)
+        if self.tick_size <= 0:
+            return value
+        return (value / self.tick_size).to_integral_value(rounding=ROUND_HALF_EVEN) * self.tick_size
+
+    def to_dict(self) -> dict:
+        return {
+            "symbol": self.symbol,
+            "status": self.status,
+            "base_asset": self.base_asset,
+            "quote_asset": self.quote_asset,
+            "min_qty": _fmt(self.min_qty),
+            "max_qty": _fmt(self.max_qty),
+            "step_size": _fmt(self.step_size),
+            "min_price": _fmt(self.min_price),
+            "max_price": _fmt(self.max_price),
+            "tick_size": _fmt(self.tick_size),
+            "min_notional": _fmt(self.min_notional),
+            "quote_precision": self.quote_precision,
+        }
+
+
+class NormalizedOrder(NamedTuple):
+    """Parâmetros já arredondados (strings no formato da Binance)."""
+
+    quantity: Optional[str]
+    quote_order_qty: Optional[str]
+    price: Optional[str]
+
+
+def normalize_order(
+    filters: SymbolFilters,
+    *,
+    order_type: str,
+    quantity: Optional[float] = None,
+    quote_order_qty: Optional[float] = None,
+    price: Optional[float] = None,
+    reference_price: Optional[float] = None,
+) -> NormalizedOrder:
+    """
+    Arredonda quantity (stepSize), quoteOrderQty (precisão da moeda de
+    cotação) e price (tickSize) e confere LOT_SIZE,
+    PRICE_FILTER e MIN_NOTIONAL localmente, antes de enviar a ordem.
+    `reference_price` (último preço conhecido) só serve para conferir o
+    MIN_NOTIONAL de ordens MARKET por quantidade; não vai na ordem.
+    Levanta ValueError com a regra violada.
+    """
+    is_market = order_type.upper() == "MARKET"
+    if not filters.trading:
+        raise ValueError(f"{filters.symbol} não está em negociação (status={filters.status}).")
+
+    qty: Optional[Decimal] = None
+    quote: Optional[Decimal] = None
+    px: Optional[Decimal] = None
+
+    if price is not None:
+        px = filters.round_price(price)
+        if px <= 0 or px < filters.min_price:
+            raise ValueError(f"Preço {_fmt(px)} abaixo do mínimo {_fmt(filters.min_price)}.")
+        if filters.max_price > 0 and px > filters.max_price:
+            raise ValueError(f"Preço {_fmt(px)} acima do máximo {_fmt(filters.max_price)}.")
+
+    if quantity is not None:
+        qty = filters.round_qty(quantity)
+        if qty <= 0 or qty < filters.min_qty:
+            raise ValueError(
+                f"Quantidade {quantity} abaixo do mínimo {_fmt(filters.min_qty)} "
+                f"(stepSize {_fmt(filters.step_size)})."
+            )
+        max_qty = filters.market_max_qty if is_market and filters.market_max_qty > 0 else filters.max_qty
+        if max_qty > 0 and qty > max_qty:
+            raise ValueError(f"Quantidade {_fmt(qty)} acima do máximo {_fmt(max_qty)}.")
+
+    if quote_order_qty is not None:
+        quote = filters.round_quote(quote_order_qty)
+        if quote <= 0:
+            raise ValueError(
+                f"Valor {quote_order_qty} {filters.quote_asset} abaixo da precisão "
+                f"({filters.quote_precision} casas)."
+            )
+
+    # Nocional: LIMIT usa qty * price; MARKET usa quoteOrderQty ou, por
+    # quantidade, o preço de referência (estimativa do preço de execução)
+    notional: Optional[Decimal] = None
+    if qty is not None and px is not None:
+        notional = qty * px
+    elif quote is not None:
+        notional = quote
+    elif qty is not None and reference_price is not None and reference_price > 0:
+        notional = qty * _dec(reference_price)
+    if (
+        notional is not None
+        and filters.min_notional > 0
+        and (filters.min_notional_market or not is_market)
+        and notional < filters.min_notional
+    ):
+        raise ValueError(
+            f"Valor da ordem {_fmt(notional)} {filters.quote_asset} abaixo do mínimo "
+            f"{_fmt(filters.min_notional)} (MIN_NOTIONAL)."
+        )
+
+    return NormalizedOrder(
+        quantity=_fmt(qty) if qty is not None else None,
+        quote_order_qty=_fmt(quote) if quote is not None else None,
+        price=_fmt(px) if px is not None else None,
+    )
+
+
+class ExchangeInfoCache:
+    """
+    Cache do /api/v3/exchangeInfo completo, indexado por símbolo.
+
+    Carregado uma vez (startup) e recarregado em background a cada
+    exchange_info_ttl_seconds; validação de símbolo e arredondamento de
+    ordens consultam só a memória.
+    """
+
+    def __init__(self) -> None:
+        self._symbols: dict[str, SymbolFilters] = {}
+        self._loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded_at is not None
+
+    def age_seconds(self) -> Optional[float]:
+        return None if self._loaded_at is None else time.monotonic() - self._loaded_at
+
+    def refresh(self) -> int:
+        """Baixa o exchangeInfo e troca o índice inteiro de uma vez."""
+        data = get_exchange_info()
+        symbols = {
+            raw["symbol"]: SymbolFilters.from_exchange_info(raw)
+            for raw in data.get("symbols", [])
+        }
+        self._symbols = symbols  # troca atômica: leitores nunca veem índice parcial
+        self._loaded_at = time.monotonic()
+        return len(symbols)
+
+    def ensure_loaded(self) -> None:
+        """Carrega na primeira consulta se o startup ainda não tiver carregado."""
+        if self._loaded_at is None:
+            with self._lock:
+                if self._loaded_at is None:
+                    self.refresh()
+
+    def get(self, symbol: str) -> Optional[SymbolFilters]:
+        self.ensure_loaded()
+        return self._symbols.get(symbol.upper().strip())
+
+
+@lru_cache
+def get_exchange_info_cache() -> ExchangeInfoCache:
+    return ExchangeInfoCache()
+
+
+async def exchange_info_refresh_loop() -> None:
+    """Carrega o exchangeInfo no startup e recarrega a cada TTL (falhas: tenta em 60s)."""
+    settings = get_settings()
+    cache = get_exchange_info_cache()
+    while True:
+        age = cache.age_seconds()
+        if age is not None and age < settings.exchange_info_ttl_seconds:
+            # já carregado (warm-up do startup): só recarrega quando vencer
+            await asyncio.sleep(settings.exchange_info_ttl_seconds - age)
+            continue
+        try:
+            count = await asyncio.to_thread(cache.refresh)
+            print(f"[BINANCE] exchangeInfo carregado: {count} símbolos.")
+            delay = settings.exchange_info_ttl_seconds
+        except Exception as e:
+            print(f"[BINANCE] ERRO ao carregar exchangeInfo: {e.__class__.__name__}: {e}")
+            delay = min(60.0, settings.exchange_info_ttl_seconds)
+        await asyncio.sleep(delay)
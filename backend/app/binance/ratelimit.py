@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from functools import lru_cache
+
+import httpx
+
+from app.core.config import get_settings
+
+
+class RateLimiter:
+    """
+    Token bucket de "request weight" da Binance (limite por minuto, por IP).
+
+    acquire(weight) bloqueia até haver peso disponível (acquire_async no
+    código async). Quando a Binance responde 429/418, penalize() pausa
+    todas as chamadas pelo Retry-After.
+    Thread-safe: usado pelo engine, rotas e pelo backfill em paralelo.
+    """
+
+    def __init__(self, weight_per_minute: int) -> None:
+        self.capacity = float(max(1, weight_per_minute))
+        self.rate = self.capacity / 60.0  # peso liberado por segundo
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, weight: int = 1) -> None:
+        weight = min(float(weight), self.capacity)
+        while (wait := self._take(weight)) > 0:
+            time.sleep(wait)
+
+    def _take(self, weight: float) -> float:
+        """Tenta consumir o peso; devolve 0 se conseguiu ou quanto esperar."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+            if now < self._blocked_until:
+                return self._blocked_until - now
+            if self._tokens >= weight:
+                self._tokens -= weight
+                return 0.0
+            return (weight - self._tokens) / self.rate
+
+    async def acquire_async(self, weight: int = 1) -> None:
+        """Versão para código async (não bloqueia o event loop)."""
+        weight = min(float(weight), self.capacity)
+        while (wait := self._take(weight)) > 0:
+            await asyncio.sleep(wait)
+
+    def penalize(self, seconds: float) -> None:
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+            self._tokens = 0.0
+
+    def observe(self, resp: httpx.Response) -> None:
+        """Aplica o Retry-After de respostas 429 (rate limit) / 418 (IP banido)."""
+        if resp.status_code in (418, 429):
+            try:
+                retry_after = float(resp.headers.get("Retry-After", "60"))
+            except ValueError:
+                retry_after = 60.0
+            print(
+                f"[BINANCE] Rate limit ({resp.status_code}); pausando chamadas por "
+                f"{retry_after:.0f}s."
+            )
+            self.penalize(retry_after)
+
+
+@lru_cache
+def get_rate_limiter() -> RateLimiter:
+    return RateLimiter(get_settings().binance_weight_per_minute)
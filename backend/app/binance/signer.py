@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import hashlib
+import hmac
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+from typing import Any, Dict, Optional
+from urllib.parse import urlencode
+
+from app.core.config import get_settings
+
+# Código da Binance para timestamp fora do recvWindow (relógio dessincronizado)
+ERR_TIMESTAMP = -1021
+
+_SAMPLES = 1000
+
+
+class MissingCredentialsError(RuntimeError):
+    """Requisição assinada sem API key/secret configuradas."""
+
+
+class _LatencyWindow:
+    """Últimas N amostras de uma latência (ms), com resumo p50/p95."""
+
+    def __init__(self, size: int = _SAMPLES) -> None:
+        self._values: deque[float] = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, value_ms: float) -> None:
+        with self._lock:
+            self._values.append(value_ms)
+
+    def summary(self) -> dict:
+        with self._lock:
+            values = sorted(self._values)
+        if not values:
+            return {"count": 0, "avg_ms": None, "p50_ms": None, "p95_ms": None, "max_ms": None}
+        n = len(values)
+        return {
+            "count": n,
+            "avg_ms": sum(values) / n,
+            "p50_ms": values[min(n - 1, int(0.50 * n))],
+            "p95_ms": values[min(n - 1, int(0.95 * n))],
+            "max_ms": values[-1],
+        }
+
+
+class BinanceSigner:
+    """
+    Assinatura dos endpoints privados da Binance:
+
+    - chave HMAC preparada uma vez (cada assinatura só copia o estado);
+    - timestamp = relógio local + offset medido contra /api/v3/time, para
+      não tomar -1021 (e um reenvio) quando o relógio do host está adiantado
+      ou atrasado;
+    - latência de assinatura e de transporte medidas separadamente.
+    """
+
+    def __init__(self, api_key: Optional[str], api_secret: Optional[str], recv_window_ms: int) -> None:
+        self.api_key = api_key
+        self.recv_window_ms = recv_window_ms
+        self._mac = (
+            hmac.new(api_secret.encode("utf-8"), digestmod=hashlib.sha256) if api_secret else None
+        )
+        self.headers = {"X-MBX-APIKEY": api_key} if api_key else {}
+        self.offset_ms = 0.0
+        self.last_rtt_ms: Optional[float] = None
+        self._synced_at: Optional[float] = None
+        self.sign_latency = _LatencyWindow()
+        self.transport_latency = _LatencyWindow()
+
+    @property
+    def configured(self) -> bool:
+        return self._mac is not None and bool(self.api_key)
+
+    def timestamp(self) -> int:
+        return int(time.time() * 1000.0 + self.offset_ms)
+
+    def update_offset(self, server_time_ms: int, sent_at: float, received_at: float) -> None:
+        """sent_at/received_at: time.time() antes/depois do GET /api/v3/time."""
+        rtt_ms = (received_at - sent_at) * 1000.0
+        midpoint_ms = sent_at * 1000.0 + rtt_ms / 2.0
+        self.offset_ms = server_time_ms - midpoint_ms
+        self.last_rtt_ms = rtt_ms
+        self._synced_at = time.monotonic()
+
+    def sync_age_seconds(self) -> Optional[float]:
+        return None if self._synced_at is None else time.monotonic() - self._synced_at
+
+    def signed_query(self, params: Dict[str, Any]) -> str:
+        """Query string completa (com timestamp, recvWindow e signature)."""
+        if not self.configured:
+            raise MissingCredentialsError("Chaves da Binance não configuradas.")
+        started = time.perf_counter()
+        params = dict(params)
+        params["timestamp"] = self.timestamp()
+        params.setdefault("recvWindow", self.recv_window_ms)
+        query_str = urlencode(params, doseq=True)
+        mac = self._mac.copy()
+        mac.update(query_str.encode("utf-8"))
+        signed = f"{query_str}&signature={mac.hexdigest()}"
+        self.sign_latency.add((time.perf_counter() - started) * 1000.0)
+        return signed
+
+    def stats(self) -> dict:
+        return {
+            "offset_ms": self.offset_ms,
+            "last_sync_rtt_ms": self.last_rtt_ms,
+            "last_sync_age_seconds": self.sync_age_seconds(),
+            "sign": self.sign_latency.summary(),
+            "transport": self.transport_latency.summary(),
+        }
+
+
+@lru_cache
+def get_signer() -> BinanceSigner:
+    settings = get_settings()
+    return BinanceSigner(
+        settings.binance_api_key,
+        settings.binance_api_secret,
+        settings.binance_recv_window_ms,
+    )
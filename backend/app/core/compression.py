@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import gzip
+from typing import Optional
+
+import brotli
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+# Tipos que valem a pena comprimir (texto). Binários já compactados
+# (parquet, arrow, gzip, imagens) e o SSE (text/event-stream) ficam de fora.
+COMPRESSIBLE_TYPES = frozenset(
+    {
+        "application/json",
+        "application/javascript",
+        "application/xml",
+        "image/svg+xml",
+        "text/css",
+        "text/csv",
+        "text/html",
+        "text/javascript",
+        "text/plain",
+        "text/xml",
+    }
+)
+
+
+def _compressible(content_type: str, allowed: frozenset[str]) -> bool:
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    return media_type in allowed
+
+
+def _negotiate(accept_encoding: str) -> Optional[str]:
+    """Escolhe br > gzip conforme o Accept-Encoding (ignora q=0)."""
+    offered = {}
+    for part in accept_encoding.lower().split(","):
+        token, _, params = part.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        if token:
+            offered[token] = q
+    for encoding in ("br", "gzip"):
+        if offered.get(encoding, 0.0) > 0:
+            return encoding
+    return None
+
+
+class CompressionMiddleware:
+    """
+    Comprime respostas (brotli ou gzip, negociado pelo Accept-Encoding)
+    a partir de `minimum_size` bytes, só para os Content-Type de
+    `content_types` (padrão: COMPRESSIBLE_TYPES).
+
+    Só respostas de corpo único são comprimidas; respostas em streaming
+    (exports), as que já têm Content-Encoding e os tipos fora da lista
+    passam direto.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        content_types: Optional[frozenset[str]] = None,
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.content_types = COMPRESSIBLE_TYPES if content_types is None else content_types
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = _negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Optional[Message] = None
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal start_message
+
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+
+            if message["type"] != "http.response.body" or start_message is None:
+                await send(message)
+                return
+
+            pending_start, start_message = start_message, None
+            headers = MutableHeaders(raw=pending_start["headers"])
+            body = message.get("body", b"")
+
+            if (
+                message.get("more_body", False)
+                or len(body) < self.minimum_size
+                or "content-encoding" in headers
+                or not _compressible(headers.get("content-type", ""), self.content_types)
+            ):
+                await send(pending_start)
+                await send(message)
+                return
+
+            if encoding == "br":
+                body = brotli.compress(body, quality=self.brotli_quality)
+            else:
+                body = gzip.compress(body, compresslevel=self.gzip_level)
+
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(body))
+            headers.add_vary_header("Accept-Encoding")
+
+            await send(pending_start)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_wrapper)
@@ -14,6 +14,83 @@ class Settings(BaseSettings):
     binance_api_key: Optional[str] = None
     binance_api_secret: Optional[str] = None
     binance_testnet: bool = True
+    # Orçamento de request weight por minuto (limite da Binance é 6000/IP)
+    binance_weight_per_minute: int = 1200
+    # Requisições assinadas: janela de validade e ressincronização do relógio
+    binance_recv_window_ms: int = 5000
+    binance_time_sync_seconds: float = 300.0
+    # Circuit breaker por endpoint: abre após N falhas seguidas (backoff exponencial)
+    binance_breaker_failures: int = 3
+    binance_breaker_backoff_seconds: float = 2.0
+    binance_breaker_max_backoff_seconds: float = 60.0
+    # Recarga do cache de exchangeInfo (filtros LOT_SIZE/PRICE_FILTER/MIN_NOTIONAL)
+    exchange_info_ttl_seconds: float = 3600.0
+
+    # Arquivo colunar de klines (backfill) e outros dados de mercado
+    market_data_dir: str = "./data/market"
+    # Gravação dos dados de mercado consumidos pelo engine (replay determinístico)
+    market_recorder_enabled: bool = False
+    market_recorder_dir: str = "./data/recordings"
+    # Ring buffer de ticks (preços buscados pelo engine) por símbolo, em
+    # <market_data_dir>/ticks; memória máxima = 16 bytes * size * max_symbols
+    tick_buffer_enabled: bool = True
+    tick_buffer_size: int = 4096
+    tick_buffer_max_symbols: int = 256
+
+    # Engine de bots: desligue nos workers da API quando o engine roda à
+    # parte (python -m app.engine). O lease garante um único engine ativo.
+    engine_enabled: bool = True
+    engine_lease_seconds: float = 30.0
+    # Nome deste engine (namespace das flags de runtime em system_state)
+    engine_name: str = "main"
+    # Tempo máximo de rede do sync de indicadores (klines) por ciclo do engine
+    engine_cycle_budget_seconds: float = 4.0
+    # Orçamento próprio dos preços do ciclo (buscados em paralelo depois dos klines)
+    engine_price_budget_seconds: float = 2.0
+    # Preço anterior aceito quando a Binance falha (só para stop-loss)
+    engine_stale_price_max_age_seconds: float = 60.0
+    # Cache em memória do system_state; mudanças de outros processos chegam
+    # antes pelo event_outbox, o TTL é só a garantia de atualização.
+    system_state_cache_ttl_seconds: float = 2.0
+
+    # Envio de ordens reais (app_mode=real): envios simultâneos e reenvios
+    order_max_concurrency: int = 20
+    order_max_retries: int = 3
+    order_timeout_seconds: float = 10.0
+
+    # Warm-up do boot (pool HTTP, exchangeInfo, caches): tempo máximo antes
+    # de liberar o primeiro ciclo e o /system/ready
+    startup_warmup_timeout_seconds: float = 15.0
+
+    # Journal de trades do engine (registro durável; o banco é projeção)
+    trade_journal_enabled: bool = True
+    trade_journal_dir: str = "./data/journal"
+    # janela extra para juntar entradas num fsync (0 = junta só o que chegou
+    # enquanto o fsync anterior rodava)
+    trade_journal_group_window_ms: float = 0.0
+    # tamanho de cada segmento do journal; segmentos já projetados no banco
+    # são apagados quando o journal passa para o próximo
+    trade_journal_segment_bytes: int = 16 * 1024 * 1024
+
+    # Writer único do banco (group commit)
+    db_writer_batch_size: int = 64
+    db_writer_batch_window_ms: float = 2.0
+
+    # Cache de respostas (ETag) das rotas de polling do dashboard
+    http_cache_ttl_seconds: float = 5.0
+    # Comprime respostas JSON a partir deste tamanho (bytes)
+    http_compression_min_size: int = 1024
+
+    # Push de eventos (/events/stream)
+    events_buffer_size: int = 10000  # eventos guardados para retomar por Last-Event-ID
+    events_client_queue_size: int = 1000  # fila máxima por cliente antes de pedir resync
+    # Repasse de eventos entre processos (tabela event_outbox)
+    event_outbox_poll_ms: int = 250
+    event_outbox_retention_seconds: float = 600.0
+
+    # Busca de parâmetros (backtest em paralelo)
+    sweeps_dir: str = "./data/sweeps"
+    sweep_workers: Optional[int] = None  # None = nº de CPUs
 
     model_config = SettingsConfigDict(
         env_file=".env",
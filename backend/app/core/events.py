@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from collections import deque
+from functools import lru_cache
+from typing import AsyncIterator, Optional
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.core.serialization import dumps
+from app.core.versions import BOOT_ID
+
+_SESSION_KEY = "bbot_pending_events"
+
+# Evento já serializado: (seq, tipo, dados em JSON)
+Event = tuple[int, str, bytes]
+
+_INDICATOR_FIELDS = (
+    "id",
+    "symbol",
+    "interval",
+    "close_time",
+    "close",
+    "rsi14",
+    "trend_label",
+    "market_signal_compra",
+    "market_signal_venda",
+)
+
+
+class _Subscriber:
+    def __init__(self, loop: asyncio.AbstractEventLoop, maxsize: int) -> None:
+        self.loop = loop
+        self.queue: asyncio.Queue[Optional[Event]] = asyncio.Queue(maxsize=maxsize)
+
+    def deliver(self, event: Event) -> None:
+        """Roda no loop do cliente. Fila cheia = cliente lento: descarta e pede resync."""
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)  # None = resync
+
+
+class EventHub:
+    """
+    Fan-out em memória de deltas (bots, trades, indicadores) para os
+    clientes de /events/stream.
+
+    - publish() é thread-safe (chamado pelo writer após o commit) e
+      serializa cada evento uma única vez para todos os clientes.
+    - Cada cliente tem fila limitada; se não acompanhar, recebe "resync"
+      em vez de segurar memória (backpressure por cliente).
+    - Um buffer circular dos últimos eventos permite retomar a partir de
+      um número de sequência (Last-Event-ID).
+    """
+
+    def __init__(self, buffer_size: int = 10000, client_queue_size: int = 1000) -> None:
+        self.client_queue_size = client_queue_size
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._buffer: deque[Event] = deque(maxlen=buffer_size)
+        self._subscribers: set[_Subscriber] = set()
+
+    @property
+    def last_seq(self) -> int:
+        return self._seq
+
+    def publish(self, events: list[tuple[str, dict]]) -> None:
+        if not events:
+            return
+        with self._lock:
+            new_events: list[Event] = []
+            for kind, data in events:
+                self._seq += 1
+                event = (self._seq, kind, dumps(data))
+                self._buffer.append(event)
+                new_events.append(event)
+            subscribers = list(self._subscribers)
+
+        for sub in subscribers:
+            for event in new_events:
+                sub.loop.call_soon_threadsafe(sub.deliver, event)
+
+    def _replay_from(self, last_seq: int) -> Optional[list[Event]]:
+        """Eventos com seq > last_seq; None se o buffer já não cobre o intervalo."""
+        with self._lock:
+            if last_seq > self._seq:
+                return None
+            if last_seq == self._seq:
+                return []
+            if not self._buffer or self._buffer[0][0] > last_seq + 1:
+                return None
+            return [e for e in self._buffer if e[0] > last_seq]
+
+    async def subscribe(self, last_seq: Optional[int]) -> AsyncIterator[Optional[Event]]:
+        """
+        Itera eventos para um cliente. Emite None quando o cliente precisa
+        recarregar tudo (resync): buffer não cobre o cursor ou fila estourou.
+        """
+        sub = _Subscriber(asyncio.get_running_loop(), self.client_queue_size)
+        with self._lock:
+            self._subscribers.add(sub)
+        try:
+            if last_seq is not None:
+                replay = self._replay_from(last_seq)
+                if replay is None:
+                    yield None
+                else:
+                    for event in replay:
+                        yield event
+            while True:
+                yield await sub.queue.get()
+        finally:
+            with self._lock:
+                self._subscribers.discard(sub)
+
+
+@lru_cache
+def get_event_hub() -> EventHub:
+    settings = get_settings()
+    return EventHub(
+        buffer_size=settings.events_buffer_size,
+        client_queue_size=settings.events_client_queue_size,
+    )
+
+
+def format_event_id(seq: int) -> str:
+    return f"{BOOT_ID}-{seq}"
+
+
+def parse_event_id(value: Optional[str]) -> Optional[int]:
+    """
+    Converte o Last-Event-ID em seq. IDs de outro boot do processo
+    viram -1 (força resync, pois a sequência recomeçou).
+    """
+    if not value:
+        return None
+    boot, _, seq = value.rpartition("-")
+    if boot != BOOT_ID or not seq.isdigit():
+        return -1
+    return int(seq)
+
+
+# ---------------------------------------------------------------------
+# Captura de deltas na sessão do writer
+# ---------------------------------------------------------------------
+def _bot_delta(obj, is_new: bool) -> dict:
+    state = inspect(obj)
+    delta = {"id": obj.id}
+    for attr in state.mapper.column_attrs:
+        key = attr.key
+        if is_new or state.attrs[key].history.has_changes():
+            delta[key] = getattr(obj, key)
+    return delta
+
+
+def capture_events(session: Session, _flush_context) -> None:
+    """
+    Listener de after_flush: PKs já atribuídos e o histórico dos atributos
+    ainda disponível. Eventos ficam pendentes até o commit do writer.
+    """
+    pending = session.info.setdefault(_SESSION_KEY, [])
+    for obj in session.new:
+        table = getattr(obj, "__tablename__", None)
+        if table == "bot":
+            pending.append(("bot", _bot_delta(obj, is_new=True)))
+        elif table == "trade":
+            pending.append(("trade", obj.model_dump()))
+        elif table == "indicator":
+            pending.append(("indicator", {f: getattr(obj, f) for f in _INDICATOR_FIELDS}))
+    for obj in session.dirty:
+        if getattr(obj, "__tablename__", None) == "bot" and session.is_modified(obj):
+            pending.append(("bot", _bot_delta(obj, is_new=False)))
+    for obj in session.deleted:
+        if getattr(obj, "__tablename__", None) == "bot":
+            pending.append(("bot_deleted", {"id": obj.id}))
+
+
+def queue_event(session: Session, kind: str, data: dict) -> None:
+    """Evento de uma escrita feita fora do ORM (ex.: UPDATE em lote do engine)."""
+    session.info.setdefault(_SESSION_KEY, []).append((kind, data))
+
+
+def pending_count(session: Session) -> int:
+    return len(session.info.get(_SESSION_KEY, ()))
+
+
+def discard_after(session: Session, count: int) -> None:
+    """Descarta eventos de uma mutação cujo SAVEPOINT foi desfeito."""
+    pending = session.info.get(_SESSION_KEY)
+    if pending is not None:
+        del pending[count:]
+
+
+def pop_events(session: Session) -> list[tuple[str, dict]]:
+    return session.info.pop(_SESSION_KEY, [])
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Sequence
+
+from fastapi import Request, Response
+
+from app.core.config import get_settings
+from app.core.serialization import dumps
+from app.core.versions import get_versions
+
+
+# Cache curto em memória: (rota + query) -> (versões, etag, corpo, criado_em)
+_lock = threading.Lock()
+_cache: Dict[str, tuple[tuple[int, ...], str, bytes, float]] = {}
+_MAX_ENTRIES = 512
+
+
+def _make_etag(resources: Sequence[str], versions: tuple[int, ...]) -> str:
+    # versões do banco (resource_version): o mesmo ETag em qualquer worker
+    parts = ".".join(f"{r}{v}" for r, v in zip(resources, versions))
+    return f'W/"{parts}"'
+
+
+def _cache_key(request: Request) -> str:
+    query = "&".join(sorted(request.url.query.split("&"))) if request.url.query else ""
+    return f"{request.url.path}?{query}"
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def cached_json(
+    request: Request,
+    resources: Sequence[str],
+    builder: Callable[[], Any],
+) -> Response:
+    """
+    Resposta JSON com ETag derivado das versões dos recursos.
+
+    - If-None-Match igual ao ETag atual -> 304 (sem query, sem serialização).
+    - Mesmas versões e dentro do TTL -> reaproveita o corpo já serializado.
+    - Caso contrário, chama `builder()` (que consulta o banco) e guarda.
+    """
+    versions = get_versions(resources)
+    etag = _make_etag(resources, versions)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    ttl = get_settings().http_cache_ttl_seconds
+    key = _cache_key(request)
+    now = time.monotonic()
+
+    with _lock:
+        entry = _cache.get(key)
+    if entry and entry[0] == versions and now - entry[3] < ttl:
+        body = entry[2]
+    else:
+        body = dumps(builder())
+        with _lock:
+            if len(_cache) >= _MAX_ENTRIES:
+                _cache.clear()
+            _cache[key] = (versions, etag, body, now)
+
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timedelta
+
+import orjson
+from sqlalchemy import delete, func, insert
+from sqlmodel import Session, select
+
+from app.core.config import get_settings
+from app.core.events import get_event_hub
+from app.core.serialization import dumps
+from app.core.versions import BOOT_ID, bump, set_versions
+from app.db.session import engine
+from app.models.system import EventOutbox
+
+# Repasse de eventos entre processos: o writer de cada processo grava os
+# eventos/versões do lote em event_outbox (mesma transação do commit) e cada
+# worker da API acompanha a tabela, publicando no seu EventHub local o que
+# veio de OUTROS processos (ex.: trades do `python -m app.engine`).
+#
+# A ordem segue o id; no SQLite (um writer por vez no banco) a ordem dos
+# ids coincide com a ordem de commit.
+
+CHANGED_KIND = "changed"
+PRUNE_EVERY_SECONDS = 60.0
+
+
+def write_outbox(
+    session: Session, events: list[tuple[str, dict]], changed: dict[str, int]
+) -> None:
+    """
+    Chamado pelo writer antes do commit do lote (insert Core: não dispara
+    flush do ORM). `changed` leva as novas versões dos recursos alterados.
+    """
+    rows = [
+        {"origin": BOOT_ID, "kind": kind, "payload": dumps(data).decode()}
+        for kind, data in events
+    ]
+    if changed:
+        rows.append(
+            {"origin": BOOT_ID, "kind": CHANGED_KIND, "payload": dumps(changed).decode()}
+        )
+    if rows:
+        session.execute(insert(EventOutbox), rows)
+
+
+def _last_id() -> int:
+    with Session(engine) as session:
+        return session.exec(select(func.coalesce(func.max(EventOutbox.id), 0))).one()
+
+
+def _fetch_after(last_id: int, limit: int = 1000) -> list[EventOutbox]:
+    with Session(engine) as session:
+        return session.exec(
+            select(EventOutbox)
+            .where(EventOutbox.id > last_id)
+            .order_by(EventOutbox.id)
+            .limit(limit)
+        ).all()
+
+
+def _prune(retention_seconds: float) -> None:
+    from app.db.writer import run_write
+
+    cutoff = datetime.utcnow() - timedelta(seconds=retention_seconds)
+    run_write(
+        lambda session: session.execute(delete(EventOutbox).where(EventOutbox.created_at < cutoff))
+    )
+
+
+async def outbox_tail_loop() -> None:
+    """Acompanha event_outbox e repassa eventos de outros processos ao EventHub local."""
+    settings = get_settings()
+    poll = settings.event_outbox_poll_ms / 1000.0
+    hub = get_event_hub()
+
+    last_id = await asyncio.to_thread(_last_id)
+    last_prune = 0.0
+    loop = asyncio.get_running_loop()
+
+    while True:
+        rows: list[EventOutbox] = []
+        try:
+            rows = await asyncio.to_thread(_fetch_after, last_id)
+            events: list[tuple[str, dict]] = []
+            for row in rows:
+                last_id = row.id
+                if row.origin == BOOT_ID:
+                    continue  # já publicado localmente pelo writer
+                if row.kind == CHANGED_KIND:
+                    changed = orjson.loads(row.payload)
+                    if isinstance(changed, dict):
+                        set_versions(changed)
+                    else:
+                        bump(*changed)  # processo de versão anterior (só os nomes)
+                else:
+                    events.append((row.kind, orjson.loads(row.payload)))
+            hub.publish(events)
+
+            if loop.time() - last_prune >= PRUNE_EVERY_SECONDS:
+                last_prune = loop.time()
+                await asyncio.to_thread(_prune, settings.event_outbox_retention_seconds)
+        except Exception as e:
+            print(f"[OUTBOX] ERRO ao ler event_outbox: {e.__class__.__name__}: {e}")
+
+        if len(rows) < 1000:  # lote cheio: ainda há atraso, lê de novo já
+            await asyncio.sleep(poll)
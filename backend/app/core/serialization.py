@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+from typing import Any, Iterable, Type
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+_ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _default(obj: Any) -> Any:
+    # Modelos pydantic/SQLModel: dump em modo python (orjson cuida de datetime)
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    raise TypeError(f"Tipo não serializável: {type(obj).__name__}")
+
+
+def dumps(data: Any) -> bytes:
+    """JSON -> bytes via orjson (datetimes em ISO 8601, como antes)."""
+    return orjson.dumps(data, default=_default, option=_ORJSON_OPTIONS)
+
+
+class ORJSONResponse(JSONResponse):
+    """
+    Resposta JSON serializada com orjson.
+
+    Quando a rota devolve esta resposta diretamente, o FastAPI não passa
+    o conteúdo por response_model/jsonable_encoder.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def columns_for(read_model: Type[BaseModel], table_model: Any) -> list[Any]:
+    """
+    Colunas da tabela correspondentes aos campos do modelo de leitura
+    (ex.: BotRead -> Bot.*). Permite selecionar só o necessário e montar
+    a resposta a partir das linhas, sem instanciar ORM nem revalidar.
+    """
+    return [getattr(table_model, name) for name in read_model.model_fields]
+
+
+def rows_as_dicts(rows: Iterable[Any]) -> list[dict]:
+    return [row._asdict() for row in rows]
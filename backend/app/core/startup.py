@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Optional
+
+# Primeiro módulo do app importado por app.main / app.engine: daqui em diante
+# conta como tempo de import do boot.
+_PROCESS_STARTED = time.perf_counter()
+
+
+class StartupStatus:
+    """
+    Fases do boot deste processo (imports, init_db, warm-up) com a duração
+    de cada uma. `ready` liga quando o warm-up termina (com ou sem falhas:
+    uma tarefa que falhou só fica fria, o primeiro ciclo paga por ela).
+    """
+
+    def __init__(self) -> None:
+        self.started = _PROCESS_STARTED
+        self.phases: dict[str, dict[str, Any]] = {}
+        self.ready = False
+        self.ready_seconds: Optional[float] = None
+
+    def mark(self, phase: str, since: float, **extra: Any) -> float:
+        """Registra a fase iniciada em `since` (perf_counter) e devolve a duração."""
+        seconds = time.perf_counter() - since
+        self.phases[phase] = {"seconds": round(seconds, 4), **extra}
+        return seconds
+
+    def set_ready(self) -> None:
+        self.ready = True
+        self.ready_seconds = time.perf_counter() - self.started
+
+    def to_dict(self) -> dict:
+        return {
+            "ready": self.ready,
+            "uptime_seconds": round(time.perf_counter() - self.started, 3),
+            "ready_after_seconds": (
+                None if self.ready_seconds is None else round(self.ready_seconds, 3)
+            ),
+            "phases": self.phases,
+        }
+
+
+@lru_cache
+def get_startup() -> StartupStatus:
+    return StartupStatus()
+
+
+def mark_imports_done() -> None:
+    get_startup().mark("imports", _PROCESS_STARTED)
+
+
+async def _timed(name: str, fn: Callable[[], Any], is_async: bool = False) -> None:
+    """Roda uma tarefa do warm-up registrando duração e erro (sem propagar)."""
+    status = get_startup()
+    started = time.perf_counter()
+    try:
+        result = await fn() if is_async else await asyncio.to_thread(fn)
+    except Exception as e:
+        status.mark(f"warmup.{name}", started, ok=False, error=f"{e.__class__.__name__}: {e}")
+        print(f"[STARTUP] Warm-up '{name}' falhou: {e.__class__.__name__}: {e}")
+        return
+    extra = {"detail": result} if isinstance(result, dict) else {}
+    status.mark(f"warmup.{name}", started, ok=True, **extra)
+
+
+async def warm_up(engine: bool) -> None:
+    """
+    Aquece em paralelo o que o primeiro ciclo (e as primeiras requisições)
+    usariam frio: conexão do pool HTTP, exchangeInfo, offset do relógio e,
+    se este processo roda o engine, estado/bots/indicadores no banco e o
+    pool do cliente async (preços do ciclo e ordens).
+    """
+    from app.binance.async_client import get_async_binance_client
+    from app.binance.client import ping, sync_server_time
+    from app.binance.exchange_info import get_exchange_info_cache
+    from app.binance.signer import get_signer
+    from app.core.config import get_settings
+
+    settings = get_settings()
+    status = get_startup()
+    started = time.perf_counter()
+
+    tasks: list[Awaitable[None]] = [
+        _timed("http_pool", ping),
+        _timed("exchange_info", get_exchange_info_cache().ensure_loaded),
+    ]
+    if get_signer().configured:
+        tasks.append(_timed("server_time", sync_server_time))
+    if engine:
+        from app.engine.runner import warm_engine_caches
+
+        tasks.append(_timed("engine_state", warm_engine_caches))
+        # cliente async: preços do ciclo (e ordens, no modo real)
+        tasks.append(_timed("async_client", get_async_binance_client().ping, is_async=True))
+
+    try:
+        await asyncio.wait_for(
+            asyncio.gather(*tasks), timeout=settings.startup_warmup_timeout_seconds
+        )
+    except asyncio.TimeoutError:
+        print(
+            f"[STARTUP] Warm-up excedeu {settings.startup_warmup_timeout_seconds:.0f}s; "
+            "seguindo com o que já aqueceu."
+        )
+    status.mark("warmup", started)
+    status.set_ready()
+
+    timings = ", ".join(
+        f"{name}={info['seconds'] * 1000:.0f}ms" + ("" if info.get("ok", True) else " (falhou)")
+        for name, info in status.phases.items()
+    )
+    print(f"[STARTUP] Pronto em {status.ready_seconds:.2f}s ({timings}).")
+
+
+_warm_task: Optional[asyncio.Task] = None
+
+
+def ensure_warm(engine: bool = True) -> asyncio.Task:
+    """
+    Task única do warm-up deste processo (a primeira chamada a cria; as
+    seguintes, ex. o loop do engine, aguardam a mesma).
+    """
+    global _warm_task
+    if _warm_task is None or _warm_task.get_loop() is not asyncio.get_running_loop():
+        _warm_task = asyncio.create_task(warm_up(engine))
+    return _warm_task
+
+
+async def after_warm_up(loop_fn: Callable[[], Awaitable[None]]) -> None:
+    """Roda um loop de fundo só depois do warm-up (evita repetir a primeira carga)."""
+    await ensure_warm()
+    await loop_fn()
@@ -1,25 +1,138 @@
 from __future__ import annotations
 
-from typing import Dict
+import json
+import threading
+import time
+from datetime import datetime
+from typing import Any, Optional
 
+from sqlmodel import Session, select
 
-# Estado global simples em memória.
-# Por enquanto só temos system_running, mas se precisar
-# podemos guardar mais coisas aqui depois.
-_state: Dict[str, bool] = {
-    "system_running": False,
+from app.core.config import get_settings
+from app.core.versions import get_version
+from app.db.session import engine
+from app.db.writer import run_write
+from app.models.system import SystemState
+
+# Estado global persistido no banco (tabela system_state), visível para
+# todos os processos: workers da API e o engine (python -m app.engine).
+#
+# Leituras passam por um cache em memória: a entrada vale enquanto a versão
+# "system" não mudar (escritas locais e as de outros processos, repassadas
+# pelo event_outbox, incrementam a versão) e por no máximo
+# system_state_cache_ttl_seconds. Assim o engine consulta o estado a cada
+# ciclo sem ir ao banco.
+SYSTEM_RUNNING_KEY = "system_running"
+
+# Flags de runtime por engine: "engine.<nome>.<flag>"
+ENGINE_FLAG_PREFIX = "engine."
+ENGINE_PAUSED_FLAG = "paused"
+
+_DEFAULTS: dict[str, Any] = {
+    SYSTEM_RUNNING_KEY: False,
 }
 
+_cache_lock = threading.Lock()
+_cache: dict[str, tuple[int, float, Any]] = {}  # key -> (versão, instante, valor)
+
+
+def _read(key: str) -> Any:
+    with Session(engine) as session:
+        row = session.get(SystemState, key)
+    return json.loads(row.value) if row else _DEFAULTS.get(key)
+
+
+def _write(session: Session, key: str, value: Any) -> Any:
+    row = session.get(SystemState, key)
+    if row is None:
+        row = SystemState(key=key, value=json.dumps(value))
+    else:
+        row.value = json.dumps(value)
+        row.updated_at = datetime.utcnow()
+    session.add(row)
+    return value
+
+
+def _cache_put(key: str, value: Any, version: int) -> None:
+    with _cache_lock:
+        _cache[key] = (version, time.monotonic(), value)
+
+
+def invalidate_state_cache() -> None:
+    with _cache_lock:
+        _cache.clear()
+
+
+def get_state(key: str, default: Any = None) -> Any:
+    """Valor de uma chave do system_state (com cache em memória)."""
+    version = get_version("system")
+    ttl = get_settings().system_state_cache_ttl_seconds
+    with _cache_lock:
+        cached = _cache.get(key)
+    if cached is not None and cached[0] == version and time.monotonic() - cached[1] < ttl:
+        value = cached[2]
+    else:
+        value = _read(key)
+        _cache_put(key, value, version)
+    return default if value is None else value
+
 
+def set_state(key: str, value: Any) -> Any:
+    value = run_write(lambda session: _write(session, key, value))
+    # o writer já incrementou a versão "system" antes de devolver
+    _cache_put(key, value, get_version("system"))
+    return value
+
+
+# ---------------------------------------------------------------------
+# system_running
+# ---------------------------------------------------------------------
 def get_system_running() -> bool:
-    return _state["system_running"]
+    return bool(get_state(SYSTEM_RUNNING_KEY))
 
 
 def set_system_running(value: bool) -> bool:
-    _state["system_running"] = bool(value)
-    return _state["system_running"]
+    return set_state(SYSTEM_RUNNING_KEY, bool(value))
 
 
 def toggle_system_running() -> bool:
-    _state["system_running"] = not _state["system_running"]
-    return _state["system_running"]
+    def _toggle(session: Session) -> bool:
+        row = session.get(SystemState, SYSTEM_RUNNING_KEY)
+        current = json.loads(row.value) if row else _DEFAULTS[SYSTEM_RUNNING_KEY]
+        return _write(session, SYSTEM_RUNNING_KEY, not current)
+
+    value = run_write(_toggle)
+    _cache_put(SYSTEM_RUNNING_KEY, value, get_version("system"))
+    return value
+
+
+# ---------------------------------------------------------------------
+# Flags de runtime por engine
+# ---------------------------------------------------------------------
+def engine_flag_key(flag: str, engine_name: Optional[str] = None) -> str:
+    return f"{ENGINE_FLAG_PREFIX}{engine_name or get_settings().engine_name}.{flag}"
+
+
+def get_engine_flag(flag: str, default: Any = None, engine_name: Optional[str] = None) -> Any:
+    return get_state(engine_flag_key(flag, engine_name), default)
+
+
+def set_engine_flag(flag: str, value: Any, engine_name: Optional[str] = None) -> Any:
+    return set_state(engine_flag_key(flag, engine_name), value)
+
+
+def list_engine_flags(engine_name: Optional[str] = None) -> dict[str, Any]:
+    """Todas as flags gravadas para um engine (lido direto do banco)."""
+    prefix = engine_flag_key("", engine_name)
+    with Session(engine) as session:
+        rows = session.exec(
+            select(SystemState).where(SystemState.key.startswith(prefix))
+        ).all()
+    return {row.key[len(prefix):]: json.loads(row.value) for row in rows}
+
+
+def is_engine_running(engine_name: Optional[str] = None) -> bool:
+    """system_running ligado e este engine não pausado pela flag 'paused'."""
+    return get_system_running() and not get_engine_flag(
+        ENGINE_PAUSED_FLAG, False, engine_name
+    )
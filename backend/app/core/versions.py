@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import threading
+import uuid
+from typing import Dict, Iterable
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm import Session
+
+from app.models.system import ResourceVersion
+
+
+# Versões monotônicas por recurso, usadas como chave de cache / ETag.
+#
+# A fonte é a tabela resource_version: o writer incrementa as versões dos
+# recursos alterados na mesma transação do lote e repassa os números pelo
+# event_outbox; cada processo guarda aqui a maior versão que já viu. Assim
+# todos os workers da API dão o mesmo ETag para os mesmos dados.
+#
+# BOOT_ID identifica o processo (origem no outbox, ids de evento, lease).
+BOOT_ID = uuid.uuid4().hex[:8]
+
+_lock = threading.Lock()
+_versions: Dict[str, int] = {
+    "bots": 0,
+    "trades": 0,
+    "indicators": 0,
+    "system": 0,
+    "orders": 0,
+}
+
+# Tabela -> recurso afetado (para detecção automática no flush)
+_TABLE_RESOURCES: Dict[str, str] = {
+    "bot": "bots",
+    "trade": "trades",
+    "bot_stats": "trades",
+    "global_stats": "trades",
+    "trade_rollup": "trades",
+    "indicator": "indicators",
+    "system_state": "system",
+    "bot_order": "orders",
+}
+
+_SESSION_KEY = "bbot_changed_resources"
+
+
+def get_version(name: str) -> int:
+    return _versions.get(name, 0)
+
+
+def get_versions(names: Iterable[str]) -> tuple[int, ...]:
+    return tuple(_versions.get(n, 0) for n in names)
+
+
+def bump(*names: str) -> None:
+    with _lock:
+        for name in names:
+            _versions[name] = _versions.get(name, 0) + 1
+
+
+def set_versions(versions: Dict[str, int]) -> None:
+    """Adota as versões vindas do banco (nunca volta para uma menor)."""
+    with _lock:
+        for name, version in versions.items():
+            if version > _versions.get(name, 0):
+                _versions[name] = version
+
+
+def advance_versions(session: Session, names: Iterable[str]) -> Dict[str, int]:
+    """
+    Incrementa no banco as versões dos recursos (dentro da transação do
+    chamador, o writer) e devolve os novos valores.
+    """
+    names = sorted(set(names))
+    if not names:
+        return {}
+    table = ResourceVersion.__table__
+    rows = session.execute(
+        update(table)
+        .where(table.c.name.in_(names))
+        .values(version=table.c.version + 1)
+        .returning(table.c.name, table.c.version)
+    ).all()
+    versions = {name: version for name, version in rows}
+    missing = [name for name in names if name not in versions]
+    if missing:
+        session.execute(insert(table), [{"name": name, "version": 1} for name in missing])
+        versions.update({name: 1 for name in missing})
+    return versions
+
+
+def load_versions(session: Session) -> None:
+    """Carrega as versões gravadas no banco (boot do processo)."""
+    table = ResourceVersion.__table__
+    set_versions(dict(session.execute(select(table.c.name, table.c.version)).all()))
+
+
+def mark_changed(session: Session, *names: str) -> None:
+    """Marca recursos alterados na sessão (para escritas fora do ORM, ex. bulk delete)."""
+    session.info.setdefault(_SESSION_KEY, set()).update(names)
+
+
+def track_flush(session: Session, _flush_context, _instances) -> None:
+    """Listener de before_flush: detecta recursos alterados pelos objetos da sessão."""
+    changed = session.info.setdefault(_SESSION_KEY, set())
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        table = getattr(obj, "__tablename__", None)
+        resource = _TABLE_RESOURCES.get(table)
+        if resource:
+            changed.add(resource)
+
+
+def pop_changed(session: Session) -> set[str]:
+    return session.info.pop(_SESSION_KEY, set())
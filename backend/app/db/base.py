@@ -1,11 +1,116 @@
 from __future__ import annotations
 
-from sqlmodel import SQLModel
+import hashlib
+import json
+import time
+from typing import Optional
 
+from sqlalchemy import (
+    CheckConstraint,
+    Constraint,
+    ForeignKeyConstraint,
+    PrimaryKeyConstraint,
+    UniqueConstraint,
+    inspect,
+    text,
+)
+from sqlalchemy.exc import SQLAlchemyError
+from sqlmodel import Session, SQLModel
+
+from app.core.state import set_state
+from app.core.versions import load_versions
 from app.db.session import engine
+from app.db.writer import run_write
 from app import models  # importa modelos para registrar no metadata
+from app.stats.service import rebuild_stats, stats_need_backfill
+
+# Chave do system_state com o fingerprint do schema aplicado por último
+SCHEMA_FINGERPRINT_KEY = "schema_fingerprint"
+
+
+def _constraint_part(constraint: Constraint) -> str:
+    columns = ",".join(column.name for column in constraint.columns)
+    if isinstance(constraint, PrimaryKeyConstraint):
+        return f"PK:{columns}"
+    if isinstance(constraint, ForeignKeyConstraint):
+        target = ",".join(fk.target_fullname for fk in constraint.elements)
+        return f"FK:{constraint.name}:{columns}->{target}:{constraint.ondelete}"
+    if isinstance(constraint, UniqueConstraint):
+        return f"U:{constraint.name}:{columns}"
+    if isinstance(constraint, CheckConstraint):
+        return f"K:{constraint.name}:{constraint.sqltext}"
+    return f"X:{type(constraint).__name__}:{constraint.name}:{columns}"
+
+
+def schema_fingerprint() -> str:
+    """Hash das tabelas, colunas, índices e constraints (PK, FK, unique, check)."""
+    parts: list[str] = []
+    for table in SQLModel.metadata.sorted_tables:
+        parts.append(f"T:{table.name}")
+        for column in table.columns:
+            parts.append(f"C:{column.name}:{column.type}:{column.nullable}")
+        for index in sorted(table.indexes, key=lambda i: i.name or ""):
+            columns = ",".join(column.name for column in index.columns)
+            parts.append(f"I:{index.name}:{columns}:{index.unique}")
+        parts.extend(sorted(_constraint_part(c) for c in table.constraints))
+    return hashlib.sha1("\n".join(parts).encode("utf-8")).hexdigest()
+
+
+def _stored_fingerprint() -> Optional[str]:
+    try:
+        with engine.connect() as conn:
+            row = conn.execute(
+                text("SELECT value FROM system_state WHERE key = :key"),
+                {"key": SCHEMA_FINGERPRINT_KEY},
+            ).first()
+    except SQLAlchemyError:
+        return None  # banco novo: system_state ainda não existe
+    return json.loads(row[0]) if row else None
+
+
+def _schema_is_current(fingerprint: str) -> bool:
+    if _stored_fingerprint() != fingerprint:
+        return False
+    # tabela apagada à mão: o fingerprint bate, mas falta a tabela
+    existing = set(inspect(engine).get_table_names())
+    return all(table.name in existing for table in SQLModel.metadata.sorted_tables)
 
 
 def init_db() -> None:
-    """Cria as tabelas no banco, caso não existam."""
-    SQLModel.metadata.create_all(bind=engine)
+    """
+    Cria as tabelas no banco, caso não existam.
+
+    O create_all (e a checagem índice a índice) só roda quando o schema dos
+    modelos mudou desde o último boot: o fingerprint fica no system_state.
+    """
+    started = time.perf_counter()
+    fingerprint = schema_fingerprint()
+    if _schema_is_current(fingerprint):
+        print(
+            f"[DB] Schema atual (fingerprint {fingerprint[:12]}); create_all ignorado "
+            f"({(time.perf_counter() - started) * 1000:.0f}ms)."
+        )
+    else:
+        SQLModel.metadata.create_all(bind=engine)
+
+        # create_all não mexe em tabelas já existentes: garante índices novos
+        for table in SQLModel.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(bind=engine, checkfirst=True)
+
+        set_state(SCHEMA_FINGERPRINT_KEY, fingerprint)
+        print(
+            f"[DB] Schema criado/atualizado (fingerprint {fingerprint[:12]}) "
+            f"em {(time.perf_counter() - started) * 1000:.0f}ms."
+        )
+
+    # Versões dos recursos (ETag) compartilhadas entre processos
+    with Session(engine) as session:
+        load_versions(session)
+
+    # Bancos antigos: popula bot_stats/global_stats a partir dos trades existentes
+    with Session(engine) as session:
+        needs_backfill = stats_need_backfill(session)
+    if needs_backfill:
+        total = run_write(rebuild_stats)
+        print(f"[DB] bot_stats reconstruído para {total} bot(s).")
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from sqlalchemy import event
 from sqlmodel import Session, create_engine
 
 from app.core.config import get_settings
@@ -17,6 +18,40 @@ engine = create_engine(
     connect_args=connect_args,
 )
 
+# Engine exclusivo do writer (app/db/writer.py): uma única conexão de escrita.
+write_engine = create_engine(
+    settings.database_url,
+    echo=False,
+    connect_args=connect_args,
+    pool_size=1,
+    max_overflow=0,
+)
+
+
+if settings.database_url.startswith("sqlite"):
+
+    @event.listens_for(engine, "connect")
+    @event.listens_for(write_engine, "connect")
+    def _sqlite_pragmas(dbapi_conn, _record) -> None:
+        # WAL: leitores não bloqueiam o writer (e vice-versa)
+        cursor = dbapi_conn.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA busy_timeout=5000")
+        cursor.close()
+
+    # O pysqlite abre a transação sozinho só antes de DML e não antes de um
+    # SAVEPOINT: sem BEGIN explícito, cada RELEASE do writer (um SAVEPOINT
+    # por mutação) já commitava. Receita do SQLAlchemy: desliga o BEGIN do
+    # driver e emite o nosso, para o lote inteiro ser uma transação só.
+    @event.listens_for(write_engine, "connect")
+    def _sqlite_manual_begin(dbapi_conn, _record) -> None:
+        dbapi_conn.isolation_level = None
+
+    @event.listens_for(write_engine, "begin")
+    def _sqlite_begin(conn) -> None:
+        conn.exec_driver_sql("BEGIN")
+
 
 def get_session() -> Session:
     """Dependência do FastAPI para injetar sessão de banco."""
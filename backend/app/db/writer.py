@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from functools import lru_cache
+from typing import Any, Callable, Optional, TypeVar
+
+from sqlalchemy import event
+from sqlmodel import Session
+
+from app.core.config import get_settings
+from app.core.events import capture_events, discard_after, get_event_hub, pending_count, pop_events
+from app.core.outbox import write_outbox
+from app.core.versions import advance_versions, pop_changed, set_versions, track_flush
+from app.db.session import write_engine
+
+T = TypeVar("T")
+
+# Uma mutação recebe a sessão de escrita e devolve qualquer valor.
+Mutation = Callable[[Session], Any]
+
+
+class DbWriter:
+    """
+    Writer único do banco.
+
+    Uma thread dedicada é dona da (única) conexão de escrita. Engine e rotas
+    enviam mutações por uma fila; o writer agrupa as mutações em lotes curtos,
+    roda cada uma dentro de um SAVEPOINT (a falha de uma não derruba as outras),
+    faz UM commit por lote e resolve os futures dos chamadores.
+
+    Leituras continuam usando sessões normais (app.db.session.engine).
+    """
+
+    def __init__(self, batch_size: int = 64, batch_window_ms: float = 2.0) -> None:
+        self.batch_size = max(1, batch_size)
+        self.batch_window = max(0.0, batch_window_ms) / 1000.0
+        self._queue: "queue.Queue[Optional[tuple[Mutation, Future]]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    # -----------------------------------------------------------------
+    # API pública
+    # -----------------------------------------------------------------
+    def start(self) -> None:
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(
+                target=self._run,
+                name="bbot-db-writer",
+                daemon=True,
+            )
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread and thread.is_alive():
+            self._queue.put(None)
+            thread.join(timeout)
+
+    def submit(self, fn: Mutation) -> Future:
+        """Enfileira uma mutação e devolve um Future com o resultado dela."""
+        self.start()
+        fut: Future = Future()
+        self._queue.put((fn, fut))
+        return fut
+
+    def run(self, fn: Callable[[Session], T], timeout: Optional[float] = None) -> T:
+        """Enfileira uma mutação e espera o commit (bloqueante)."""
+        return self.submit(fn).result(timeout)
+
+    # -----------------------------------------------------------------
+    # Loop da thread
+    # -----------------------------------------------------------------
+    def _next_batch(self) -> tuple[list[tuple[Mutation, Future]], bool]:
+        """Bloqueia até a primeira mutação e junta as próximas dentro da janela."""
+        first = self._queue.get()
+        if first is None:
+            return [], True
+
+        batch = [first]
+        deadline = time.monotonic() + self.batch_window
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = (
+                    self._queue.get(timeout=remaining)
+                    if remaining > 0
+                    else self._queue.get_nowait()
+                )
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+
+        return batch, False
+
+    def _run(self) -> None:
+        while True:
+            batch, stopping = self._next_batch()
+            if batch:
+                self._apply(batch)
+            if stopping:
+                return
+
+    def _apply(self, batch: list[tuple[Mutation, Future]]) -> None:
+        results: list[tuple[Future, bool, Any]] = []
+
+        with Session(write_engine, expire_on_commit=False) as session:
+            event.listen(session, "before_flush", track_flush)
+            event.listen(session, "after_flush", capture_events)
+            for fn, fut in batch:
+                if not fut.set_running_or_notify_cancel():
+                    continue
+                events_before = pending_count(session)
+                try:
+                    with session.begin_nested():
+                        value = fn(session)
+                    results.append((fut, True, value))
+                except Exception as e:  # repassa o erro ao chamador
+                    discard_after(session, events_before)
+                    results.append((fut, False, e))
+
+            try:
+                # flush final antes do outbox: eventos/versões do lote completos
+                session.flush()
+                versions = advance_versions(session, pop_changed(session))
+                events = pop_events(session)
+                # mesma transação: outros processos veem os eventos junto com os dados
+                write_outbox(session, events, versions)
+                session.commit()
+            except Exception as e:
+                session.rollback()
+                print(f"[DB-WRITER] ERRO no commit do lote: {e.__class__.__name__}: {e}")
+                for fut, _ok, _value in results:
+                    fut.set_exception(e)
+                return
+
+        # Versões e eventos só depois do commit (ETag/cache e /events/stream)
+        if versions:
+            set_versions(versions)
+        get_event_hub().publish(events)
+
+        for fut, ok, value in results:
+            if ok:
+                fut.set_result(value)
+            else:
+                fut.set_exception(value)
+
+
+@lru_cache
+def get_db_writer() -> DbWriter:
+    settings = get_settings()
+    return DbWriter(
+        batch_size=settings.db_writer_batch_size,
+        batch_window_ms=settings.db_writer_batch_window_ms,
+    )
+
+
+def run_write(fn: Callable[[Session], T], timeout: Optional[float] = None) -> T:
+    """Atalho: executa `fn(session)` no writer único e devolve o resultado."""
+    return get_db_writer().run(fn, timeout)
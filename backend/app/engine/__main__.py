@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import asyncio
+import signal
+import time
+
+# primeiro import do app: marca o início do boot (tempo de imports)
+from app.core.startup import after_warm_up, ensure_warm, get_startup, mark_imports_done
+
+from app.binance.client import server_time_sync_loop
+from app.core.config import get_settings
+from app.core.outbox import outbox_tail_loop
+from app.db.base import init_db
+from app.db.writer import get_db_writer
+from app.engine.lease import release_engine_lease
+from app.engine.runner import bot_engine_loop
+
+
+async def _run() -> None:
+    loop = asyncio.get_running_loop()
+    stop = asyncio.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:  # Windows: Ctrl+C vira KeyboardInterrupt
+            pass
+
+    # warm-up antes do primeiro ciclo (o loop do engine aguarda a mesma task)
+    ensure_warm(engine=True)
+    # o outbox avisa mudanças feitas pela API (invalida o cache do system_state)
+    tasks = [
+        asyncio.create_task(bot_engine_loop()),
+        asyncio.create_task(outbox_tail_loop()),
+        # offset do relógio para as ordens assinadas (app_mode=real)
+        asyncio.create_task(after_warm_up(server_time_sync_loop)),
+    ]
+    await stop.wait()
+    for task in tasks:
+        task.cancel()
+
+
+def main() -> None:
+    """
+    Engine de bots como processo próprio, separado da API:
+
+        python -m app.engine
+        ENGINE_ENABLED=false uvicorn app.main:app --workers 4
+
+    Controle (start/stop de bots, system_running) chega pelo banco; os
+    eventos do engine chegam aos workers da API pela tabela event_outbox.
+    """
+    mark_imports_done()
+    settings = get_settings()
+    print(f"[ENGINE] Processo do engine iniciado (modo={settings.app_mode}).")
+    started = time.perf_counter()
+    init_db()
+    get_startup().mark("init_db", started)
+    writer = get_db_writer()
+    writer.start()
+    try:
+        asyncio.run(_run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        try:
+            release_engine_lease()
+        finally:
+            writer.stop()
+        print("[ENGINE] Processo do engine finalizado.")
+
+
+if __name__ == "__main__":
+    main()
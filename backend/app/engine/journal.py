@@ -0,0 +1,418 @@
+from __future__ import annotations
+
+import atexit
+import os
+import queue
+import struct
+import threading
+import time
+import zlib
+from concurrent.futures import Future
+from datetime import datetime
+from functools import lru_cache, partial
+from pathlib import Path
+from typing import BinaryIO, Iterator, Optional
+
+import orjson
+from sqlmodel import Session
+
+from app.core.config import get_settings
+from app.db.session import engine
+from app.db.writer import get_db_writer
+from app.engine.records import BotDiff, project_diffs, stale_diffs
+from app.models.system import JournalCursor
+
+# ---------------------------------------------------------------------
+# Journal de trades do engine (registro durável das ações do engine).
+#
+# Cada ciclo grava UMA entrada com os fills simulados e as mudanças dos
+# bots; o ciclo considera os fills confirmados quando a entrada está no
+# disco (fsync), sem esperar o commit do banco. Trade, bot_stats e saldos
+# dos bots são uma projeção aplicada depois pelo writer, e o cursor da
+# projeção (journal_cursor) é gravado na mesma transação: no boot (ou ao
+# assumir o lease) o que ficou no journal além do cursor é reprojetado.
+#
+# O journal é dividido em segmentos <engine>.<primeiro seq>.bbjrn de até
+# trade_journal_segment_bytes; a leitura começa no segmento do cursor e os
+# segmentos já projetados por inteiro são apagados a cada rotação.
+#
+# Formato de um segmento (little-endian):
+#   MAGIC, depois entradas <tipo u8><seq u64><ts_us i8><tamanho u32><crc32 u32><payload>
+# Uma entrada final truncada ou com CRC inválido (processo morto no meio da
+# escrita) nunca foi confirmada: é cortada ao abrir o arquivo.
+# ---------------------------------------------------------------------
+MAGIC = b"BBOTJRN1"
+_HEADER = struct.Struct("<BQqII")
+_SUFFIX = ".bbjrn"
+
+JRN_FILLS = 1  # JSON: [{"bot_id", "changes", "trade", "before"}] de um ciclo
+
+
+class JournalSequenceError(RuntimeError):
+    """Entrada fora de ordem: a projeção só avança de um em um a partir do cursor."""
+
+
+def encode_fills(diffs: list[BotDiff]) -> bytes:
+    return orjson.dumps(
+        [
+            {"bot_id": d.bot_id, "changes": d.changes, "trade": d.trade, "before": d.before}
+            for d in diffs
+        ]
+    )
+
+
+def decode_fills(payload: bytes) -> list[BotDiff]:
+    diffs = []
+    for item in orjson.loads(payload):
+        trade = item["trade"]
+        if trade is not None:
+            trade["created_at"] = datetime.fromisoformat(trade["created_at"])
+        diffs.append(BotDiff(item["bot_id"], item["changes"], trade, item.get("before")))
+    return diffs
+
+
+def _fsync_dir(directory: Path) -> None:
+    """Torna durável a criação/remoção/renomeação de arquivos no diretório."""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return  # sem fsync de diretório nesta plataforma
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _scan(
+    f: BinaryIO,
+    path: Path,
+    after_seq: int = 0,
+    limit: Optional[int] = None,
+) -> Iterator[tuple[int, datetime, int, bytes, int]]:
+    """
+    Lê as entradas de um segmento em streaming. Entradas com seq <= after_seq
+    (já projetadas) são puladas só pelo cabeçalho, sem ler o payload.
+    Para na primeira entrada incompleta ou com CRC inválido.
+    """
+    f.seek(0)
+    if f.read(len(MAGIC)) != MAGIC:
+        raise ValueError(f"{path} não é um journal de trades (magic inválido).")
+    if limit is None:
+        limit = os.fstat(f.fileno()).st_size
+
+    pos = len(MAGIC)
+    while pos + _HEADER.size <= limit:
+        f.seek(pos)
+        kind, seq, ts_us, size, crc = _HEADER.unpack(f.read(_HEADER.size))
+        start = pos + _HEADER.size
+        if start + size > limit:
+            return
+        pos = start + size
+        if seq <= after_seq:
+            continue
+        payload = f.read(size)
+        if zlib.crc32(payload) != crc:
+            return
+        yield seq, datetime.utcfromtimestamp(ts_us / 1_000_000), kind, payload, pos
+
+
+class TradeJournal:
+    """
+    Arquivo append-only com commit em grupo: uma thread dedicada junta as
+    entradas que chegam dentro da janela, escreve todas e faz UM fsync;
+    cada `append` devolve um Future com o seq da entrada, resolvido só
+    depois do fsync.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        name: str,
+        group_window_ms: float = 2.0,
+        segment_bytes: int = 16 * 1024 * 1024,
+    ) -> None:
+        self.directory = directory
+        self.name = name
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.group_window = max(0.0, group_window_ms) / 1000.0
+        self.segment_bytes = max(len(MAGIC) + _HEADER.size, segment_bytes)
+        self._segments = self._list_segments()
+        if not self._segments:
+            self._segments = [(1, self._segment_path(1))]
+        first_seq, self.path = self._segments[-1]
+        self.last_seq = first_seq - 1
+        self._file: BinaryIO = open(self.path, "a+b")
+        self._recover_tail()
+        self._queue: "queue.Queue[Optional[tuple[int, bytes, Future]]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def _segment_path(self, first_seq: int) -> Path:
+        return self.directory / f"{self.name}.{first_seq:020d}{_SUFFIX}"
+
+    def _list_segments(self) -> list[tuple[int, Path]]:
+        legacy = self.directory / f"{self.name}{_SUFFIX}"
+        if legacy.exists():
+            # journal de arquivo único (antes dos segmentos): começa no seq 1
+            legacy.replace(self._segment_path(1))
+            _fsync_dir(self.directory)
+        segments = []
+        for path in self.directory.glob(f"{self.name}.*{_SUFFIX}"):
+            first = path.name[len(self.name) + 1 : -len(_SUFFIX)]
+            if first.isdigit():
+                segments.append((int(first), path))
+        return sorted(segments)
+
+    def _recover_tail(self) -> None:
+        """Acha o último seq válido e corta uma entrada final incompleta."""
+        size = self._file.seek(0, os.SEEK_END)
+        if size == 0:
+            self._file.write(MAGIC)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            _fsync_dir(self.directory)
+            return
+
+        good = len(MAGIC)
+        for seq, _ts, _kind, _payload, end in _scan(self._file, self.path):
+            self.last_seq, good = seq, end
+        if good < size:
+            print(
+                f"[JOURNAL] Entrada final incompleta em {self.path} "
+                f"({size - good} bytes) descartada."
+            )
+            self._file.truncate(good)
+            os.fsync(self._file.fileno())
+
+    def read(self, after_seq: int = 0) -> Iterator[tuple[int, datetime, int, bytes]]:
+        """Entradas confirmadas com seq > after_seq, em ordem."""
+        with self._lock:
+            segments = list(self._segments)
+            end = self._file.seek(0, os.SEEK_END)
+        # só a partir do segmento que contém after_seq + 1
+        start = 0
+        for i, (first_seq, _path) in enumerate(segments):
+            if first_seq <= after_seq + 1:
+                start = i
+        for i, (_first_seq, path) in enumerate(segments[start:], start):
+            last = i == len(segments) - 1
+            with open(path, "rb") as f:
+                # no segmento ativo, só até o fim já confirmado (fsync)
+                limit = end if last else None
+                for seq, ts, kind, payload, _end in _scan(f, path, after_seq, limit):
+                    yield seq, ts, kind, payload
+
+    def prune(self, projected_seq: int) -> int:
+        """Apaga os segmentos cujas entradas o banco já projetou. Retorna quantos."""
+        with self._lock:
+            removable = [
+                path
+                for (_first, path), (next_first, _next) in zip(self._segments, self._segments[1:])
+                if next_first <= projected_seq + 1
+            ]
+            for path in removable:
+                path.unlink(missing_ok=True)
+            self._segments = [s for s in self._segments if s[1] not in removable]
+        if removable:
+            _fsync_dir(self.directory)
+        return len(removable)
+
+    def _rotate(self) -> None:
+        """Fecha o segmento ativo e abre um novo a partir de last_seq + 1 (sob _lock)."""
+        first_seq = self.last_seq + 1
+        path = self._segment_path(first_seq)
+        new_file: BinaryIO = open(path, "a+b")
+        new_file.write(MAGIC)
+        new_file.flush()
+        os.fsync(new_file.fileno())
+        _fsync_dir(self.directory)
+        self._file.close()
+        self._file, self.path = new_file, path
+        self._segments.append((first_seq, path))
+
+    # -----------------------------------------------------------------
+    def start(self) -> None:
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(
+                target=self._run, name="bbot-trade-journal", daemon=True
+            )
+            self._thread.start()
+
+    def append(self, kind: int, payload: bytes) -> Future:
+        """Enfileira uma entrada; o Future devolve o seq depois do fsync."""
+        self.start()
+        fut: Future = Future()
+        self._queue.put((kind, payload, fut))
+        return fut
+
+    def close(self, timeout: float = 5.0) -> None:
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread and thread.is_alive():
+            self._queue.put(None)
+            thread.join(timeout)
+        if not self._file.closed:
+            self._file.close()
+
+    def _next_group(self) -> tuple[list[tuple[int, bytes, Future]], bool]:
+        first = self._queue.get()
+        if first is None:
+            return [], True
+        group = [first]
+        deadline = time.monotonic() + self.group_window
+        while True:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                return group, False
+            if item is None:
+                return group, True
+            group.append(item)
+
+    def _run(self) -> None:
+        while True:
+            group, stopping = self._next_group()
+            if group:
+                self._write_group(group)
+            if stopping:
+                return
+
+    def _write_group(self, group: list[tuple[int, bytes, Future]]) -> None:
+        ts_us = int(time.time() * 1_000_000)
+        buf = bytearray()
+        seq = self.last_seq
+        for kind, payload, _fut in group:
+            seq += 1
+            buf += _HEADER.pack(kind, seq, ts_us, len(payload), zlib.crc32(payload))
+            buf += payload
+
+        rotated = False
+        with self._lock:
+            start = self._file.seek(0, os.SEEK_END)
+            if start >= self.segment_bytes:
+                try:
+                    self._rotate()
+                    start, rotated = len(MAGIC), True
+                except OSError as e:
+                    # segue no segmento atual; tenta de novo no próximo grupo
+                    print(f"[JOURNAL] ERRO ao rotacionar segmento: {e.__class__.__name__}: {e}")
+            try:
+                self._file.write(buf)
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            except Exception as e:
+                # nada deste grupo foi confirmado: desfaz a escrita parcial
+                try:
+                    self._file.truncate(start)
+                except OSError:
+                    pass
+                print(f"[JOURNAL] ERRO ao gravar: {e.__class__.__name__}: {e}")
+                for _kind, _payload, fut in group:
+                    fut.set_exception(e)
+                return
+
+        first = self.last_seq + 1
+        self.last_seq = seq
+        for offset, (_kind, _payload, fut) in enumerate(group):
+            fut.set_result(first + offset)
+
+        if rotated:
+            # segmento novo: os antigos que o banco já projetou não servem mais
+            try:
+                self.prune(projected_seq())
+            except Exception as e:
+                print(f"[JOURNAL] ERRO ao apagar segmentos projetados: {e.__class__.__name__}: {e}")
+
+
+@lru_cache
+def get_trade_journal() -> Optional[TradeJournal]:
+    """Journal do engine deste processo, ou None se desligado."""
+    settings = get_settings()
+    if not settings.trade_journal_enabled:
+        return None
+    journal = TradeJournal(
+        Path(settings.trade_journal_dir),
+        settings.engine_name,
+        group_window_ms=settings.trade_journal_group_window_ms,
+        segment_bytes=settings.trade_journal_segment_bytes,
+    )
+    atexit.register(journal.close)
+    return journal
+
+
+# ---------------------------------------------------------------------
+# Projeção (roda no writer)
+# ---------------------------------------------------------------------
+def _cursor_key() -> str:
+    return get_settings().engine_name
+
+
+def project_fills(session: Session, *, seq: int, diffs: list[BotDiff]) -> int:
+    """
+    Aplica uma entrada do journal no banco (trades, bot_stats, bots) e avança
+    o cursor na mesma transação. Só aceita a entrada seguinte ao cursor
+    (JournalSequenceError caso contrário): uma projeção que falhou nunca é
+    pulada. Diffs de bots que mudaram desde a decisão (venda/remoção pela
+    API entre a decisão e a projeção) são descartados. Retorna quantos
+    diffs foram aplicados.
+    """
+    cursor = session.get(JournalCursor, _cursor_key())
+    projected = cursor.seq if cursor is not None else 0
+    if seq != projected + 1:
+        raise JournalSequenceError(
+            f"Entrada seq={seq} fora de ordem: banco projetado até seq={projected}."
+        )
+    stale = stale_diffs(session, diffs)
+    for diff in diffs:
+        if diff.bot_id in stale:
+            print(
+                f"[JOURNAL] Fill do bot id={diff.bot_id} (seq={seq}) descartado: "
+                "o bot mudou (ou foi removido) depois da decisão do engine."
+            )
+    applied = project_diffs(session, [d for d in diffs if d.bot_id not in stale])
+    if cursor is None:
+        cursor = JournalCursor(key=_cursor_key(), seq=seq)
+    else:
+        cursor.seq = seq
+        cursor.updated_at = datetime.utcnow()
+    session.add(cursor)
+    return applied
+
+
+def projected_seq() -> int:
+    with Session(engine) as session:
+        cursor = session.get(JournalCursor, _cursor_key())
+    return cursor.seq if cursor else 0
+
+
+def recover_journal() -> int:
+    """
+    Reprojeta, em ordem a partir do cursor, as entradas confirmadas no
+    journal que o banco ainda não tem (processo morto entre o fsync e o
+    commit, ou projeção que falhou). Levanta o erro da primeira entrada que
+    não pôde ser aplicada. Retorna quantas aplicou.
+    """
+    journal = get_trade_journal()
+    if journal is None:
+        return 0
+    after = projected_seq()
+    writer = get_db_writer()
+    pending = [
+        writer.submit(partial(project_fills, seq=seq, diffs=decode_fills(payload)))
+        for seq, _ts, kind, payload in journal.read(after)
+        if kind == JRN_FILLS
+    ]
+    for fut in pending:
+        fut.result()
+    applied = len(pending)
+    if applied:
+        print(
+            f"[JOURNAL] {applied} entrada(s) reprojetada(s) no banco "
+            f"(seq {after + 1}..{journal.last_seq})."
+        )
+    journal.prune(after + applied)
+    return applied
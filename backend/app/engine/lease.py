@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import socket
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, or_, update
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session
+
+from app.core.config import get_settings
+from app.core.versions import BOOT_ID
+from app.db.writer import get_db_writer, run_write
+from app.models.system import SystemState
+
+ENGINE_LEASE_KEY = "engine_lease"
+
+# Identifica este processo como dono do lease
+_OWNER = json.dumps(
+    {"owner": BOOT_ID, "pid": os.getpid(), "host": socket.gethostname()},
+    sort_keys=True,
+)
+
+
+def _acquire(session: Session) -> bool:
+    """Mutação do writer: renova o lease deste processo ou assume um vencido."""
+    ttl = timedelta(seconds=get_settings().engine_lease_seconds)
+    now = datetime.utcnow()
+    result = session.execute(
+        update(SystemState)
+        .where(
+            SystemState.key == ENGINE_LEASE_KEY,
+            or_(SystemState.value == _OWNER, SystemState.updated_at < now - ttl),
+        )
+        .values(value=_OWNER, updated_at=now)
+    )
+    if result.rowcount:
+        return True
+    if session.get(SystemState, ENGINE_LEASE_KEY) is not None:
+        return False
+    try:
+        with session.begin_nested():
+            session.add(SystemState(key=ENGINE_LEASE_KEY, value=_OWNER, updated_at=now))
+    except IntegrityError:
+        return False  # outro processo criou o lease ao mesmo tempo
+    return True
+
+
+def try_acquire_engine_lease() -> bool:
+    """
+    Garante que só UM processo rode os ciclos do engine (ex.: uvicorn com
+    vários workers e ENGINE_ENABLED ligado por engano, ou dois
+    `python -m app.engine`). O dono renova o lease a cada ciclo; se parar
+    de renovar por engine_lease_seconds, outro processo assume.
+    """
+    return run_write(_acquire)
+
+
+async def try_acquire_engine_lease_async() -> bool:
+    """try_acquire_engine_lease para o loop do engine: espera o writer sem bloquear o event loop."""
+    return await asyncio.wrap_future(get_db_writer().submit(_acquire))
+
+
+def release_engine_lease() -> None:
+    """Libera o lease no shutdown (outro engine assume sem esperar o TTL)."""
+    run_write(
+        lambda session: session.execute(
+            delete(SystemState).where(
+                SystemState.key == ENGINE_LEASE_KEY,
+                SystemState.value == _OWNER,
+            )
+        )
+    )
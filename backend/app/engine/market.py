@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from datetime import datetime
+from typing import Optional, Union
+
+from app.binance.async_client import get_async_binance_client
+from app.binance.client import get_klines, get_symbol_price
+from app.marketdata.recorder import REC_KLINES, REC_PRICE, get_market_recorder
+
+# Abaixo disso não vale abrir uma requisição: o orçamento do ciclo acabou
+MIN_CALL_SECONDS = 0.05
+
+
+class CycleBudgetExceeded(TimeoutError):
+    """O orçamento de tempo do ciclo acabou antes desta chamada à Binance."""
+
+
+class MarketData:
+    """
+    Fonte dos dados de mercado consumidos pelo engine em cada ciclo:
+    relógio, preço atual e candles para o sync de indicadores.
+
+    LiveMarketData usa a Binance (e grava tudo no recorder, se ligado, e
+    os preços no ring buffer de ticks); o replay (app.engine.replay) lê de
+    um log gravado.
+    """
+
+    recorder = None
+
+    def begin_cycle(self, budget_seconds: float, price_budget_seconds: Optional[float] = None) -> None:
+        pass
+
+    def now(self) -> datetime:
+        raise NotImplementedError
+
+    def get_price(self, symbol: str) -> float:
+        raise NotImplementedError
+
+    async def get_prices(self, symbols: list[str]) -> dict[str, Union[float, Exception]]:
+        """Preço de cada símbolo, ou a exceção que impediu obtê-lo."""
+        prices: dict[str, Union[float, Exception]] = {}
+        for symbol in symbols:
+            try:
+                prices[symbol] = self.get_price(symbol)
+            except Exception as e:
+                prices[symbol] = e
+        return prices
+
+    def get_klines(self, symbol: str, interval: str, limit: int) -> list[dict]:
+        raise NotImplementedError
+
+    def end_cycle(self) -> None:
+        pass
+
+
+class LiveMarketData(MarketData):
+    """
+    Dois orçamentos por ciclo: `budget_seconds` para o sync de indicadores
+    (klines, um símbolo por vez) e `price_budget_seconds`, só dos preços,
+    contado a partir de get_prices: klines lentos não comem o tempo dos
+    preços (sem preço o ciclo cai no preço "stale").
+    """
+
+    def __init__(self) -> None:
+        self._deadline: Optional[float] = None
+        self._price_budget: Optional[float] = None
+
+    @property
+    def recorder(self):
+        return get_market_recorder()
+
+    def _record_ticks(self, prices: dict[str, Union[float, Exception]]) -> None:
+        # import tardio: numpy só carrega no warm-up / primeiro ciclo
+        from app.marketdata.ticks import get_tick_store
+
+        ticks = get_tick_store()
+        if ticks is None:
+            return
+        ts = time.time()
+        for symbol, value in prices.items():
+            if not isinstance(value, Exception):
+                ticks.append(symbol, value, ts)
+
+    def begin_cycle(self, budget_seconds: float, price_budget_seconds: Optional[float] = None) -> None:
+        self._deadline = time.monotonic() + budget_seconds
+        self._price_budget = price_budget_seconds
+
+    def _remaining(self) -> Optional[float]:
+        """Tempo restante do orçamento; levanta se já acabou."""
+        if self._deadline is None:
+            return None
+        remaining = self._deadline - time.monotonic()
+        if remaining < MIN_CALL_SECONDS:
+            raise CycleBudgetExceeded("Orçamento de tempo do ciclo esgotado.")
+        return remaining
+
+    def now(self) -> datetime:
+        now = datetime.utcnow()
+        if self.recorder is not None:
+            self.recorder.cycle(now)
+        return now
+
+    def get_price(self, symbol: str) -> float:
+        recorder = self.recorder
+        try:
+            price = get_symbol_price(symbol, timeout=self._price_budget)
+        except Exception as e:
+            if recorder is not None:
+                recorder.error(REC_PRICE, symbol, e)
+            raise
+        if recorder is not None:
+            recorder.price(symbol, price)
+        self._record_ticks({symbol: price})
+        return price
+
+    async def get_prices(self, symbols: list[str]) -> dict[str, Union[float, Exception]]:
+        """
+        Busca os preços em paralelo pelo cliente async, esperando no máximo
+        o orçamento de preços; as requisições que não chegarem a tempo são
+        canceladas (a conexão é fechada, nada continua rodando depois do
+        ciclo) e viram CycleBudgetExceeded. Gravação no recorder na ordem
+        dos símbolos (o replay lê na mesma ordem).
+        """
+        client = get_async_binance_client()
+        budget = self._price_budget
+        tasks = {
+            symbol: asyncio.ensure_future(client.get_symbol_price(symbol, timeout=budget))
+            for symbol in symbols
+        }
+        prices: dict[str, Union[float, Exception]] = {}
+        if tasks:
+            _done, pending = await asyncio.wait(tasks.values(), timeout=budget)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        for symbol, task in tasks.items():
+            if task.cancelled():
+                prices[symbol] = CycleBudgetExceeded(
+                    f"Preço de {symbol} não chegou dentro do orçamento do ciclo."
+                )
+            elif task.exception() is not None:
+                prices[symbol] = task.exception()
+            else:
+                prices[symbol] = task.result()
+
+        recorder = self.recorder
+        if recorder is not None:
+            for symbol in symbols:
+                value = prices[symbol]
+                if isinstance(value, Exception):
+                    recorder.error(REC_PRICE, symbol, value)
+                else:
+                    recorder.price(symbol, value)
+        self._record_ticks(prices)
+        return prices
+
+    def get_klines(self, symbol: str, interval: str, limit: int) -> list[dict]:
+        recorder = self.recorder
+        try:
+            klines = get_klines(
+                symbol=symbol, interval=interval, limit=limit, timeout=self._remaining()
+            )
+        except Exception as e:
+            if recorder is not None:
+                recorder.error(REC_KLINES, symbol, e)
+            raise
+        if recorder is not None:
+            recorder.klines(symbol, interval, klines)
+        return klines
+
+    def end_cycle(self) -> None:
+        self._deadline = None
+        if self.recorder is not None:
+            self.recorder.flush()
@@ -0,0 +1,466 @@
+from __future__ import annotations
+
+import asyncio
+import time
+import uuid
+from datetime import datetime
+from functools import lru_cache, partial
+from typing import Optional
+
+import httpx
+from sqlmodel import Session, select
+
+from app.binance.async_client import BinanceAPIError, get_async_binance_client
+from app.binance.breaker import CircuitOpenError
+from app.binance.exchange_info import SymbolFilters, get_exchange_info_cache, normalize_order
+from app.binance.signer import MissingCredentialsError
+from app.core.config import get_settings
+from app.db.session import engine
+from app.db.writer import get_db_writer
+from app.engine.records import BotSnapshot
+from app.models.bot import Bot
+from app.models.order import ORDER_OPEN_STATUSES, BotOrder
+from app.models.trade import Trade
+from app.stats.service import record_trade
+
+# Envio de ordens reais (app_mode == "real").
+#
+# O engine decide dentro do writer (mesma lógica da simulação) e, em vez de
+# simular o fill, grava uma BotOrder "pending" com newClientOrderId próprio.
+# O OrderExecutor pega as pendentes, envia em paralelo pela Binance (async,
+# pool de conexões) e aplica o fill de volta em Trade/Bot pelo writer.
+#
+# Idempotência: o client_order_id é gravado antes do envio. Se o resultado
+# de um envio é incerto (timeout, 5xx, processo morto), a ordem é consultada
+# por origClientOrderId antes de qualquer reenvio.
+
+# Status finais da Binance; NEW/PARTIALLY_FILLED ainda podem mudar
+_STATUS_MAP = {
+    "FILLED": "filled",
+    "EXPIRED": "expired",
+    "EXPIRED_IN_MATCH": "expired",
+    "CANCELED": "expired",
+    "REJECTED": "rejected",
+}
+
+
+def _new_client_order_id(bot_id: int) -> str:
+    # Binance: ^[a-zA-Z0-9-_]{1,36}$
+    return f"bbot-{bot_id}-{uuid.uuid4().hex[:20]}"
+
+
+def has_open_order(session: Session, bot_id: int) -> bool:
+    return (
+        session.exec(
+            select(BotOrder.id).where(
+                BotOrder.bot_id == bot_id,
+                BotOrder.status.in_(ORDER_OPEN_STATUSES),
+            )
+        ).first()
+        is not None
+    )
+
+
+def request_buy(bot: BotSnapshot, session: Session, price: float) -> Optional[BotOrder]:
+    """COMPRA real: grava a intenção (MARKET, quoteOrderQty = valor_de_trade_usdt)."""
+    if bot.saldo_usdt_livre < bot.valor_de_trade_usdt:
+        print(
+            f"[ORDERS] Bot id={bot.id} sem saldo suficiente para comprar. "
+            f"saldo_livre={bot.saldo_usdt_livre}, trade={bot.valor_de_trade_usdt}"
+        )
+        return None
+    return _add_order(bot, session, "BUY", quote_order_qty=bot.valor_de_trade_usdt, price=price)
+
+
+def request_sell(
+    bot: BotSnapshot,
+    session: Session,
+    price: float,
+    reason: Optional[str] = None,
+) -> Optional[BotOrder]:
+    """VENDA real de toda a posição: grava a intenção (MARKET, quantity = qty_moeda)."""
+    if not bot.has_open_position or bot.qty_moeda <= 0:
+        print(f"[ORDERS] Bot id={bot.id} chamado para SELL mas sem posição aberta.")
+        return None
+    return _add_order(bot, session, "SELL", quantity=bot.qty_moeda, price=price, reason=reason)
+
+
+def _add_order(
+    bot: BotSnapshot,
+    session: Session,
+    side: str,
+    *,
+    price: float,
+    quantity: Optional[float] = None,
+    quote_order_qty: Optional[float] = None,
+    reason: Optional[str] = None,
+) -> BotOrder:
+    order = BotOrder(
+        bot_id=bot.id,
+        symbol=bot.symbol,
+        side=side,
+        reason=reason,
+        client_order_id=_new_client_order_id(bot.id),
+        quantity=quantity,
+        quote_order_qty=quote_order_qty,
+    )
+    session.add(order)
+    session.flush()
+    print(
+        f"[ORDERS] Bot id={bot.id} ordem {side} enfileirada "
+        f"(client_order_id={order.client_order_id}, price_ref={price}, reason={reason})."
+    )
+    return order
+
+
+# ---------------------------------------------------------------------
+# Reconciliação (roda no writer)
+# ---------------------------------------------------------------------
+def _fees(resp: dict) -> tuple[Optional[float], Optional[str]]:
+    totals: dict[str, float] = {}
+    for fill in resp.get("fills") or []:
+        asset = fill.get("commissionAsset")
+        if asset:
+            totals[asset] = totals.get(asset, 0.0) + float(fill.get("commission", 0.0))
+    if not totals:
+        return None, None
+    # Normalmente um único ativo; se vier mais de um, guarda o maior
+    asset = max(totals, key=totals.get)
+    return totals[asset], asset
+
+
+def mark_submitted(session: Session, order_id: int) -> None:
+    order = session.get(BotOrder, order_id)
+    if order is not None and order.status == "pending":
+        order.status = "submitted"
+        order.submitted_at = datetime.utcnow()
+        session.add(order)
+
+
+def mark_failed(session: Session, order_id: int, status: str, error: str, attempts: int) -> None:
+    order = session.get(BotOrder, order_id)
+    if order is None or order.status not in ORDER_OPEN_STATUSES:
+        return
+    order.status = status
+    order.error = error[:1000]
+    order.attempts = attempts
+    order.completed_at = datetime.utcnow()
+    session.add(order)
+
+
+def apply_order_result(
+    session: Session,
+    order_id: int,
+    resp: dict,
+    filters: SymbolFilters,
+    *,
+    attempts: int,
+    latency_ms: Optional[float],
+) -> Optional[int]:
+    """
+    Aplica a resposta da Binance: atualiza a BotOrder, registra o Trade real
+    e a posição/saldo do bot (mesmas regras de simulate_buy/simulate_sell,
+    mas com quantidade/valor executados e taxa real). Idempotente: ordem já
+    finalizada é ignorada. Retorna o id do Trade, se houve execução.
+    """
+    order = session.get(BotOrder, order_id)
+    if order is None or order.status not in ORDER_OPEN_STATUSES:
+        return None
+
+    order.attempts = attempts
+    order.exchange_order_id = resp.get("orderId")
+    if latency_ms is not None:
+        order.latency_ms = latency_ms
+    status = _STATUS_MAP.get(resp.get("status", ""))
+    if status is None:
+        # ainda em aberto na Binance: consultada de novo no próximo ciclo
+        session.add(order)
+        return None
+
+    executed = float(resp.get("executedQty", 0.0))
+    quote = float(resp.get("cummulativeQuoteQty", 0.0))
+    fee_amount, fee_asset = _fees(resp)
+
+    order.status = status
+    order.executed_qty = executed
+    order.cumm_quote_qty = quote
+    order.avg_price = quote / executed if executed > 0 else None
+    order.completed_at = datetime.utcnow()
+    session.add(order)
+
+    if executed <= 0:
+        print(f"[ORDERS] Ordem {order.client_order_id} sem execução (status={order.status}).")
+        return None
+
+    bot = session.get(Bot, order.bot_id)
+    price = quote / executed
+    realized_pnl: Optional[float] = None
+
+    if order.side == "BUY":
+        # taxa cobrada na moeda base reduz a quantidade recebida
+        qty_received = executed - (fee_amount or 0.0) if fee_asset == filters.base_asset else executed
+        bot.has_open_position = True
+        bot.qty_moeda += qty_received
+        bot.saldo_usdt_livre -= quote
+        bot.last_buy_price = price
+        bot.valor_inicial = price
+    else:
+        received = quote - (fee_amount or 0.0) if fee_asset == filters.quote_asset else quote
+        base_price = bot.last_buy_price or bot.valor_inicial or price
+        realized_pnl = quote - executed * base_price
+        bot.qty_moeda = max(0.0, bot.qty_moeda - executed)
+        # sobra menor que o lote mínimo não é vendável: posição encerrada
+        bot.has_open_position = bot.qty_moeda >= float(filters.min_qty) and bot.qty_moeda > 0
+        bot.saldo_usdt_livre += received
+        bot.last_sell_price = price
+        if not bot.has_open_position:
+            bot.valor_inicial = price
+        if order.reason == "stop_loss_triggered":
+            bot.blocked = True
+            bot.status = "offline"
+
+    trade = Trade(
+        bot_id=bot.id,
+        symbol=order.symbol,
+        side=order.side,
+        price=price,
+        qty=executed,
+        quote_qty=quote,
+        is_simulated=False,
+        fee_amount=fee_amount,
+        fee_asset=fee_asset,
+        realized_pnl=realized_pnl,
+        info=(
+            f"Binance order {order.client_order_id} ({order.status})"
+            + (f" ({order.reason})" if order.reason else "")
+        ),
+    )
+    session.add(bot)
+    record_trade(session, trade)
+    session.flush()
+    order.trade_id = trade.id
+    session.add(order)
+
+    print(
+        f"[ORDERS] Bot id={bot.id} {order.side} executada ({order.status}): "
+        f"qty={executed}, price={price}, valor={quote}, fee={fee_amount} {fee_asset}, "
+        f"latency_ms={order.latency_ms}"
+    )
+    return trade.id
+
+
+# ---------------------------------------------------------------------
+# Executor
+# ---------------------------------------------------------------------
+def _load_open_orders(statuses: tuple[str, ...]) -> list[BotOrder]:
+    with Session(engine) as session:
+        return session.exec(
+            select(BotOrder).where(BotOrder.status.in_(statuses)).order_by(BotOrder.id)
+        ).all()
+
+
+async def _write(fn) -> object:
+    return await asyncio.wrap_future(get_db_writer().submit(fn))
+
+
+class OrderExecutor:
+    """
+    Fila de ordens reais com N envios simultâneos (order_max_concurrency):
+    ordens disparadas no mesmo ciclo completam em ~1 ida e volta à Binance,
+    não em N. Vive no loop do engine.
+    """
+
+    def __init__(self) -> None:
+        self.settings = get_settings()
+        self.client = get_async_binance_client()
+        self._queue: Optional[asyncio.Queue[BotOrder]] = None
+        self._workers: list[asyncio.Task] = []
+        self._inflight: set[int] = set()
+
+    def _ensure_started(self) -> asyncio.Queue:
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+            self._workers = [
+                asyncio.create_task(self._worker())
+                for _ in range(max(1, self.settings.order_max_concurrency))
+            ]
+        return self._queue
+
+    async def stop(self) -> None:
+        for task in self._workers:
+            task.cancel()
+        self._workers = []
+        self._queue = None
+        await self.client.aclose()
+
+    async def enqueue_pending(self) -> int:
+        """
+        Enfileira as ordens em aberto gravadas pelo engine/API. As "submitted"
+        fora da fila (envio interrompido, processo reiniciado, ainda abertas
+        na Binance) são consultadas por origClientOrderId antes de reenviar.
+        """
+        orders = await asyncio.to_thread(_load_open_orders, ORDER_OPEN_STATUSES)
+
+        queue = self._ensure_started()
+        count = 0
+        for order in orders:
+            if order.id in self._inflight:
+                continue
+            self._inflight.add(order.id)
+            queue.put_nowait(order)
+            count += 1
+        return count
+
+    async def join(self) -> None:
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def _worker(self) -> None:
+        queue = self._queue
+        while True:
+            order = await queue.get()
+            try:
+                await self._execute(order)
+            except Exception as e:
+                print(
+                    f"[ORDERS] ERRO ao executar ordem {order.client_order_id}: "
+                    f"{e.__class__.__name__}: {e}"
+                )
+            finally:
+                self._inflight.discard(order.id)
+                queue.task_done()
+
+    async def _reference_price(self, symbol: str) -> Optional[float]:
+        """Último preço do símbolo: tick recente do engine ou, sem ele, o ticker."""
+        from app.marketdata.ticks import get_tick_store
+
+        ticks = get_tick_store()
+        last = ticks.last(symbol) if ticks is not None else None
+        if last is not None and time.time() - last[0] <= self.settings.engine_stale_price_max_age_seconds:
+            return last[1]
+        try:
+            return await self.client.get_symbol_price(
+                symbol, timeout=self.settings.engine_price_budget_seconds
+            )
+        except (httpx.HTTPError, CircuitOpenError) as e:
+            # sem preço a Binance confere o MIN_NOTIONAL no envio
+            print(f"[ORDERS] Preço de referência de {symbol} indisponível: {e}")
+            return None
+
+    async def _execute(self, order: BotOrder) -> None:
+        cache = get_exchange_info_cache()
+        try:
+            await asyncio.to_thread(cache.ensure_loaded)
+        except httpx.HTTPError as e:
+            print(f"[ORDERS] exchangeInfo indisponível; ordem {order.client_order_id} adiada: {e}")
+            return  # continua pending: volta no próximo ciclo
+        filters = cache.get(order.symbol)
+
+        reference_price = None
+        if order.quantity is not None and order.status == "pending":
+            # VENDA MARKET por quantidade: o MIN_NOTIONAL (venda de resto
+            # pequeno demais) é conferido com o último preço antes do primeiro
+            # envio; ordem já enviada nunca é recusada localmente por isso
+            reference_price = await self._reference_price(order.symbol)
+
+        try:
+            if filters is None:
+                raise ValueError(f"Símbolo {order.symbol} não encontrado no exchangeInfo.")
+            params = normalize_order(
+                filters,
+                order_type=order.type,
+                quantity=order.quantity,
+                quote_order_qty=order.quote_order_qty,
+                reference_price=reference_price,
+            )
+        except ValueError as e:
+            await _write(partial(mark_failed, order_id=order.id, status="rejected", error=str(e), attempts=0))
+            print(f"[ORDERS] Ordem {order.client_order_id} recusada localmente: {e}")
+            return
+
+        resumed = order.status == "submitted"
+        if not resumed:
+            await _write(partial(mark_submitted, order_id=order.id))
+
+        attempts = order.attempts
+        resp: Optional[dict] = None
+        latency_ms: Optional[float] = None
+        uncertain = resumed  # só reenvia depois de confirmar que a Binance não tem a ordem
+        last_error = ""
+
+        for attempt in range(self.settings.order_max_retries + 1):
+            if attempt:
+                await asyncio.sleep(min(2.0**attempt * 0.25, 5.0))
+            querying = uncertain
+            try:
+                if uncertain:
+                    resp = await self.client.query_order(
+                        symbol=order.symbol, client_order_id=order.client_order_id
+                    )
+                    uncertain = False
+                    if resp is not None:
+                        break
+
+                attempts += 1
+                started = time.perf_counter()
+                resp = await self.client.new_order(
+                    symbol=order.symbol,
+                    side=order.side,
+                    type_=order.type,
+                    client_order_id=order.client_order_id,
+                    quantity=params.quantity,
+                    quote_order_qty=params.quote_order_qty,
+                )
+                latency_ms = (time.perf_counter() - started) * 1000.0
+                break
+            except BinanceAPIError as e:
+                last_error = str(e)
+                if querying:
+                    # a consulta falhou, não a ordem: ela pode já ter executado.
+                    # continua "submitted" e é consultada de novo no próximo ciclo
+                    print(
+                        f"[ORDERS] Consulta da ordem {order.client_order_id} falhou; "
+                        f"nova tentativa no próximo ciclo: {e}"
+                    )
+                    return
+                if not e.outcome_unknown:
+                    await _write(
+                        partial(mark_failed, order_id=order.id, status="rejected", error=last_error, attempts=attempts)
+                    )
+                    print(f"[ORDERS] Ordem {order.client_order_id} recusada pela Binance: {e}")
+                    return
+                uncertain = True
+            except httpx.HTTPError as e:
+                # timeout/conexão: a ordem pode ter chegado; consulta antes de reenviar
+                last_error = f"{e.__class__.__name__}: {e}"
+                uncertain = True
+            except MissingCredentialsError as e:
+                await _write(
+                    partial(mark_failed, order_id=order.id, status="error", error=str(e), attempts=attempts)
+                )
+                print(f"[ORDERS] Ordem {order.client_order_id} não enviada: {e}")
+                return
+
+        if resp is None:
+            # continua "submitted": é consultada de novo no próximo ciclo
+            print(
+                f"[ORDERS] Ordem {order.client_order_id} sem confirmação após "
+                f"{attempts} envio(s): {last_error}"
+            )
+            return
+
+        await _write(
+            partial(
+                apply_order_result,
+                order_id=order.id,
+                resp=resp,
+                filters=filters,
+                attempts=attempts,
+                latency_ms=latency_ms,
+            )
+        )
+
+
+@lru_cache
+def get_order_executor() -> OrderExecutor:
+    return OrderExecutor()
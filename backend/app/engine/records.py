@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, Iterable, NamedTuple, Optional
+
+from sqlalchemy import bindparam, func, select
+from sqlmodel import Session
+
+from app.core.events import queue_event
+from app.core.versions import mark_changed
+from app.models.bot import Bot
+from app.models.indicator import Indicator
+from app.models.trade import Trade
+from app.stats.service import record_trade
+
+# Registros leves do caminho quente do engine.
+#
+# O ciclo não carrega Bot/Indicator do ORM (validação do pydantic,
+# instrumentação do SQLAlchemy, identity map): lê só as colunas usadas,
+# via select de Core, em NamedTuples imutáveis. As decisões devolvem um
+# BotDiff (coluna -> novo valor) e os diffs do ciclo são aplicados de uma
+# vez com um UPDATE executemany.
+
+
+class BotSnapshot(NamedTuple):
+    """Colunas do bot lidas pelas regras do engine."""
+
+    id: int
+    name: str
+    symbol: str
+    status: str
+    blocked: bool
+    saldo_usdt_livre: float
+    valor_de_trade_usdt: float
+    has_open_position: bool
+    qty_moeda: float
+    last_buy_price: Optional[float]
+    valor_inicial: Optional[float]
+    comprar_ao_iniciar: bool
+    compra_mercado: bool
+    venda_mercado: bool
+    porcentagem_compra: float
+    porcentagem_venda: float
+    stop_loss_percent: float
+    vender_stop_loss: bool
+
+
+class IndicatorSnapshot(NamedTuple):
+    """Último indicador do símbolo, só com o que as regras de compra/venda usam."""
+
+    symbol: str
+    close_time: datetime
+    close: float
+    market_signal_compra: Optional[bool]
+    market_signal_venda: Optional[bool]
+
+
+class BotDiff(NamedTuple):
+    """
+    Mudanças de um bot decididas no ciclo (coluna -> novo valor) e, se
+    houve fill simulado, os campos do Trade correspondente. `before` é o
+    snapshot sobre o qual a decisão foi tomada (projeção assíncrona: ver
+    stale_diffs).
+    """
+
+    bot_id: int
+    changes: dict[str, Any]
+    trade: Optional[dict[str, Any]] = None
+    before: Optional[dict[str, Any]] = None
+
+
+_BOT_COLUMNS = tuple(Bot.__table__.c[name] for name in BotSnapshot._fields)
+_INDICATOR_COLUMNS = tuple(Indicator.__table__.c[name] for name in IndicatorSnapshot._fields)
+
+
+def bot_snapshot(bot: Bot) -> BotSnapshot:
+    """Snapshot de um Bot já carregado pelo ORM (rotas da API)."""
+    return BotSnapshot._make(getattr(bot, name) for name in BotSnapshot._fields)
+
+
+def load_bot_snapshots(
+    session: Session,
+    *,
+    bot_ids: Optional[Iterable[int]] = None,
+    eligible_only: bool = False,
+) -> list[BotSnapshot]:
+    """Bots (ordenados por id); eligible_only = online e não bloqueados."""
+    table = Bot.__table__
+    stmt = select(*_BOT_COLUMNS).order_by(table.c.id)
+    if bot_ids is not None:
+        stmt = stmt.where(table.c.id.in_(list(bot_ids)))
+    if eligible_only:
+        stmt = stmt.where(table.c.status == "online", table.c.blocked == False)  # noqa: E712
+    return [BotSnapshot._make(row) for row in session.connection().execute(stmt)]
+
+
+def load_latest_indicators(
+    session: Session,
+    symbols: Iterable[str],
+    interval: str = "5m",
+) -> dict[str, IndicatorSnapshot]:
+    """Último indicador de cada símbolo numa única consulta."""
+    symbols = list(symbols)
+    if not symbols:
+        return {}
+    table = Indicator.__table__
+    latest = (
+        select(table.c.symbol, func.max(table.c.close_time).label("close_time"))
+        .where(table.c.interval == interval, table.c.symbol.in_(symbols))
+        .group_by(table.c.symbol)
+        .subquery()
+    )
+    stmt = (
+        select(*_INDICATOR_COLUMNS)
+        .join(
+            latest,
+            (table.c.symbol == latest.c.symbol) & (table.c.close_time == latest.c.close_time),
+        )
+        .where(table.c.interval == interval)
+        .order_by(table.c.id)
+    )
+    return {
+        row.symbol: IndicatorSnapshot._make(row)
+        for row in session.connection().execute(stmt)
+    }
+
+
+def bots_with_trades(session: Session, bot_ids: Iterable[int]) -> set[int]:
+    """Quais destes bots já têm algum trade (regra do comprar_ao_iniciar)."""
+    bot_ids = list(bot_ids)
+    if not bot_ids:
+        return set()
+    stmt = select(Trade.__table__.c.bot_id).where(Trade.__table__.c.bot_id.in_(bot_ids)).distinct()
+    return set(session.connection().execute(stmt).scalars())
+
+
+def stale_diffs(session: Session, diffs: list[BotDiff]) -> set[int]:
+    """
+    Bots cujo diff foi decidido sobre um estado que já não é o do banco
+    (`before` difere da linha atual, ou o bot não existe mais). Os diffs
+    guardam valores absolutos: aplicá-los por cima de uma mudança feita
+    nesse meio tempo a sobrescreveria (ou duplicaria o fill).
+    """
+    checked = [diff for diff in diffs if diff.before is not None]
+    if not checked:
+        return set()
+    current = {
+        bot.id: bot
+        for bot in load_bot_snapshots(session, bot_ids=[diff.bot_id for diff in checked])
+    }
+    stale = set()
+    for diff in checked:
+        bot = current.get(diff.bot_id)
+        if bot is None or any(getattr(bot, name) != value for name, value in diff.before.items()):
+            stale.add(diff.bot_id)
+    return stale
+
+
+def apply_bot_diffs(session: Session, diffs: list[BotDiff]) -> int:
+    """
+    Aplica os diffs com um UPDATE executemany por conjunto de colunas.
+    Como passa por fora do ORM, marca o recurso "bots" e enfileira os
+    eventos "bot" (mesmo formato dos deltas do ORM) à mão, e expira os
+    atributos de Bots já carregados nesta sessão.
+    """
+    if not diffs:
+        return 0
+    session.flush()  # trades/ordens pendentes vão antes do UPDATE
+
+    groups: dict[tuple[str, ...], list[dict[str, Any]]] = {}
+    for diff in diffs:
+        groups.setdefault(tuple(sorted(diff.changes)), []).append(
+            {"_bot_id": diff.bot_id, **diff.changes}
+        )
+
+    table = Bot.__table__
+    conn = session.connection()
+    for columns, params in groups.items():
+        stmt = (
+            table.update()
+            .where(table.c.id == bindparam("_bot_id"))
+            .values({name: bindparam(name) for name in columns})
+        )
+        conn.execute(stmt, params)
+
+    mark_changed(session, "bots")
+    for diff in diffs:
+        queue_event(session, "bot", {"id": diff.bot_id, **diff.changes})
+        loaded = session.identity_map.get(session.identity_key(Bot, diff.bot_id))
+        if loaded is not None:
+            session.expire(loaded, list(diff.changes))
+    return len(diffs)
+
+
+def project_diffs(session: Session, diffs: list[BotDiff]) -> int:
+    """Registra os trades dos diffs (trade + bot_stats/rollups) e aplica os bots."""
+    for diff in diffs:
+        if diff.trade is not None:
+            record_trade(session, Trade(**diff.trade))
+    return apply_bot_diffs(session, diffs)
@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import io
+import os
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+# Os módulos do app (settings, engines do SQLAlchemy) são importados só dentro
+# de replay(): o CLI precisa apontar DATABASE_URL para o banco de rascunho antes.
+
+
+class ReplayDivergence(Exception):
+    """O engine pediu um dado diferente do que está gravado no log."""
+
+
+class ReplayMarketData:
+    """
+    Fonte de dados de mercado lida de um log do recorder: devolve, na mesma
+    ordem, o relógio, os preços e os candles que o engine recebeu ao vivo.
+    """
+
+    recorder = None
+
+    def __init__(self, records: Iterator[tuple[int, datetime, Any]]) -> None:
+        from app.marketdata import recorder as rec
+
+        self._rec = rec
+        self._records = records
+        self._peeked: Optional[tuple[int, datetime, Any]] = None
+        self.divergence: Optional[str] = None
+
+    def _peek(self):
+        if self._peeked is None:
+            self._peeked = next(self._records, None)
+        return self._peeked
+
+    def _next(self, kinds: tuple[int, ...], what: str):
+        record = self._peek()
+        self._peeked = None
+        if record is None or record[0] not in kinds:
+            self.divergence = f"esperava {what}, log tem {record[0] if record else 'EOF'}"
+            raise ReplayDivergence(self.divergence)
+        return record
+
+    def next_is_cycle(self) -> bool:
+        # snapshots extras (não deveria haver) são ignorados
+        while (record := self._peek()) is not None and record[0] == self._rec.REC_SNAPSHOT:
+            self._peeked = None
+        return record is not None and record[0] == self._rec.REC_CYCLE
+
+    def begin_cycle(self, budget_seconds: float, price_budget_seconds: Optional[float] = None) -> None:
+        pass  # chamadas estouradas no ciclo gravado aparecem como ERROR no log
+
+    def now(self) -> datetime:
+        return self._next((self._rec.REC_CYCLE,), "CYCLE")[1]
+
+    def _check_symbol(self, expected: str, got: str) -> None:
+        if expected != got:
+            self.divergence = f"símbolo divergente: engine pediu {expected}, log tem {got}"
+            raise ReplayDivergence(self.divergence)
+
+    def get_price(self, symbol: str) -> float:
+        kind, _ts, value = self._next((self._rec.REC_PRICE, self._rec.REC_ERROR), f"PRICE {symbol}")
+        if kind == self._rec.REC_ERROR:
+            _source, err_symbol, error_type, message = value
+            self._check_symbol(symbol, err_symbol)
+            raise RuntimeError(f"[replay] {error_type}: {message}")
+        err_symbol, price = value
+        self._check_symbol(symbol, err_symbol)
+        return price
+
+    async def get_prices(self, symbols: list[str]) -> dict[str, Any]:
+        # mesma ordem em que LiveMarketData grava (um registro por símbolo)
+        prices: dict[str, Any] = {}
+        for symbol in symbols:
+            try:
+                prices[symbol] = self.get_price(symbol)
+            except ReplayDivergence:
+                raise
+            except Exception as e:
+                prices[symbol] = e
+        return prices
+
+    def get_klines(self, symbol: str, interval: str, limit: int) -> list[dict]:
+        kind, _ts, value = self._next((self._rec.REC_KLINES, self._rec.REC_ERROR), f"KLINES {symbol}")
+        if kind == self._rec.REC_ERROR:
+            _source, err_symbol, error_type, message = value
+            self._check_symbol(symbol, err_symbol)
+            raise RuntimeError(f"[replay] {error_type}: {message}")
+        rec_symbol, _interval, klines = value
+        self._check_symbol(symbol, rec_symbol)
+        return klines
+
+    def end_cycle(self) -> None:
+        pass
+
+
+def replay(log_path: Path, *, verbose: bool = False) -> dict:
+    """
+    Reexecuta o log pelo run_engine_cycle contra o banco configurado em
+    DATABASE_URL (deve ser um banco vazio/de rascunho, assim como o
+    TRADE_JOURNAL_DIR), sem esperar entre ciclos. Retorna um resumo com
+    os trades gerados.
+    """
+    from sqlmodel import Session, select
+
+    from app.core.state import set_system_running
+    from app.db.base import init_db
+    from app.db.session import engine
+    from app.db.writer import get_db_writer, run_write
+    from app.engine import runner
+    from app.engine.snapshot import (
+        SNAPSHOT_TRADE_SIDE,
+        restore_snapshot,
+        snapshot_last_prices,
+        snapshot_last_sync,
+    )
+    from app.marketdata.recorder import REC_SNAPSHOT, iter_records
+    from app.models.trade import Trade
+
+    records = iter_records(log_path)
+    first = next(records, None)
+    if first is None or first[0] != REC_SNAPSHOT:
+        raise ValueError("Log sem snapshot inicial (não é possível reproduzir).")
+    state = first[2]
+
+    init_db()
+    writer = get_db_writer()
+    writer.start()
+    try:
+        run_write(lambda session: restore_snapshot(session, state))
+        runner._last_indicator_sync_by_symbol.clear()
+        runner._last_indicator_sync_by_symbol.update(snapshot_last_sync(state))
+        runner._last_price_by_symbol.clear()
+        runner._last_price_by_symbol.update(snapshot_last_prices(state))
+        set_system_running(True)
+
+        market = ReplayMarketData(records)
+        cycles = 0
+        started = time.perf_counter()
+
+        async def _loop() -> None:
+            nonlocal cycles
+            while market.next_is_cycle():
+                await runner.run_engine_cycle(market)
+                cycles += 1
+                if market.divergence:
+                    raise ReplayDivergence(market.divergence)
+            await runner.wait_projection()
+
+        out = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+        with out:
+            asyncio.run(_loop())
+        elapsed = time.perf_counter() - started
+    finally:
+        writer.stop()
+
+    with Session(engine) as session:
+        trades = session.exec(
+            select(Trade).where(Trade.side != SNAPSHOT_TRADE_SIDE).order_by(Trade.id)
+        ).all()
+
+    return {
+        "cycles": cycles,
+        "elapsed_seconds": elapsed,
+        "cycles_per_second": cycles / elapsed if elapsed > 0 else None,
+        "trades": [
+            {
+                "bot_id": t.bot_id,
+                "symbol": t.symbol,
+                "side": t.side,
+                "price": t.price,
+                "qty": t.qty,
+                "realized_pnl": t.realized_pnl,
+                "info": t.info,
+            }
+            for t in trades
+        ],
+    }
+
+
+if __name__ == "__main__":
+    # python -m app.engine.replay data/recordings/engine-XXXX.bblog [--db sqlite:///...] [--verbose]
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(prog="python -m app.engine.replay")
+    parser.add_argument("log")
+    parser.add_argument("--db", help="DATABASE_URL de rascunho (padrão: SQLite temporário)")
+    parser.add_argument("--verbose", action="store_true", help="mostra os logs do engine")
+    parser.add_argument("--trades", action="store_true", help="imprime os trades (JSONL)")
+    args = parser.parse_args()
+
+    if args.db:
+        db_url = args.db
+    else:
+        scratch = Path(tempfile.mkdtemp(prefix="bbot-replay-")) / "replay.db"
+        db_url = f"sqlite:///{scratch}"
+    os.environ["DATABASE_URL"] = db_url
+    # journal de trades do replay fica fora do journal do engine de verdade
+    os.environ["TRADE_JOURNAL_DIR"] = tempfile.mkdtemp(prefix="bbot-replay-journal-")
+
+    result = replay(Path(args.log), verbose=args.verbose)
+    print(
+        f"[REPLAY] {result['cycles']} ciclo(s) em {result['elapsed_seconds']:.3f}s "
+        f"({result['cycles_per_second'] or 0:.0f} ciclos/s), "
+        f"{len(result['trades'])} trade(s). Banco: {db_url}"
+    )
+    if args.trades:
+        for trade in result["trades"]:
+            print(json.dumps(trade))
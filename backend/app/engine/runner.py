@@ -1,19 +1,42 @@
 from __future__ import annotations
 
 import asyncio
+from concurrent.futures import Future
+from contextlib import nullcontext
 from datetime import datetime
+from functools import partial
+from typing import Optional
 
-import httpx
-from sqlmodel import Session, select
+from sqlmodel import Session
 
 from app.core.config import get_settings
-from app.core.state import get_system_running
+from app.core.events import discard_after, pending_count
+from app.core.startup import ensure_warm
+from app.core.state import is_engine_running
 from app.db.session import engine
-from app.models.bot import Bot
-from app.models.trade import Trade
-from app.models.indicator import Indicator
-from app.binance.client import get_symbol_price
-from app.indicators.service import sync_indicators_for_symbol
+from app.db.writer import get_db_writer
+from app.engine.journal import (
+    JRN_FILLS,
+    TradeJournal,
+    encode_fills,
+    get_trade_journal,
+    project_fills,
+    recover_journal,
+)
+from app.engine.lease import try_acquire_engine_lease_async
+from app.engine.market import LiveMarketData, MarketData
+from app.engine.orders import get_order_executor, has_open_order, request_buy, request_sell
+from app.engine.records import (
+    BotDiff,
+    BotSnapshot,
+    IndicatorSnapshot,
+    bots_with_trades,
+    load_bot_snapshots,
+    load_latest_indicators,
+    project_diffs,
+)
+from app.engine.snapshot import engine_snapshot
+from app.indicators.service import store_indicators
 
 
 ENGINE_INTERVAL_SECONDS = 5  # tempo entre ciclos do engine (pode ajustar depois)
@@ -22,21 +45,44 @@ INDICATOR_SYNC_MIN_INTERVAL_SECONDS = 60  # mínimo de 60s entre syncs por símb
 # memória local do processo: última vez que sincronizamos indicadores por símbolo
 _last_indicator_sync_by_symbol: dict[str, datetime] = {}
 
+# último preço obtido por símbolo (preço, horário do ciclo), usado quando a
+# Binance falha: só o stop-loss é avaliado com ele
+_last_price_by_symbol: dict[str, tuple[float, datetime]] = {}
 
-def get_latest_indicator_for_symbol(
-    session: Session,
-    symbol: str,
-    interval: str = "5m",
-) -> Indicator | None:
+# projeção no banco do último ciclo gravado no journal (ainda em andamento)
+_pending_projection: Optional[Future] = None
+# o banco pode estar atrás do journal (projeção falhou, ou lease recém
+# assumido): nenhum bot é decidido até reprojetar a partir do cursor
+_needs_recovery = False
+
+# dados de mercado ao vivo (Binance); o replay passa outra fonte ao ciclo
+_live_market = LiveMarketData()
+
+
+def warm_engine_caches() -> dict:
     """
-    Busca o último indicador salvo para o símbolo/intervalo.
-    Pode retornar None (sem dados ainda).
+    Warm-up do startup: faz as leituras do primeiro ciclo (estado do
+    sistema, bots online, último indicador de cada símbolo) para abrir as
+    conexões do pool e aquecer os caches, e abre os ring buffers de ticks
+    (numpy fica fora do import do boot). Não altera o estado do engine.
     """
-    return session.exec(
-        select(Indicator)
-        .where(Indicator.symbol == symbol, Indicator.interval == interval)
-        .order_by(Indicator.close_time.desc())
-    ).first()
+    from app.marketdata.ticks import get_tick_store
+
+    running = is_engine_running()
+    with Session(engine) as session:
+        bots = load_bot_snapshots(session, eligible_only=True)
+        symbols = sorted({bot.symbol for bot in bots})
+        indicators = load_latest_indicators(session, symbols)
+    ticks = get_tick_store()
+    if ticks is not None:
+        for symbol in symbols:
+            ticks.open(symbol)
+    return {
+        "engine_running": running,
+        "bots_online": len(bots),
+        "symbols": len(symbols),
+        "symbols_with_indicator": len(indicators),
+    }
 
 
 async def bot_engine_loop() -> None:
@@ -49,38 +95,80 @@ async def bot_engine_loop() -> None:
         f"[ENGINE] Iniciando loop do engine (modo={settings.app_mode}, "
         f"intervalo={ENGINE_INTERVAL_SECONDS}s)"
     )
+    # o primeiro ciclo só começa com pool HTTP, exchangeInfo e caches quentes
+    await ensure_warm()
 
+    global _needs_recovery
+    leader: bool | None = None
     while True:
         try:
-            await run_engine_cycle()
+            # Só um processo roda os ciclos (lease renovado a cada ciclo)
+            is_leader = await try_acquire_engine_lease_async()
+            if is_leader != leader:
+                leader = is_leader
+                print(
+                    "[ENGINE] Lease do engine adquirido; executando ciclos."
+                    if leader
+                    else "[ENGINE] Outro processo está executando o engine; aguardando lease."
+                )
+                if leader:
+                    # fills confirmados no journal que o banco ainda não tem
+                    # (crash): reprojetados antes do primeiro ciclo
+                    _needs_recovery = True
+            if leader:
+                await run_engine_cycle()
+                if settings.app_mode == "real":
+                    # ordens gravadas neste ciclo (ou pela API) vão para a Binance
+                    await get_order_executor().enqueue_pending()
         except Exception as e:
             print(f"[ENGINE] ERRO no ciclo: {e.__class__.__name__}: {e}")
         await asyncio.sleep(ENGINE_INTERVAL_SECONDS)
 
 
-async def run_engine_cycle() -> None:
+async def run_engine_cycle(market: Optional[MarketData] = None) -> None:
     """
     Um ciclo do engine:
-    - Se o sistema estiver desligado, não faz nada.
+    - Se o sistema estiver desligado (ou este engine pausado), não faz nada.
     - Se ligado, busca bots online e não bloqueados e aplica a lógica.
     - Antes de processar bots, sincroniza indicadores 5m para cada símbolo,
       respeitando um intervalo mínimo entre syncs.
+
+    `market` fornece relógio, preços e candles (padrão: Binance ao vivo).
     """
-    if not get_system_running():
+    # o ciclo anterior precisa estar projetado no banco antes de ler os bots
+    if not await wait_projection():
         return
+    if not is_engine_running():
+        return
+
+    market = market or _live_market
+    # limita o tempo de rede do ciclo: Binance lenta não segura todos os bots.
+    # Preços têm orçamento próprio: klines lentos não os deixam sem tempo.
+    settings = get_settings()
+    market.begin_cycle(
+        settings.engine_cycle_budget_seconds, settings.engine_price_budget_seconds
+    )
+    try:
+        await _run_cycle(market)
+    finally:
+        market.end_cycle()
+
 
+async def _run_cycle(market: MarketData) -> None:
     settings = get_settings()
-    now_dt = datetime.utcnow()
-    now = now_dt.isoformat(timespec="seconds")
-    print(f"[ENGINE] Ciclo iniciado em {now} (UTC)")
 
     with Session(engine) as session:
-        bots = session.exec(
-            select(Bot).where(
-                Bot.status == "online",
-                Bot.blocked == False,  # noqa: E712
+        recorder = market.recorder
+        if recorder is not None and not recorder.has_snapshot:
+            recorder.snapshot(
+                engine_snapshot(session, _last_indicator_sync_by_symbol, _last_price_by_symbol)
             )
-        ).all()
+
+        now_dt = market.now()
+        now = now_dt.isoformat(timespec="seconds")
+        print(f"[ENGINE] Ciclo iniciado em {now} (UTC)")
+
+        bots = load_bot_snapshots(session, eligible_only=True)
 
         if not bots:
             print("[ENGINE] Nenhum bot elegível (online e não bloqueado).")
@@ -100,11 +188,9 @@ async def run_engine_cycle() -> None:
                 continue
 
             try:
-                inserted = sync_indicators_for_symbol(
-                    symbol=symbol,
-                    interval="5m",
-                    limit=200,
-                )
+                # chamadas bloqueantes (HTTP + writer) fora do event loop
+                klines = await asyncio.to_thread(market.get_klines, symbol, "5m", 200)
+                inserted = await asyncio.to_thread(store_indicators, symbol, "5m", klines)
                 _last_indicator_sync_by_symbol[symbol] = now_dt
                 print(
                     f"[ENGINE] Indicadores sincronizados para {symbol}: "
@@ -118,23 +204,36 @@ async def run_engine_cycle() -> None:
 
         print(f"[ENGINE] Encontrados {len(bots)} bot(s) elegível(is) para este ciclo:")
 
+        # um preço por símbolo, buscados em paralelo dentro do orçamento de preços
+        prices = await market.get_prices(symbols)
+        for symbol, value in prices.items():
+            if not isinstance(value, Exception):
+                _last_price_by_symbol[symbol] = (value, now_dt)
+        stale_max_age = settings.engine_stale_price_max_age_seconds
+
+        # último indicador de cada símbolo (já sincronizado), numa consulta
+        indicators = load_latest_indicators(session, symbols)
+
+        inputs: list[tuple[int, float, IndicatorSnapshot | None, bool]] = []
         for bot in bots:
-            try:
-                price = get_symbol_price(bot.symbol)
-            except httpx.HTTPError as e:
-                print(
-                    f"[ENGINE] Erro HTTP ao obter preço de {bot.symbol} "
-                    f"para bot id={bot.id}: {e}"
-                )
-                continue
-            except Exception as e:
+            price = prices[bot.symbol]
+            stale_price = False
+            if isinstance(price, Exception):
+                last = _last_price_by_symbol.get(bot.symbol)
+                age = (now_dt - last[1]).total_seconds() if last else None
+                if last is None or age > stale_max_age:
+                    print(
+                        f"[ENGINE] Erro ao obter preço de {bot.symbol} para bot "
+                        f"id={bot.id}: {price.__class__.__name__}: {price}"
+                    )
+                    continue
+                price, stale_price = last[0], True
                 print(
-                    f"[ENGINE] Erro inesperado ao obter preço de {bot.symbol} "
-                    f"para bot id={bot.id}: {e}"
+                    f"[ENGINE] Preço de {bot.symbol} indisponível; usando último "
+                    f"preço ({price}, {age:.0f}s atrás) só para stop-loss do bot id={bot.id}."
                 )
-                continue
 
-            indicator = get_latest_indicator_for_symbol(session, bot.symbol)
+            indicator = indicators.get(bot.symbol)
 
             print(
                 f"  - Bot id={bot.id} name={bot.name} symbol={bot.symbol} "
@@ -143,34 +242,192 @@ async def run_engine_cycle() -> None:
                 f"indicator_ok={indicator is not None}"
             )
 
-            process_bot_cycle(bot, session, settings, price, indicator)
+            inputs.append((bot.id, price, indicator, stale_price))
 
+        journal = get_trade_journal() if settings.app_mode != "real" else None
+        if inputs and journal is not None:
+            # simulação: decide aqui, sem escrever no banco
+            diffs = _decide_cycle(session, inputs, settings, now=now_dt, writes=False)
 
-def process_bot_cycle(
-    bot: Bot,
+    if not inputs:
+        return
+
+    if journal is not None:
+        if diffs:
+            await _journal_fills(journal, diffs)
+        return
+
+    # Modo real (ordens) ou journal desligado: as decisões de todos os bots
+    # vão para o writer único num só job; os diffs do ciclo viram um UPDATE
+    # em lote, commitado junto (group commit).
+    try:
+        await asyncio.wrap_future(
+            get_db_writer().submit(
+                partial(_process_cycle_in_writer, inputs=inputs, settings=settings, now=now_dt)
+            )
+        )
+    except Exception as e:
+        print(f"[ENGINE] ERRO ao aplicar o ciclo: {e.__class__.__name__}: {e}")
+
+
+async def _journal_fills(journal: TradeJournal, diffs: list[BotDiff]) -> None:
+    """
+    Grava os fills do ciclo no journal (confirmados após o fsync em grupo)
+    e enfileira a projeção no banco sem esperar o commit.
+    """
+    global _pending_projection
+    try:
+        seq = await asyncio.wrap_future(journal.append(JRN_FILLS, encode_fills(diffs)))
+    except Exception as e:
+        # não confirmado: nada deste ciclo aconteceu
+        print(f"[ENGINE] ERRO ao gravar o journal do ciclo: {e.__class__.__name__}: {e}")
+        return
+    _pending_projection = get_db_writer().submit(
+        partial(project_fills, seq=seq, diffs=diffs)
+    )
+
+
+async def wait_projection() -> bool:
+    """
+    Espera o banco aplicar o último ciclo gravado no journal. Se a projeção
+    falhou, reprojeta o journal a partir do cursor; enquanto isso não der
+    certo devolve False e o ciclo não decide nada (decidir sobre o banco
+    atrasado repetiria fills já confirmados no journal).
+    """
+    global _pending_projection, _needs_recovery
+    fut, _pending_projection = _pending_projection, None
+    if fut is not None:
+        try:
+            await asyncio.wrap_future(fut)
+        except Exception as e:
+            print(f"[ENGINE] ERRO ao projetar o journal no banco: {e.__class__.__name__}: {e}")
+            _needs_recovery = True
+
+    if _needs_recovery:
+        try:
+            await asyncio.to_thread(recover_journal)
+        except Exception as e:
+            print(
+                "[ENGINE] Reprojeção do journal falhou; ciclo suspenso até o banco "
+                f"alcançar o journal: {e.__class__.__name__}: {e}"
+            )
+            return False
+        _needs_recovery = False
+    return True
+
+
+def _decide_cycle(
+    session: Session,
+    inputs: list[tuple[int, float, IndicatorSnapshot | None, bool]],
+    settings,
+    *,
+    now: datetime,
+    writes: bool,
+) -> list[BotDiff]:
+    """
+    Relê os bots do ciclo (podem ter sido parados/bloqueados via API nesse
+    meio tempo) e decide cada um. Com `writes` (sessão do writer: ordens
+    reais) cada bot roda num SAVEPOINT próprio; sem, as regras não recebem
+    sessão e tudo sai nos diffs.
+    """
+    bot_ids = [bot_id for bot_id, _price, _indicator, _stale in inputs]
+    bots = {bot.id: bot for bot in load_bot_snapshots(session, bot_ids=bot_ids)}
+    with_trades = bots_with_trades(session, bot_ids)
+
+    diffs: list[BotDiff] = []
+    for bot_id, price, indicator, stale_price in inputs:
+        bot = bots.get(bot_id)
+        if bot is None or bot.status != "online" or bot.blocked:
+            continue
+        if settings.app_mode == "real" and has_open_order(session, bot_id):
+            # decisão anterior ainda na Binance: espera o fill ser reconciliado
+            continue
+        events_before = pending_count(session)
+        try:
+            with session.begin_nested() if writes else nullcontext():
+                diff = process_bot_cycle(
+                    bot,
+                    session if writes else None,
+                    settings,
+                    price,
+                    indicator,
+                    bot_id in with_trades,
+                    stale_price,
+                    now=now,
+                )
+        except Exception as e:
+            discard_after(session, events_before)
+            print(
+                f"[ENGINE] ERRO ao processar bot id={bot_id}: "
+                f"{e.__class__.__name__}: {e}"
+            )
+            continue
+        if diff is not None:
+            if not writes:
+                # projeção assíncrona: guarda o estado em que a decisão se baseou
+                diff = diff._replace(before=bot._asdict())
+            diffs.append(diff)
+    return diffs
+
+
+def _process_cycle_in_writer(
     session: Session,
+    *,
+    inputs: list[tuple[int, float, IndicatorSnapshot | None, bool]],
+    settings,
+    now: datetime,
+) -> int:
+    """
+    Mutação executada pelo writer: decide os bots na sessão de escrita
+    (SAVEPOINT por bot: erro num bot não derruba os outros) e projeta os
+    diffs de uma vez. Retorna quantos bots mudaram.
+    """
+    diffs = _decide_cycle(session, inputs, settings, now=now, writes=True)
+    return project_diffs(session, diffs)
+
+
+def process_bot_cycle(
+    bot: BotSnapshot,
+    session: Session | None,
     settings,
     price: float,
-    indicator: Indicator | None,
-) -> None:
+    indicator: IndicatorSnapshot | None,
+    has_trades: bool,
+    stale_price: bool = False,
+    *,
+    now: datetime,
+) -> BotDiff | None:
     """
     Decide o que fazer com o bot neste ciclo:
     - Se tem posição aberta → checa stop-loss e take profit.
     - Se NÃO tem posição aberta → aplica comprar_ao_iniciar / porcentagem_compra.
+
+    Com stale_price (último preço conhecido, Binance indisponível) só o
+    stop-loss é avaliado: compras e take profit esperam um preço atual.
+
+    O bot não é alterado: as mudanças voltam como BotDiff (None = nada muda).
+    `now` é o relógio do ciclo (market.now()): data dos trades simulados,
+    igual no replay.
+    `session` só é usada no modo real (gravação da ordem); na simulação o
+    fill inteiro (trade incluído) sai no diff.
     """
     if bot.has_open_position:
-        handle_position(bot, session, settings, price, indicator)
-    else:
-        handle_no_position(bot, session, settings, price, indicator)
+        return handle_position(bot, session, settings, price, indicator, stale_price, now=now)
+    if not stale_price:
+        return handle_no_position(bot, session, settings, price, indicator, has_trades, now=now)
+    return None
 
 
 def handle_no_position(
-    bot: Bot,
-    session: Session,
+    bot: BotSnapshot,
+    session: Session | None,
     settings,
     price: float,
-    indicator: Indicator | None,
-) -> None:
+    indicator: IndicatorSnapshot | None,
+    has_trades: bool,
+    *,
+    now: datetime,
+) -> BotDiff | None:
     """
     Sem posição aberta:
     - Se nunca fez trade e comprar_ao_iniciar = True → compra inicial
@@ -178,11 +435,6 @@ def handle_no_position(
     - Caso contrário, se porcentagem_compra > 0 → compra quando cair X% abaixo
       do valor_inicial (opcionalmente respeitando compra_mercado + market_signal_compra).
     """
-    has_trades = (
-        session.exec(select(Trade.id).where(Trade.bot_id == bot.id)).first()
-        is not None
-    )
-
     # 1) Primeira entrada: comprar_ao_iniciar
     if (not has_trades) and bot.comprar_ao_iniciar:
         if bot.compra_mercado:
@@ -192,29 +444,24 @@ def handle_no_position(
                     "mas market_signal_compra não é True ou não há indicador. "
                     "Ignorando compra inicial."
                 )
-                return
+                return None
 
         print(
             f"[ENGINE] Bot id={bot.id} sem trades anteriores e "
             f"comprar_ao_iniciar=True → executando COMPRA inicial."
         )
-        simulate_buy(bot, session, settings, price)
-        return
+        return execute_buy(bot, session, settings, price, now=now)
 
     # 2) Reentradas / entradas via porcentagem_compra
     perc_compra = bot.porcentagem_compra or 0.0
     if perc_compra > 0:
         # Se ainda não temos valor_inicial, definimos agora e esperamos queda
         if bot.valor_inicial is None:
-            bot.valor_inicial = price
-            session.add(bot)
-            session.commit()
-            session.refresh(bot)
             print(
                 f"[ENGINE] Bot id={bot.id} definindo valor_inicial={price} "
                 f"para regras de porcentagem_compra."
             )
-            return
+            return BotDiff(bot.id, {"valor_inicial": price})
 
         var_pct = (price - bot.valor_inicial) / bot.valor_inicial * 100.0
 
@@ -226,15 +473,14 @@ def handle_no_position(
                         "atingida, mas market_signal_compra não é True ou não há "
                         "indicador. Compra ignorada."
                     )
-                    return
+                    return None
 
             print(
                 f"[ENGINE] Bot id={bot.id} COMPRA por porcentagem_compra! "
                 f"valor_inicial={bot.valor_inicial} price_atual={price} "
                 f"var_pct={var_pct:.4f}% threshold={-perc_compra}%"
             )
-            simulate_buy(bot, session, settings, price)
-            return
+            return execute_buy(bot, session, settings, price, now=now)
 
     print(
         f"[ENGINE] Bot id={bot.id} sem posição aberta; "
@@ -243,15 +489,19 @@ def handle_no_position(
         f"compra_mercado={bot.compra_mercado}. "
         "Nenhuma regra de compra acionada neste ciclo."
     )
+    return None
 
 
 def handle_position(
-    bot: Bot,
-    session: Session,
+    bot: BotSnapshot,
+    session: Session | None,
     settings,
     price: float,
-    indicator: Indicator | None,
-) -> None:
+    indicator: IndicatorSnapshot | None,
+    stale_price: bool = False,
+    *,
+    now: datetime,
+) -> BotDiff | None:
     """
     Com posição aberta:
     - Checa STOP LOSS (independente de indicador).
@@ -273,19 +523,22 @@ def handle_position(
             )
 
             if bot.vender_stop_loss:
-                simulate_sell(
+                return execute_sell(
                     bot,
                     session,
                     settings,
                     price,
                     reason="stop_loss_triggered",
+                    now=now,
                 )
-            else:
-                print(
-                    f"[ENGINE] Bot id={bot.id} com stop_loss disparado, "
-                    "mas vender_stop_loss = False; mantendo posição aberta."
-                )
-            return
+            print(
+                f"[ENGINE] Bot id={bot.id} com stop_loss disparado, "
+                "mas vender_stop_loss = False; mantendo posição aberta."
+            )
+            return None
+
+    if stale_price:
+        return None  # take profit só com preço atual
 
     # 2) TAKE PROFIT (porcentagem_venda)
     take_profit = bot.porcentagem_venda or 0.0
@@ -301,100 +554,144 @@ def handle_position(
                         "mas market_signal_venda não é True ou não há indicador. "
                         "Venda ignorada."
                     )
-                    return
+                    return None
 
             print(
                 f"[ENGINE] Bot id={bot.id} TAKE PROFIT disparado! "
                 f"base_price={base_price} price_atual={price} "
                 f"var_pct={var_pct_tp:.4f}% threshold={take_profit}%"
             )
-            simulate_sell(
+            return execute_sell(
                 bot,
                 session,
                 settings,
                 price,
                 reason="take_profit",
+                now=now,
             )
-            return
 
     print(
         f"[ENGINE] Bot id={bot.id} com posição aberta; "
         "nenhuma regra de venda acionada neste ciclo."
     )
+    return None
 
 
-def simulate_buy(bot: Bot, session: Session, settings, price: float) -> None:
+def execute_buy(
+    bot: BotSnapshot,
+    session: Session | None,
+    settings,
+    price: float,
+    *,
+    now: datetime,
+) -> BotDiff | None:
+    """
+    COMPRA: simulada ou, com app_mode == "real", ordem enviada pelo
+    OrderExecutor (aí o bot só muda quando o fill é reconciliado: sem diff).
+    """
+    if settings.app_mode == "real":
+        request_buy(bot, session, price)
+        return None
+    return simulate_buy(bot, session, settings, price, now=now)
+
+
+def execute_sell(
+    bot: BotSnapshot,
+    session: Session | None,
+    settings,
+    price: float,
+    reason: str | None = None,
+    *,
+    now: datetime,
+) -> BotDiff | None:
+    """VENDA de toda a posição: simulada ou ordem real (app_mode == "real")."""
+    if settings.app_mode == "real":
+        request_sell(bot, session, price, reason=reason)
+        return None
+    return simulate_sell(bot, session, settings, price, reason=reason, now=now)
+
+
+def simulate_buy(
+    bot: BotSnapshot,
+    session: Session | None,
+    settings,
+    price: float,
+    *,
+    now: datetime,
+) -> BotDiff | None:
     """
     COMPRA simulada:
     - Checa saldo virtual (saldo_usdt_livre vs valor_de_trade_usdt).
     - Atualiza posição e saldo virtual.
-    - Registra Trade BUY, com taxa simulada (fee_amount / fee_asset).
+    - Monta o Trade BUY (no diff), com taxa simulada (fee_amount / fee_asset).
     """
     if bot.saldo_usdt_livre < bot.valor_de_trade_usdt:
         print(
             f"[ENGINE] Bot id={bot.id} sem saldo virtual suficiente para comprar. "
             f"saldo_livre={bot.saldo_usdt_livre}, trade={bot.valor_de_trade_usdt}"
         )
-        return
+        return None
 
     valor_trade = bot.valor_de_trade_usdt
     if price <= 0:
         print(f"[ENGINE] Preço inválido ({price}) para {bot.symbol}. Abortando compra.")
-        return
+        return None
 
     qty = valor_trade / price
 
-    # Atualiza posição virtual
-    bot.has_open_position = True
-    bot.qty_moeda += qty
-    bot.saldo_usdt_livre -= valor_trade
-    bot.last_buy_price = price
-    bot.valor_inicial = price
+    # Nova posição virtual
+    changes = {
+        "has_open_position": True,
+        "qty_moeda": bot.qty_moeda + qty,
+        "saldo_usdt_livre": bot.saldo_usdt_livre - valor_trade,
+        "last_buy_price": price,
+        "valor_inicial": price,
+    }
 
     # Taxa simulada da Binance (apenas informativa)
     fee_rate = getattr(settings, "binance_fee_rate", 0.001)  # 0.1% por padrão
     fee_amount = valor_trade * fee_rate
     fee_asset = "USDT"
 
-    trade = Trade(
-        bot_id=bot.id,
-        symbol=bot.symbol,
-        side="BUY",
-        price=price,
-        qty=qty,
-        quote_qty=valor_trade,
-        is_simulated=(settings.app_mode == "simulation"),
-        fee_amount=fee_amount,
-        fee_asset=fee_asset,
-        realized_pnl=None,
-        info="Simulated BUY executed by engine",
-    )
-
-    session.add(bot)
-    session.add(trade)
-    session.commit()
-    session.refresh(bot)
+    # o trade vai no diff: gravado (com bot_stats/global_stats) na projeção
+    trade = {
+        "bot_id": bot.id,
+        "symbol": bot.symbol,
+        "side": "BUY",
+        "price": price,
+        "qty": qty,
+        "quote_qty": valor_trade,
+        "is_simulated": settings.app_mode == "simulation",
+        "fee_amount": fee_amount,
+        "fee_asset": fee_asset,
+        "realized_pnl": None,
+        "info": "Simulated BUY executed by engine",
+        "created_at": now,
+    }
 
     print(
         f"[ENGINE] Bot id={bot.id} COMPRA SIMULADA executada: "
         f"price={price}, qty={qty}, valor={valor_trade}, "
         f"fee={fee_amount} {fee_asset}, "
-        f"saldo_livre_restante={bot.saldo_usdt_livre}"
+        f"saldo_livre_restante={changes['saldo_usdt_livre']}"
     )
+    return BotDiff(bot.id, changes, trade)
 
 
 def simulate_sell(
-    bot: Bot,
-    session: Session,
+    bot: BotSnapshot,
+    session: Session | None,
     settings,
     price: float,
     reason: str | None = None,
-) -> None:
+    *,
+    now: datetime,
+) -> BotDiff | None:
     """
     VENDA simulada de toda a posição:
     - Atualiza saldo virtual.
     - Calcula P/L realizado (sem descontar taxa).
-    - Registra Trade SELL com taxa simulada (fee_amount / fee_asset).
+    - Monta o Trade SELL (no diff) com taxa simulada (fee_amount / fee_asset).
     - Se for stop-loss, bloqueia e desliga o bot.
     """
     if not bot.has_open_position or bot.qty_moeda <= 0:
@@ -402,12 +699,12 @@ def simulate_sell(
             f"[ENGINE] Bot id={bot.id} chamado para SELL mas sem posição aberta "
             f"(has_open_position={bot.has_open_position}, qty_moeda={bot.qty_moeda})."
         )
-        return
+        return None
 
     qty = bot.qty_moeda
     if price <= 0:
         print(f"[ENGINE] Preço inválido ({price}) para {bot.symbol}. Abortando venda.")
-        return
+        return None
 
     quote_value = qty * price
 
@@ -416,16 +713,17 @@ def simulate_sell(
     cost = qty * base_price
     realized_pnl = quote_value - cost
 
-    # Atualiza posição virtual
-    bot.has_open_position = False
-    bot.qty_moeda = 0.0
-    bot.saldo_usdt_livre += quote_value
-    bot.last_sell_price = price
-    bot.valor_inicial = price  # novo ciclo começa aqui
-
+    # Posição virtual zerada
+    changes = {
+        "has_open_position": False,
+        "qty_moeda": 0.0,
+        "saldo_usdt_livre": bot.saldo_usdt_livre + quote_value,
+        "last_sell_price": price,
+        "valor_inicial": price,  # novo ciclo começa aqui
+    }
     if reason == "stop_loss_triggered":
-        bot.blocked = True
-        bot.status = "offline"
+        changes["blocked"] = True
+        changes["status"] = "offline"
 
     # Taxa simulada da Binance (apenas informativa)
     fee_rate = getattr(settings, "binance_fee_rate", 0.001)  # 0.1% por padrão
@@ -440,29 +738,28 @@ def simulate_sell(
     elif reason == "manual_close":
         info_msg += " (manual_close)"
 
-    trade = Trade(
-        bot_id=bot.id,
-        symbol=bot.symbol,
-        side="SELL",
-        price=price,
-        qty=qty,
-        quote_qty=quote_value,
-        is_simulated=(settings.app_mode == "simulation"),
-        fee_amount=fee_amount,
-        fee_asset=fee_asset,
-        realized_pnl=realized_pnl,
-        info=info_msg,
-    )
-
-    session.add(bot)
-    session.add(trade)
-    session.commit()
-    session.refresh(bot)
+    # o trade vai no diff: gravado (com bot_stats/global_stats) na projeção
+    trade = {
+        "bot_id": bot.id,
+        "symbol": bot.symbol,
+        "side": "SELL",
+        "price": price,
+        "qty": qty,
+        "quote_qty": quote_value,
+        "is_simulated": settings.app_mode == "simulation",
+        "fee_amount": fee_amount,
+        "fee_asset": fee_asset,
+        "realized_pnl": realized_pnl,
+        "info": info_msg,
+        "created_at": now,
+    }
 
     print(
         f"[ENGINE] Bot id={bot.id} VENDA SIMULADA executada: "
         f"reason={reason}, price={price}, qty={qty}, valor={quote_value}, "
         f"realized_pnl={realized_pnl}, fee={fee_amount} {fee_asset}, "
-        f"saldo_livre={bot.saldo_usdt_livre}, "
-        f"blocked={bot.blocked}, status={bot.status}"
+        f"saldo_livre={changes['saldo_usdt_livre']}, "
+        f"blocked={changes.get('blocked', bot.blocked)}, "
+        f"status={changes.get('status', bot.status)}"
     )
+    return BotDiff(bot.id, changes, trade)
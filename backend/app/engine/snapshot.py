@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import func
+from sqlmodel import Session, select
+
+from app.models.bot import Bot
+from app.models.indicator import Indicator
+from app.models.trade import Trade
+
+SNAPSHOT_TRADE_SIDE = "SNAPSHOT"  # marcador: bot já tinha trades antes da gravação
+
+
+def engine_snapshot(
+    session: Session,
+    last_indicator_sync: dict[str, datetime],
+    last_prices: Optional[dict[str, tuple[float, datetime]]] = None,
+) -> dict:
+    """
+    Estado do banco que influencia as decisões do engine, gravado no início
+    de uma gravação de dados de mercado (app.marketdata.recorder):
+    bots, quais bots já têm trades (comprar_ao_iniciar), o último indicador
+    5m de cada símbolo, os horários dos últimos syncs de indicadores e os
+    últimos preços conhecidos (fallback de stop-loss).
+    """
+    bots = session.exec(select(Bot).order_by(Bot.id)).all()
+    bots_with_trades = session.exec(select(Trade.bot_id).distinct()).all()
+
+    latest = (
+        select(Indicator.symbol, func.max(Indicator.close_time).label("close_time"))
+        .where(Indicator.interval == "5m")
+        .group_by(Indicator.symbol)
+        .subquery()
+    )
+    indicators = session.exec(
+        select(Indicator)
+        .join(
+            latest,
+            (Indicator.symbol == latest.c.symbol)
+            & (Indicator.close_time == latest.c.close_time),
+        )
+        .where(Indicator.interval == "5m")
+    ).all()
+
+    return {
+        "bots": [bot.model_dump() for bot in bots],
+        "bots_with_trades": list(bots_with_trades),
+        "indicators": [ind.model_dump(exclude={"id"}) for ind in indicators],
+        "last_indicator_sync": {
+            symbol: ts.isoformat() for symbol, ts in last_indicator_sync.items()
+        },
+        "last_prices": {
+            symbol: [price, ts.isoformat()] for symbol, (price, ts) in (last_prices or {}).items()
+        },
+    }
+
+
+def restore_snapshot(session: Session, state: dict) -> None:
+    """Recria o estado do snapshot num banco vazio (replay)."""
+    bots = {}
+    for data in state["bots"]:
+        bot = Bot.model_validate(data)
+        bots[bot.id] = bot
+        session.add(bot)
+    session.flush()
+
+    for bot_id in state["bots_with_trades"]:
+        bot = bots.get(bot_id)
+        if bot is None:
+            continue
+        # marcador (não passa por record_trade: não entra em bot_stats)
+        session.add(
+            Trade(
+                bot_id=bot_id,
+                symbol=bot.symbol,
+                side=SNAPSHOT_TRADE_SIDE,
+                price=0.0,
+                qty=0.0,
+                quote_qty=0.0,
+                info="replay: bot já tinha trades antes da gravação",
+            )
+        )
+
+    for data in state["indicators"]:
+        session.add(Indicator.model_validate(data))
+    session.flush()
+
+
+def snapshot_last_sync(state: dict) -> dict[str, datetime]:
+    return {
+        symbol: datetime.fromisoformat(ts)
+        for symbol, ts in state.get("last_indicator_sync", {}).items()
+    }
+
+
+def snapshot_last_prices(state: dict) -> dict[str, tuple[float, datetime]]:
+    return {
+        symbol: (price, datetime.fromisoformat(ts))
+        for symbol, (price, ts) in state.get("last_prices", {}).items()
+    }
@@ -0,0 +1,213 @@
+from __future__ import annotations
+
+from typing import Any, Iterable, Iterator, Optional, Sequence
+
+# pyarrow é importado sob demanda: só quem exporta em formato colunar paga o import.
+
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+PARQUET_MEDIA_TYPE = "application/vnd.apache.parquet"
+
+FORMAT_MEDIA_TYPES = {
+    "arrow": ARROW_MEDIA_TYPE,
+    "parquet": PARQUET_MEDIA_TYPE,
+}
+FORMAT_EXTENSIONS = {
+    "csv": "csv",
+    "arrow": "arrows",
+    "parquet": "parquet",
+}
+
+# Linhas por row group do Parquet: os lotes do banco (yield_per) são bem
+# menores e viravam milhares de row groups minúsculos
+PARQUET_ROW_GROUP_ROWS = 128 * 1024
+
+# Tipos lógicos das colunas -> tipos Arrow (ver _arrow_type)
+TRADE_COLUMNS: list[tuple[str, str]] = [
+    ("id", "int64"),
+    ("bot_id", "int64"),
+    ("symbol", "string"),
+    ("side", "string"),
+    ("price", "float64"),
+    ("qty", "float64"),
+    ("quote_qty", "float64"),
+    ("fee_amount", "float64"),
+    ("fee_asset", "string"),
+    ("realized_pnl", "float64"),
+    ("is_simulated", "bool"),
+    ("info", "string"),
+    ("created_at", "timestamp"),
+]
+
+INDICATOR_COLUMNS: list[tuple[str, str]] = [
+    ("id", "int64"),
+    ("symbol", "string"),
+    ("interval", "string"),
+    ("open_time", "timestamp"),
+    ("close_time", "timestamp"),
+    ("close", "float64"),
+    ("ema9", "float64"),
+    ("ema21", "float64"),
+    ("rsi14", "float64"),
+    ("macd", "float64"),
+    ("macd_signal", "float64"),
+    ("macd_hist", "float64"),
+    ("adx", "float64"),
+    ("trend_score", "float64"),
+    ("trend_label", "string"),
+    ("market_signal_compra", "bool"),
+    ("market_signal_venda", "bool"),
+    ("created_at", "timestamp"),
+]
+
+CANDLE_COLUMNS: list[tuple[str, str]] = [
+    ("open_time", "timestamp"),
+    ("close_time", "timestamp"),
+    ("open", "float64"),
+    ("high", "float64"),
+    ("low", "float64"),
+    ("close", "float64"),
+    ("volume", "float64"),
+]
+
+
+def negotiate_format(fmt: Optional[str], accept: Optional[str]) -> str:
+    """
+    Decide o formato de saída: parâmetro `format` explícito tem prioridade,
+    depois o header Accept; CSV é o padrão.
+    """
+    if fmt:
+        fmt = fmt.lower()
+        if fmt not in FORMAT_EXTENSIONS:
+            raise ValueError(f"Formato inválido: {fmt} (use csv, arrow ou parquet)")
+        return fmt
+
+    accept = (accept or "").lower()
+    if ARROW_MEDIA_TYPE in accept or "application/vnd.apache.arrow.file" in accept:
+        return "arrow"
+    if PARQUET_MEDIA_TYPE in accept or "application/x-parquet" in accept:
+        return "parquet"
+    return "csv"
+
+
+def _arrow_type(pa, kind: str):
+    if kind == "int64":
+        return pa.int64()
+    if kind == "float64":
+        return pa.float64()
+    if kind == "bool":
+        return pa.bool_()
+    if kind == "timestamp":
+        # datetimes do banco são naive em UTC
+        return pa.timestamp("us", tz="UTC")
+    return pa.string()
+
+
+def build_schema(columns: Sequence[tuple[str, str]]):
+    import pyarrow as pa
+
+    return pa.schema([(name, _arrow_type(pa, kind)) for name, kind in columns])
+
+
+def iter_record_batches(schema, partitions: Iterable[Sequence[Sequence[Any]]]) -> Iterator[Any]:
+    """
+    Converte lotes de linhas (tuplas na ordem do schema) em RecordBatches,
+    coluna a coluna, sem passar por dicts/objetos intermediários.
+    """
+    import pyarrow as pa
+
+    for rows in partitions:
+        if not rows:
+            continue
+        columns = list(zip(*rows))
+        arrays = [
+            pa.array(col, type=field.type) for col, field in zip(columns, schema)
+        ]
+        yield pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+class _ChunkSink:
+    """File-like mínimo que acumula bytes para serem drenados em streaming."""
+
+    def __init__(self) -> None:
+        self._chunks: list[bytes] = []
+        self._pos = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._pos += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._pos
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream_arrow_ipc(schema, batches: Iterable[Any]) -> Iterator[bytes]:
+    """Gera um Arrow IPC stream, um RecordBatch por vez."""
+    import pyarrow as pa
+
+    sink = _ChunkSink()
+    with pa.ipc.new_stream(pa.PythonFile(sink, mode="w"), schema) as writer:
+        yield sink.drain()
+        for batch in batches:
+            writer.write_batch(batch)
+            yield sink.drain()
+    yield sink.drain()
+
+
+def stream_parquet(
+    schema,
+    batches: Iterable[Any],
+    row_group_rows: int = PARQUET_ROW_GROUP_ROWS,
+) -> Iterator[bytes]:
+    """
+    Gera um arquivo Parquet juntando os RecordBatches em row groups de até
+    `row_group_rows` linhas (memória limitada a um row group por vez).
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    sink = _ChunkSink()
+    with pq.ParquetWriter(
+        pa.PythonFile(sink, mode="w"), schema, compression="zstd"
+    ) as writer:
+        pending: list = []
+        pending_rows = 0
+        for batch in batches:
+            pending.append(batch)
+            pending_rows += batch.num_rows
+            if pending_rows >= row_group_rows:
+                # só row groups cheios; o resto fica para o próximo
+                table = pa.Table.from_batches(pending, schema=schema)
+                full = pending_rows - pending_rows % row_group_rows
+                writer.write_table(table.slice(0, full), row_group_size=row_group_rows)
+                rest = table.slice(full)
+                pending, pending_rows = rest.to_batches(), rest.num_rows
+                yield sink.drain()
+        if pending:
+            table = pa.Table.from_batches(pending, schema=schema)
+            writer.write_table(table, row_group_size=row_group_rows)
+    yield sink.drain()
+
+
+def stream_columnar(fmt: str, columns: Sequence[tuple[str, str]], partitions) -> Iterator[bytes]:
+    """Atalho: lotes de linhas -> bytes no formato pedido (arrow | parquet)."""
+    schema = build_schema(columns)
+    batches = iter_record_batches(schema, partitions)
+    if fmt == "arrow":
+        return stream_arrow_ipc(schema, batches)
+    if fmt == "parquet":
+        return stream_parquet(schema, batches)
+    raise ValueError(f"Formato colunar inválido: {fmt}")
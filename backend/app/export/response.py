@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from typing import Any, Iterable, Sequence
+
+from fastapi.responses import StreamingResponse
+
+from app.export.columnar import FORMAT_EXTENSIONS, FORMAT_MEDIA_TYPES, stream_columnar
+from app.export.rows import iter_csv
+
+
+def export_response(
+    out_format: str,
+    columns: Sequence[tuple[str, str]],
+    partitions: Iterable[Sequence[Any]],
+    basename: str,
+) -> StreamingResponse:
+    """Resposta em streaming (csv | arrow | parquet) para lotes de linhas."""
+    filename = f"{basename}.{FORMAT_EXTENSIONS[out_format]}"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+
+    if out_format == "csv":
+        header = [name for name, _kind in columns]
+        return StreamingResponse(
+            iter_csv(header, partitions),
+            media_type="text/csv",
+            headers=headers,
+        )
+
+    return StreamingResponse(
+        stream_columnar(out_format, columns, partitions),
+        media_type=FORMAT_MEDIA_TYPES[out_format],
+        headers=headers,
+    )
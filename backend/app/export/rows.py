@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import csv
+from datetime import datetime
+from io import StringIO
+from typing import Any, Iterable, Iterator, Sequence
+
+from sqlmodel import Session
+
+from app.db.session import engine
+
+EXPORT_BATCH_ROWS = 1000
+
+
+def iter_query_partitions(
+    query,
+    batch_rows: int = EXPORT_BATCH_ROWS,
+) -> Iterator[Sequence[Any]]:
+    """
+    Executa `query` com cursor no servidor (stream_results + yield_per) e
+    devolve as linhas em lotes: memória limitada a um lote por vez.
+
+    Abre sessão própria: a do Depends pode ser fechada antes do fim do streaming.
+    """
+    with Session(engine) as session:
+        result = session.exec(
+            query.execution_options(stream_results=True, yield_per=batch_rows)
+        )
+        for partition in result.partitions():
+            yield partition
+
+
+def iter_csv(header: Sequence[str], partitions: Iterable[Sequence[Any]]) -> Iterator[str]:
+    """
+    Gera CSV em pedaços (um por lote de linhas). None vira vazio e
+    datetimes saem em ISO 8601.
+    """
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+
+    def _flush() -> str:
+        chunk = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+        return chunk
+
+    # cabeçalho sai imediatamente (time-to-first-byte baixo)
+    writer.writerow(header)
+    yield _flush()
+
+    for rows in partitions:
+        for row in rows:
+            writer.writerow(
+                [v.isoformat() if isinstance(v, datetime) else v for v in row]
+            )
+        yield _flush()
@@ -6,7 +6,7 @@ from typing import List
 from sqlmodel import Session, select
 
 from app.binance.client import get_klines
-from app.db.session import engine
+from app.db.writer import run_write
 from app.models.indicator import Indicator
 
 
@@ -177,6 +177,14 @@ def sync_indicators_for_symbol(
     Retorna quantas linhas NOVAS foram inseridas.
     """
     klines = get_klines(symbol=symbol, interval=interval, limit=limit)
+    return store_indicators(symbol, interval, klines)
+
+
+def store_indicators(symbol: str, interval: str, klines: list[dict]) -> int:
+    """
+    Calcula indicadores sobre `klines` (formato de get_klines) e grava
+    só os candles mais novos que o último salvo. Retorna quantos inseriu.
+    """
     if not klines:
         return 0
 
@@ -187,7 +195,7 @@ def sync_indicators_for_symbol(
     rsi_series = rsi(closes, 14)
     macd_line, macd_signal, macd_hist = macd_series(closes)
 
-    with Session(engine) as session:
+    def _insert(session: Session) -> int:
         last = session.exec(
             select(Indicator)
             .where(Indicator.symbol == symbol, Indicator.interval == interval)
@@ -246,7 +254,7 @@ def sync_indicators_for_symbol(
             session.add(ind)
             inserted += 1
 
-        if inserted > 0:
-            session.commit()
-
         return inserted
+
+    # Escrita passa pelo writer único (commit em lote com o resto do sistema)
+    return run_write(_insert)
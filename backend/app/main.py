@@ -1,19 +1,23 @@
 from __future__ import annotations
 
 import asyncio
+import time
+
+# primeiro import do app: marca o início do boot (tempo de imports)
+from app.core.startup import after_warm_up, ensure_warm, get_startup, mark_imports_done
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from app.binance.client import server_time_sync_loop
+from app.binance.exchange_info import exchange_info_refresh_loop
+from app.core.compression import CompressionMiddleware
 from app.core.config import get_settings
+from app.core.outbox import outbox_tail_loop
+from app.core.serialization import ORJSONResponse
 from app.db.base import init_db
-from app.api.routes_system import router as system_router
-from app.api.routes_bots import router as bots_router
-from app.api.routes_binance import router as binance_router
-from app.api.routes_indicators import router as indicators_router
-from app.api.routes_stats import router as stats_router
-from app.api.routes_trades import router as trades_router
-from app.api.routes_analysis import router as analysis_router
+from app.db.writer import get_db_writer
+from app.engine.lease import release_engine_lease
 from app.engine.runner import bot_engine_loop
 
 
@@ -23,6 +27,7 @@ def create_app() -> FastAPI:
     app = FastAPI(
         title="bbot",
         version="0.1.0",
+        default_response_class=ORJSONResponse,
     )
 
     # CORS liberado para desenvolvimento local
@@ -34,7 +39,26 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
     )
 
-    # Rotas
+    # Compressão br/gzip das respostas grandes (listas, análises)
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.http_compression_min_size,
+    )
+
+    # Rotas: importadas só ao montar o app (os routers de backtest/sweep,
+    # exports e análise/ticks são os mais pesados); entram no tempo de
+    # "imports" do boot
+    from app.api.routes_system import router as system_router
+    from app.api.routes_bots import router as bots_router
+    from app.api.routes_binance import router as binance_router
+    from app.api.routes_indicators import router as indicators_router
+    from app.api.routes_stats import router as stats_router
+    from app.api.routes_trades import router as trades_router
+    from app.api.routes_analysis import router as analysis_router
+    from app.api.routes_events import router as events_router
+    from app.api.routes_backtest import router as backtest_router
+    from app.api.routes_orders import router as orders_router
+
     app.include_router(system_router)
     app.include_router(bots_router)
     app.include_router(binance_router)
@@ -42,6 +66,11 @@ def create_app() -> FastAPI:
     app.include_router(stats_router)
     app.include_router(trades_router)
     app.include_router(analysis_router)
+    app.include_router(events_router)
+    app.include_router(backtest_router)
+    app.include_router(orders_router)
+    # fim dos imports do boot (inclui os routers importados acima)
+    mark_imports_done()
 
 
     @app.get("/", tags=["health"])
@@ -51,10 +80,36 @@ def create_app() -> FastAPI:
     @app.on_event("startup")
     async def on_startup():
         # Inicializa o banco
+        started = time.perf_counter()
         init_db()
-        # Inicia o loop do engine em background
-        asyncio.create_task(bot_engine_loop())
-        print("[STARTUP] API inicializada e engine de bots agendado.")
+        get_startup().mark("init_db", started)
+        # Sobe o writer único do banco antes de qualquer escrita
+        get_db_writer().start()
+        # Eventos gravados por outros processos (engine separado, outros workers)
+        asyncio.create_task(outbox_tail_loop())
+        # Warm-up em paralelo (pool HTTP, exchangeInfo, relógio, caches do
+        # engine); /system/ready responde 503 até terminar
+        ensure_warm(engine=settings.engine_enabled)
+        # Recargas periódicas começam depois da primeira carga do warm-up:
+        # filtros de negociação dos símbolos e offset do relógio
+        asyncio.create_task(after_warm_up(exchange_info_refresh_loop))
+        asyncio.create_task(after_warm_up(server_time_sync_loop))
+        if settings.engine_enabled:
+            # Inicia o loop do engine em background
+            asyncio.create_task(bot_engine_loop())
+            print("[STARTUP] API inicializada e engine de bots agendado.")
+        else:
+            print("[STARTUP] API inicializada (engine desligado: ENGINE_ENABLED=false).")
+
+    @app.on_event("shutdown")
+    async def on_shutdown():
+        if settings.engine_enabled:
+            try:
+                release_engine_lease()
+            except Exception as e:
+                print(f"[SHUTDOWN] Falha ao liberar lease do engine: {e}")
+        # Drena a fila do writer (commita o último lote) antes de sair
+        get_db_writer().stop()
 
     return app
 
@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from app.core.config import get_settings
+
+# Uma coluna = um arquivo binário append-only (little-endian, sem cabeçalho)
+KLINE_FIELDS: tuple[tuple[str, str], ...] = (
+    ("open_time", "<i8"),  # ms epoch UTC
+    ("open", "<f8"),
+    ("high", "<f8"),
+    ("low", "<f8"),
+    ("close", "<f8"),
+    ("volume", "<f8"),
+    ("close_time", "<i8"),  # ms epoch UTC
+)
+
+INTERVAL_MS = {
+    "1m": 60_000,
+    "3m": 3 * 60_000,
+    "5m": 5 * 60_000,
+    "15m": 15 * 60_000,
+    "30m": 30 * 60_000,
+    "1h": 3_600_000,
+    "2h": 2 * 3_600_000,
+    "4h": 4 * 3_600_000,
+    "6h": 6 * 3_600_000,
+    "8h": 8 * 3_600_000,
+    "12h": 12 * 3_600_000,
+    "1d": 86_400_000,
+    "3d": 3 * 86_400_000,
+    "1w": 7 * 86_400_000,
+}
+
+_append_locks: dict[Path, threading.Lock] = {}
+_append_locks_guard = threading.Lock()
+
+
+def to_ms(value: datetime) -> int:
+    """datetime (naive = UTC, como no resto do sistema) -> ms epoch."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp() * 1000)
+
+
+class KlineArchive:
+    """
+    Arquivo colunar de klines de um símbolo/intervalo:
+
+        <market_data_dir>/klines/<SYMBOL>/<interval>/
+            open_time.i8  open.f8  high.f8  low.f8  close.f8  volume.f8
+            close_time.i8  index.json
+
+    - Escrita só por append (em ordem de open_time); index.json guarda o nº
+      de linhas confirmadas e é gravado por último (troca atômica). Uma
+      escrita interrompida deixa só uma "cauda" que é ignorada/truncada.
+    - Leitura por np.memmap: columns() devolve views NumPy sem cópia,
+      recortadas por tempo via busca binária em open_time.
+    """
+
+    def __init__(self, symbol: str, interval: str, root: Optional[Path] = None) -> None:
+        if interval not in INTERVAL_MS:
+            raise ValueError(f"Intervalo não suportado no arquivo: {interval}")
+        self.symbol = symbol.upper().strip()
+        self.interval = interval
+        base = Path(root) if root is not None else Path(get_settings().market_data_dir)
+        self.path = base / "klines" / self.symbol / interval
+        self.step_ms = INTERVAL_MS[interval]
+
+    # -----------------------------------------------------------------
+    # Índice
+    # -----------------------------------------------------------------
+    def read_index(self) -> dict:
+        try:
+            return json.loads((self.path / "index.json").read_text())
+        except FileNotFoundError:
+            return {"count": 0, "first_open_time": None, "last_open_time": None}
+
+    @property
+    def count(self) -> int:
+        return int(self.read_index()["count"])
+
+    @property
+    def last_open_time(self) -> Optional[int]:
+        return self.read_index()["last_open_time"]
+
+    def _write_index(self, index: dict) -> None:
+        tmp = self.path / "index.json.tmp"
+        tmp.write_text(json.dumps(index))
+        os.replace(tmp, self.path / "index.json")
+
+    # -----------------------------------------------------------------
+    # Escrita
+    # -----------------------------------------------------------------
+    def _lock(self) -> threading.Lock:
+        with _append_locks_guard:
+            return _append_locks.setdefault(self.path, threading.Lock())
+
+    def append(self, columns: dict[str, np.ndarray]) -> int:
+        """
+        Acrescenta candles (arrays por campo, ordenados por open_time).
+        Linhas com open_time <= último gravado são ignoradas (idempotente).
+        Retorna quantas linhas novas foram gravadas.
+        """
+        with self._lock():
+            self.path.mkdir(parents=True, exist_ok=True)
+            index = self.read_index()
+            count = int(index["count"])
+            last = index["last_open_time"]
+
+            open_time = np.asarray(columns["open_time"], dtype="<i8")
+            keep = np.ones(len(open_time), dtype=bool)
+            if last is not None:
+                keep &= open_time > last
+            if len(open_time) > 1:
+                # garante ordem estritamente crescente dentro do próprio lote
+                keep[1:] &= open_time[1:] > np.maximum.accumulate(open_time)[:-1]
+            n_new = int(keep.sum())
+            if n_new == 0:
+                return 0
+
+            for name, dtype in KLINE_FIELDS:
+                data = np.ascontiguousarray(np.asarray(columns[name], dtype=dtype)[keep])
+                file_path = self.path / f"{name}.{dtype[1:]}"
+                with open(file_path, "ab") as f:
+                    # descarta cauda de uma escrita interrompida antes de acrescentar
+                    f.truncate(count * data.itemsize)
+                    f.seek(count * data.itemsize)
+                    f.write(data.tobytes())
+                    f.flush()
+                    os.fsync(f.fileno())
+
+            new_open = open_time[keep]
+            self._write_index(
+                {
+                    "symbol": self.symbol,
+                    "interval": self.interval,
+                    "count": count + n_new,
+                    "first_open_time": index["first_open_time"]
+                    if index["first_open_time"] is not None
+                    else int(new_open[0]),
+                    "last_open_time": int(new_open[-1]),
+                }
+            )
+            return n_new
+
+    # -----------------------------------------------------------------
+    # Leitura
+    # -----------------------------------------------------------------
+    def _column(self, name: str, dtype: str, count: int) -> np.ndarray:
+        if count == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(self.path / f"{name}.{dtype[1:]}", dtype=dtype, mode="r", shape=(count,))
+
+    def columns(
+        self,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        fields: Optional[tuple[str, ...]] = None,
+    ) -> dict[str, np.ndarray]:
+        """
+        Views (somente leitura, sem cópia) das colunas pedidas, com
+        since <= open_time < until.
+        """
+        count = self.count
+        wanted = fields or tuple(name for name, _ in KLINE_FIELDS)
+        dtypes = dict(KLINE_FIELDS)
+
+        open_time = self._column("open_time", dtypes["open_time"], count)
+        lo = 0 if since is None else int(np.searchsorted(open_time, to_ms(since), "left"))
+        hi = count if until is None else int(np.searchsorted(open_time, to_ms(until), "left"))
+
+        out = {}
+        for name in wanted:
+            col = open_time if name == "open_time" else self._column(name, dtypes[name], count)
+            out[name] = col[lo:hi]
+        return out
+
+
+def read_klines(
+    symbol: str,
+    interval: str,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    fields: Optional[tuple[str, ...]] = None,
+) -> dict[str, np.ndarray]:
+    """Atalho de leitura do arquivo (views np.memmap, sem cópia)."""
+    return KlineArchive(symbol, interval).columns(since, until, fields)
@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Optional
+
+import httpx
+import numpy as np
+
+from app.binance.client import get_klines
+from app.marketdata.archive import KLINE_FIELDS, KlineArchive, to_ms
+
+WINDOW_CANDLES = 1000  # máximo por chamada de /api/v3/klines
+MAX_RETRIES = 5
+
+
+def _rows_to_columns(rows: list[list]) -> dict[str, np.ndarray]:
+    """Linhas cruas da Binance -> arrays por campo (mesma ordem de KLINE_FIELDS)."""
+    if not rows:
+        return {name: np.empty(0, dtype=dtype) for name, dtype in KLINE_FIELDS}
+    return {
+        name: np.array([r[i] for r in rows], dtype=dtype)
+        for i, (name, dtype) in enumerate(KLINE_FIELDS)
+    }
+
+
+def _fetch_window(symbol: str, interval: str, start_ms: int, end_ms: int) -> list[list]:
+    """Uma janela de até 1000 candles, com retry (o limiter já espera o Retry-After)."""
+    for attempt in range(MAX_RETRIES):
+        try:
+            return get_klines(
+                symbol=symbol,
+                interval=interval,
+                limit=WINDOW_CANDLES,
+                start_time=start_ms,
+                end_time=end_ms - 1,
+                raw=True,
+            )
+        except httpx.HTTPStatusError as e:
+            status = e.response.status_code
+            if status not in (418, 429) and status < 500:
+                raise
+        except httpx.TransportError:
+            pass
+        time.sleep(min(30.0, 2**attempt))
+    raise RuntimeError(
+        f"Falha ao baixar klines {symbol} {interval} a partir de {start_ms} "
+        f"após {MAX_RETRIES} tentativas."
+    )
+
+
+def _first_available_ms(symbol: str, interval: str) -> Optional[int]:
+    rows = get_klines(symbol=symbol, interval=interval, limit=1, start_time=0, raw=True)
+    return int(rows[0][0]) if rows else None
+
+
+def backfill_klines(
+    symbol: str,
+    interval: str,
+    *,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    workers: int = 4,
+    on_progress: Optional[Callable[[int, int], None]] = None,
+) -> int:
+    """
+    Baixa o histórico de klines para o arquivo colunar (KlineArchive).
+
+    - Retoma de onde parou: começa no candle seguinte ao último gravado.
+    - Janelas de 1000 candles são baixadas em paralelo (`workers` threads,
+      todas passando pelo rate limiter do client), mas gravadas em ordem:
+      o arquivo é sempre um prefixo contíguo do histórico.
+    - Só candles já fechados entram no arquivo.
+
+    Retorna quantos candles novos foram gravados.
+    """
+    symbol = symbol.upper().strip()
+    archive = KlineArchive(symbol, interval)
+    step = archive.step_ms
+
+    now_ms = int(time.time() * 1000)
+    end_ms = min(to_ms(until), now_ms) if until is not None else now_ms
+
+    last = archive.last_open_time
+    if last is not None:
+        start_ms = last + step
+    elif since is not None:
+        start_ms = to_ms(since)
+    else:
+        first = _first_available_ms(symbol, interval)
+        if first is None:
+            return 0
+        start_ms = first
+    if start_ms >= end_ms:
+        return 0
+
+    window_ms = WINDOW_CANDLES * step
+    starts = list(range(start_ms, end_ms, window_ms))
+    total = len(starts)
+    written = 0
+    done = 0
+
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="bbot-backfill") as pool:
+        in_flight: deque[Future] = deque()
+        next_window = 0
+        while next_window < total or in_flight:
+            # mantém até 2x workers janelas em voo; grava sempre a mais antiga
+            while next_window < total and len(in_flight) < 2 * workers:
+                w_start = starts[next_window]
+                in_flight.append(
+                    pool.submit(
+                        _fetch_window, symbol, interval, w_start, min(w_start + window_ms, end_ms)
+                    )
+                )
+                next_window += 1
+
+            try:
+                rows = in_flight.popleft().result()
+            except BaseException:
+                for fut in in_flight:
+                    fut.cancel()
+                raise
+            rows = [r for r in rows if int(r[6]) < now_ms]  # só candles fechados
+            written += archive.append(_rows_to_columns(rows))
+            done += 1
+            if on_progress:
+                on_progress(done, total)
+
+    return written
+
+
+if __name__ == "__main__":
+    # python -m app.marketdata.backfill BTCUSDT 1m [--since 2021-01-01] [--until ...] [--workers 4]
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="python -m app.marketdata.backfill")
+    parser.add_argument("symbol")
+    parser.add_argument("interval")
+    parser.add_argument("--since", type=datetime.fromisoformat)
+    parser.add_argument("--until", type=datetime.fromisoformat)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    def _print_progress(done: int, total: int) -> None:
+        print(f"\r[BACKFILL] janelas {done}/{total}", end="", flush=True)
+
+    started = time.perf_counter()
+    total_written = backfill_klines(
+        args.symbol,
+        args.interval,
+        since=args.since,
+        until=args.until,
+        workers=args.workers,
+        on_progress=_print_progress,
+    )
+    archive = KlineArchive(args.symbol, args.interval)
+    print(
+        f"\n[BACKFILL] {archive.symbol} {archive.interval}: +{total_written} candles "
+        f"(total={archive.count}) em {time.perf_counter() - started:.1f}s"
+    )
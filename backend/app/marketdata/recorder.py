@@ -0,0 +1,232 @@
+from __future__ import annotations
+
+import atexit
+import struct
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, BinaryIO, Iterator, Optional
+
+import orjson
+
+from app.core.config import get_settings
+
+# ---------------------------------------------------------------------
+# Formato do log (little-endian):
+#   MAGIC, depois registros  <tipo u8><ts_us i8><tamanho u32><payload>
+# ---------------------------------------------------------------------
+MAGIC = b"BBOTREC1"
+_HEADER = struct.Struct("<BqI")
+
+REC_SNAPSHOT = 1  # JSON: estado do banco visto pelo engine no início da gravação
+REC_CYCLE = 2  # início de um ciclo; ts = "agora" usado pelo engine
+REC_PRICE = 3  # símbolo + preço (f8)
+REC_KLINES = 4  # símbolo, intervalo + colunas dos candles do sync de indicadores
+REC_ERROR = 5  # falha ao obter preço/klines (o engine pula o símbolo/bot)
+
+_KLINE_INT_COLS = ("open_time", "close_time")  # ms epoch
+_KLINE_FLOAT_COLS = ("open", "high", "low", "close", "volume")
+
+FLUSH_BYTES = 64 * 1024
+
+_EPOCH = datetime(1970, 1, 1)
+_US = timedelta(microseconds=1)
+
+
+def _to_us(value: datetime) -> int:
+    # aritmética inteira: o "agora" do ciclo volta idêntico no replay
+    return (value - _EPOCH) // _US
+
+
+def _from_us(value: int) -> datetime:
+    return _EPOCH + value * _US
+
+
+def _ms_to_datetime(ms: int) -> datetime:
+    # mesma conversão de app.binance.client.get_klines (replay bit a bit igual)
+    return datetime.fromtimestamp(ms / 1000.0, tz=timezone.utc).replace(tzinfo=None)
+
+
+def _pack_str(value: str) -> bytes:
+    raw = value.encode("utf-8")
+    return struct.pack("<H", len(raw)) + raw
+
+
+def _unpack_str(buf: memoryview, pos: int) -> tuple[str, int]:
+    (size,) = struct.unpack_from("<H", buf, pos)
+    pos += 2
+    return bytes(buf[pos : pos + size]).decode("utf-8"), pos + size
+
+
+def _encode_klines(symbol: str, interval: str, klines: list[dict]) -> bytes:
+    import numpy as np  # só quando há gravação: o engine não paga o import no boot
+
+    n = len(klines)
+    parts = [_pack_str(symbol), _pack_str(interval), struct.pack("<I", n)]
+    for col in _KLINE_INT_COLS:
+        parts.append(
+            np.array(
+                [int(round(k[col].replace(tzinfo=timezone.utc).timestamp() * 1000)) for k in klines],
+                dtype="<i8",
+            ).tobytes()
+        )
+    for col in _KLINE_FLOAT_COLS:
+        parts.append(np.array([k[col] for k in klines], dtype="<f8").tobytes())
+    return b"".join(parts)
+
+
+def _decode_klines(payload: memoryview) -> tuple[str, str, list[dict]]:
+    import numpy as np
+
+    symbol, pos = _unpack_str(payload, 0)
+    interval, pos = _unpack_str(payload, pos)
+    (n,) = struct.unpack_from("<I", payload, pos)
+    pos += 4
+    cols: dict[str, "np.ndarray"] = {}
+    for col in _KLINE_INT_COLS:
+        cols[col] = np.frombuffer(payload, dtype="<i8", count=n, offset=pos)
+        pos += 8 * n
+    for col in _KLINE_FLOAT_COLS:
+        cols[col] = np.frombuffer(payload, dtype="<f8", count=n, offset=pos)
+        pos += 8 * n
+
+    open_times = cols["open_time"].tolist()
+    close_times = cols["close_time"].tolist()
+    floats = {col: cols[col].tolist() for col in _KLINE_FLOAT_COLS}
+    klines = [
+        {
+            "open_time": _ms_to_datetime(open_times[i]),
+            "close_time": _ms_to_datetime(close_times[i]),
+            **{col: floats[col][i] for col in _KLINE_FLOAT_COLS},
+        }
+        for i in range(n)
+    ]
+    return symbol, interval, klines
+
+
+class MarketRecorder:
+    """
+    Grava em log binário tudo o que o engine consome de dados de mercado
+    (preços, candles dos syncs de indicadores, erros) + o "agora" de cada
+    ciclo, para reproduzir o ciclo depois (app.engine.replay).
+
+    Registros são acumulados em buffer e escritos em lote (fim de ciclo
+    ou ao passar de FLUSH_BYTES).
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file: BinaryIO = open(path, "ab")
+        if self._file.tell() == 0:
+            self._file.write(MAGIC)
+        self._buffer = bytearray()
+        self._lock = threading.Lock()
+        self.has_snapshot = False
+
+    def _append(self, kind: int, ts_us: int, payload: bytes = b"") -> None:
+        with self._lock:
+            self._buffer += _HEADER.pack(kind, ts_us, len(payload))
+            self._buffer += payload
+            if len(self._buffer) >= FLUSH_BYTES:
+                self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        if self._buffer and not self._file.closed:
+            self._file.write(self._buffer)
+            self._file.flush()
+            self._buffer.clear()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush_locked()
+
+    def close(self) -> None:
+        with self._lock:
+            self._flush_locked()
+            self._file.close()
+
+    # -----------------------------------------------------------------
+    def snapshot(self, state: dict[str, Any]) -> None:
+        self._append(REC_SNAPSHOT, _to_us(datetime.utcnow()), orjson.dumps(state))
+        self.has_snapshot = True
+
+    def cycle(self, now: datetime) -> None:
+        self._append(REC_CYCLE, _to_us(now))
+
+    def price(self, symbol: str, price: float) -> None:
+        self._append(
+            REC_PRICE, int(time.time() * 1_000_000), _pack_str(symbol) + struct.pack("<d", price)
+        )
+
+    def klines(self, symbol: str, interval: str, klines: list[dict]) -> None:
+        self._append(
+            REC_KLINES, int(time.time() * 1_000_000), _encode_klines(symbol, interval, klines)
+        )
+
+    def error(self, kind: int, symbol: str, exc: BaseException) -> None:
+        payload = (
+            struct.pack("<B", kind)
+            + _pack_str(symbol)
+            + _pack_str(exc.__class__.__name__)
+            + _pack_str(str(exc)[:1000])
+        )
+        self._append(REC_ERROR, int(time.time() * 1_000_000), payload)
+
+
+@lru_cache
+def get_market_recorder() -> Optional[MarketRecorder]:
+    """Recorder do processo (um arquivo por execução) ou None se desligado."""
+    settings = get_settings()
+    if not settings.market_recorder_enabled:
+        return None
+    stamp = datetime.utcnow().strftime("%Y%m%d-%H%M%S")
+    recorder = MarketRecorder(Path(settings.market_recorder_dir) / f"engine-{stamp}.bblog")
+    atexit.register(recorder.close)
+    print(f"[RECORDER] Gravando dados de mercado em {recorder.path}")
+    return recorder
+
+
+# ---------------------------------------------------------------------
+# Leitura
+# ---------------------------------------------------------------------
+def iter_records(path: Path) -> Iterator[tuple[int, datetime, Any]]:
+    """
+    Lê o log em ordem, devolvendo (tipo, timestamp, dados decodificados).
+    Um registro final truncado (processo morto no meio da escrita) é ignorado.
+    """
+    data = memoryview(Path(path).read_bytes())
+    if bytes(data[: len(MAGIC)]) != MAGIC:
+        raise ValueError(f"{path} não é um log do recorder (magic inválido).")
+
+    pos = len(MAGIC)
+    while pos + _HEADER.size <= len(data):
+        kind, ts_us, size = _HEADER.unpack_from(data, pos)
+        start = pos + _HEADER.size
+        if start + size > len(data):
+            break
+        payload = data[start : start + size]
+        pos = start + size
+
+        if kind == REC_SNAPSHOT:
+            value: Any = orjson.loads(bytes(payload))
+        elif kind == REC_CYCLE:
+            value = None
+        elif kind == REC_PRICE:
+            symbol, p = _unpack_str(payload, 0)
+            (price,) = struct.unpack_from("<d", payload, p)
+            value = (symbol, price)
+        elif kind == REC_KLINES:
+            value = _decode_klines(payload)
+        elif kind == REC_ERROR:
+            (source,) = struct.unpack_from("<B", payload, 0)
+            symbol, p = _unpack_str(payload, 1)
+            error_type, p = _unpack_str(payload, p)
+            message, _ = _unpack_str(payload, p)
+            value = (source, symbol, error_type, message)
+        else:
+            raise ValueError(f"Tipo de registro desconhecido: {kind}")
+
+        yield kind, _from_us(ts_us), value
@@ -0,0 +1,256 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable, Optional
+
+import numpy as np
+
+from app.core.config import get_settings
+
+# ---------------------------------------------------------------------
+# Ring buffer de ticks (timestamp, preço) por símbolo, em arquivo mapeado
+# em memória: o engine escreve, a API (mesmo processo ou não) lê.
+#
+#   <market_data_dir>/ticks/<SYMBOL>.ticks
+#     cabeçalho i8[4]: seq, total gravado, capacidade, reservado
+#     ts  f8[capacidade]  (epoch em segundos)
+#     preço f8[capacidade]
+#
+# O seq funciona como seqlock: ímpar durante uma escrita. O leitor copia
+# o trecho que precisa e repete se o seq mudou no meio.
+# ---------------------------------------------------------------------
+_HEADER_LEN = 4
+_H_SEQ, _H_TOTAL, _H_CAPACITY = 0, 1, 2
+_HEADER_BYTES = 8 * _HEADER_LEN
+_READ_RETRIES = 5
+
+
+class TickRing:
+    """
+    Últimos `capacity` ticks de um símbolo. append é O(1) (uma posição do
+    anel); as consultas recortam a janela por busca binária no tempo e
+    calculam tudo vetorizado.
+    """
+
+    def __init__(self, path: Path, capacity: int, writable: bool) -> None:
+        self.path = path
+        if writable:
+            self._create_or_open(capacity)
+        self._map(writable)
+
+    def _create_or_open(self, capacity: int) -> None:
+        size = _HEADER_BYTES + 16 * capacity
+        if self.path.exists() and self.path.stat().st_size == size:
+            header = np.memmap(self.path, dtype="<i8", mode="r", shape=(_HEADER_LEN,))
+            if int(header[_H_CAPACITY]) == capacity:
+                return
+        # novo (ou tamanho mudou na configuração): recomeça o histórico num
+        # arquivo novo; leitores com o antigo mapeado percebem pelo inode
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "wb") as f:
+            f.truncate(size)
+        header = np.memmap(tmp, dtype="<i8", mode="r+", shape=(_HEADER_LEN,))
+        header[_H_CAPACITY] = capacity
+        header.flush()
+        del header
+        os.replace(tmp, self.path)
+
+    def _map(self, writable: bool) -> None:
+        mode = "r+" if writable else "r"
+        self.inode = os.stat(self.path).st_ino
+        self._header = np.memmap(self.path, dtype="<i8", mode=mode, shape=(_HEADER_LEN,))
+        self.capacity = int(self._header[_H_CAPACITY])
+        self._ts = np.memmap(
+            self.path, dtype="<f8", mode=mode, offset=_HEADER_BYTES, shape=(self.capacity,)
+        )
+        self._price = np.memmap(
+            self.path,
+            dtype="<f8",
+            mode=mode,
+            offset=_HEADER_BYTES + 8 * self.capacity,
+            shape=(self.capacity,),
+        )
+
+    @property
+    def total(self) -> int:
+        return int(self._header[_H_TOTAL])
+
+    def append(self, ts: float, price: float) -> None:
+        header = self._header
+        total = int(header[_H_TOTAL])
+        slot = total % self.capacity
+        header[_H_SEQ] += 1  # ímpar: escrita em andamento
+        self._ts[slot] = ts
+        self._price[slot] = price
+        header[_H_TOTAL] = total + 1
+        header[_H_SEQ] += 1
+
+    def snapshot(self) -> tuple[np.ndarray, np.ndarray]:
+        """Cópia (ts, preço) em ordem cronológica, consistente com o escritor."""
+        for _ in range(_READ_RETRIES):
+            seq = int(self._header[_H_SEQ])
+            if seq % 2:
+                time.sleep(0)
+                continue
+            total = int(self._header[_H_TOTAL])
+            n = min(total, self.capacity)
+            start = total % self.capacity if total > self.capacity else 0
+            order = np.r_[start:n, 0:start] if start else slice(0, n)
+            ts = np.array(self._ts[order])
+            price = np.array(self._price[order])
+            if int(self._header[_H_SEQ]) == seq:
+                return ts, price
+        return np.empty(0), np.empty(0)
+
+    def is_stale(self) -> bool:
+        """O escritor recriou o arquivo (outra capacidade): reabrir."""
+        try:
+            return os.stat(self.path).st_ino != self.inode
+        except FileNotFoundError:
+            return True
+
+
+def window_stats(ts: np.ndarray, price: np.ndarray, now: float) -> dict:
+    """
+    Estatísticas de uma janela de ticks. O ticker de preço não traz volume,
+    então a média ponderada é por tempo (TWAP: cada preço vale até o próximo
+    tick). Volatilidade = desvio padrão dos log-retornos entre ticks (%).
+    """
+    n = len(price)
+    if n == 0:
+        return {"count": 0}
+    held = np.diff(np.append(ts, max(now, ts[-1])))
+    total_time = float(held.sum())
+    twap = float(np.dot(price, held) / total_time) if total_time > 0 else float(price.mean())
+    returns = np.diff(np.log(price)) if n > 1 else np.empty(0)
+    return {
+        "count": n,
+        "first_ts": float(ts[0]),
+        "last_ts": float(ts[-1]),
+        "first": float(price[0]),
+        "last": float(price[-1]),
+        "min": float(price.min()),
+        "max": float(price.max()),
+        "mean": float(price.mean()),
+        "twap": twap,
+        "change_pct": float((price[-1] / price[0] - 1.0) * 100.0),
+        "volatility_pct": float(returns.std(ddof=1) * 100.0) if len(returns) > 1 else None,
+    }
+
+
+class TickStore:
+    """
+    Anéis por símbolo, abertos sob demanda. Só os anéis de escrita (engine)
+    contam para tick_buffer_max_symbols; leitores (API) mapeiam arquivos
+    que já existem, com um limite próprio e descartável: consultas a
+    símbolos quaisquer nunca tiram a vaga de um símbolo do engine.
+    """
+
+    def __init__(self, root: Path, capacity: int, max_symbols: int) -> None:
+        self.root = root
+        self.capacity = max(2, capacity)
+        self.max_symbols = max_symbols
+        self._rings: dict[str, TickRing] = {}
+        self._writable: set[str] = set()
+        self._rejected: set[str] = set()
+        self._lock = threading.Lock()
+
+    def _path(self, symbol: str) -> Path:
+        return self.root / f"{symbol}.ticks"
+
+    def _usable(self, symbol: str, ring: TickRing, writable: bool) -> bool:
+        if symbol in self._writable:
+            return True
+        return not writable and not ring.is_stale()
+
+    def _ring(self, symbol: str, writable: bool) -> Optional[TickRing]:
+        symbol = symbol.upper().strip()
+        if not symbol.isalnum():
+            return None  # vira nome de arquivo: nada de caminhos vindos da URL
+        ring = self._rings.get(symbol)
+        if ring is not None and self._usable(symbol, ring, writable):
+            return ring
+        with self._lock:
+            ring = self._rings.get(symbol)
+            if ring is not None and self._usable(symbol, ring, writable):
+                return ring
+            if writable:
+                if len(self._writable) >= self.max_symbols:
+                    if symbol not in self._rejected:
+                        self._rejected.add(symbol)
+                        print(
+                            f"[ENGINE] Ring buffer de ticks cheio ({self.max_symbols} símbolos): "
+                            f"ticks de {symbol} não serão gravados."
+                        )
+                    return None
+            else:
+                if not self._path(symbol).exists():
+                    return None
+                readers = [name for name in self._rings if name not in self._writable]
+                if len(readers) >= self.max_symbols:
+                    # o mais antigo sai (só mapeamento; o arquivo continua)
+                    del self._rings[readers[0]]
+            ring = TickRing(self._path(symbol), self.capacity, writable)
+            self._rings[symbol] = ring
+            if writable:
+                self._writable.add(symbol)
+            return ring
+
+    def open(self, symbol: str) -> bool:
+        """Abre (criando se preciso) o anel de escrita do símbolo."""
+        return self._ring(symbol, writable=True) is not None
+
+    def append(self, symbol: str, price: float, ts: Optional[float] = None) -> None:
+        ring = self._ring(symbol, writable=True)
+        if ring is not None:
+            ring.append(time.time() if ts is None else ts, price)
+
+    def last(self, symbol: str) -> Optional[tuple[float, float]]:
+        """(ts, preço) do tick mais recente do símbolo."""
+        ring = self._ring(symbol, writable=False)
+        if ring is None:
+            return None
+        ts, price = ring.snapshot()
+        if not len(ts):
+            return None
+        return float(ts[-1]), float(price[-1])
+
+    def stats(self, symbol: str, windows: Iterable[float]) -> Optional[dict]:
+        """Estatísticas do símbolo para cada janela (segundos)."""
+        ring = self._ring(symbol, writable=False)
+        if ring is None:
+            return None
+        ts, price = ring.snapshot()
+        now = time.time()
+        out: dict = {
+            "symbol": symbol.upper().strip(),
+            "capacity": ring.capacity,
+            "total_ticks": ring.total,
+            "last": (
+                {"ts": float(ts[-1]), "price": float(price[-1]), "age_seconds": now - float(ts[-1])}
+                if len(ts)
+                else None
+            ),
+            "windows": {},
+        }
+        for seconds in windows:
+            lo = int(np.searchsorted(ts, now - seconds, "left"))
+            out["windows"][f"{int(seconds)}s"] = window_stats(ts[lo:], price[lo:], now)
+        return out
+
+
+@lru_cache
+def get_tick_store() -> Optional[TickStore]:
+    settings = get_settings()
+    if not settings.tick_buffer_enabled:
+        return None
+    return TickStore(
+        Path(settings.market_data_dir) / "ticks",
+        capacity=settings.tick_buffer_size,
+        max_symbols=settings.tick_buffer_max_symbols,
+    )
@@ -1,3 +1,6 @@
 from .bot import Bot  # noqa: F401
 from .trade import Trade  # noqa: F401
 from .indicator import Indicator  # noqa: F401
+from .stats import BotStats, GlobalStats, TradeRollup  # noqa: F401
+from .order import BotOrder  # noqa: F401
+from .system import EventOutbox, JournalCursor, ResourceVersion, SystemState  # noqa: F401
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Optional
+
+from sqlmodel import Field, SQLModel
+
+# Ordem ainda não resolvida (o bot não recebe novas decisões enquanto houver uma)
+ORDER_OPEN_STATUSES = ("pending", "submitted")
+
+
+class BotOrderBase(SQLModel):
+    bot_id: int = Field(foreign_key="bot.id", index=True)
+    symbol: str = Field(description="Par negociado, ex: BTCUSDT")
+    side: str = Field(description="BUY ou SELL")
+    type: str = Field(default="MARKET")
+    reason: Optional[str] = Field(
+        default=None,
+        description="Motivo da ordem (take_profit, stop_loss_triggered, manual_close...)",
+    )
+    client_order_id: str = Field(
+        unique=True,
+        description="newClientOrderId enviado à Binance (idempotência em reenvios)",
+    )
+    quantity: Optional[float] = Field(default=None, description="Qtd. pedida (moeda base)")
+    quote_order_qty: Optional[float] = Field(default=None, description="Valor pedido em USDT")
+
+    status: str = Field(
+        default="pending",
+        index=True,
+        description="pending, submitted, filled, expired, rejected, error",
+    )
+    exchange_order_id: Optional[int] = Field(default=None)
+    executed_qty: float = Field(default=0.0)
+    cumm_quote_qty: float = Field(default=0.0)
+    avg_price: Optional[float] = Field(default=None)
+    trade_id: Optional[int] = Field(default=None, description="Trade gerado pelo fill")
+    error: Optional[str] = Field(default=None)
+    attempts: int = Field(default=0, description="Envios feitos à Binance")
+    latency_ms: Optional[float] = Field(
+        default=None,
+        description="Ida e volta do envio que a Binance confirmou (ms)",
+    )
+
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    submitted_at: Optional[datetime] = Field(default=None)
+    completed_at: Optional[datetime] = Field(default=None)
+
+
+class BotOrder(BotOrderBase, table=True):
+    __tablename__ = "bot_order"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+
+
+class BotOrderRead(BotOrderBase):
+    id: int
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Optional
+
+from sqlmodel import Field, SQLModel
+
+
+class TradeStatsBase(SQLModel):
+    """
+    Agregados de trades mantidos incrementalmente (ver app/stats/service.py).
+    """
+
+    num_trades: int = Field(default=0)
+    num_buys: int = Field(default=0)
+    num_sells: int = Field(default=0)
+    realized_pnl: float = Field(default=0.0, description="Soma do P/L realizado")
+    total_fees_usdt: float = Field(default=0.0, description="Soma das taxas em USDT")
+    last_trade_at: Optional[datetime] = Field(
+        default=None,
+        description="Momento do trade mais recente",
+    )
+
+
+class BotStats(TradeStatsBase, table=True):
+    """
+    Agregados por bot, atualizados na mesma transação de cada insert em Trade.
+    """
+
+    __tablename__ = "bot_stats"
+
+    bot_id: int = Field(foreign_key="bot.id", primary_key=True)
+
+
+class GlobalStats(TradeStatsBase, table=True):
+    """
+    Rollup global (linha única, id = 1) somando todos os trades.
+    """
+
+    __tablename__ = "global_stats"
+
+    id: int = Field(default=1, primary_key=True)
+
+
+class TradeRollup(SQLModel, table=True):
+    """
+    Buckets de tempo (minuto/hora/dia) com P/L, taxas, nº de trades e volume,
+    mantidos incrementalmente a cada trade (ver app/stats/rollups.py).
+
+    bot_id = 0 guarda o rollup global (todos os bots).
+    """
+
+    __tablename__ = "trade_rollup"
+
+    bucket: str = Field(primary_key=True, description="minute / hour / day")
+    bot_id: int = Field(primary_key=True, description="0 = global")
+    bucket_start: datetime = Field(primary_key=True, description="Início do bucket (UTC)")
+
+    num_trades: int = Field(default=0)
+    realized_pnl: float = Field(default=0.0)
+    fees_usdt: float = Field(default=0.0)
+    quote_volume: float = Field(default=0.0, description="Volume negociado em USDT")
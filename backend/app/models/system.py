@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Optional
+
+from sqlmodel import Field, SQLModel
+
+
+class SystemState(SQLModel, table=True):
+    """
+    Estado compartilhado entre processos (API e engine), chave -> valor JSON.
+    Ex.: system_running, lease do engine.
+    """
+
+    __tablename__ = "system_state"
+
+    key: str = Field(primary_key=True)
+    value: str = Field(description="Valor serializado em JSON")
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class EventOutbox(SQLModel, table=True):
+    """
+    Eventos/versões gravados pelo writer na mesma transação das mudanças,
+    para que outros processos (workers da API) repassem aos seus clientes
+    (ver app/core/outbox.py).
+    """
+
+    __tablename__ = "event_outbox"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    origin: str = Field(description="BOOT_ID do processo que gravou")
+    kind: str = Field(description="Tipo do evento, ou 'changed' (recursos alterados)")
+    payload: str = Field(description="Dados do evento em JSON")
+    created_at: datetime = Field(default_factory=datetime.utcnow, index=True)
+
+
+class JournalCursor(SQLModel, table=True):
+    """
+    Último seq do journal de trades de um engine já projetado no banco
+    (ver app/engine/journal.py). Gravado na mesma transação da projeção.
+    """
+
+    __tablename__ = "journal_cursor"
+
+    key: str = Field(primary_key=True, description="Nome do engine")
+    seq: int = Field(default=0)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class ResourceVersion(SQLModel, table=True):
+    """
+    Versão de cada recurso (bots, trades...), incrementada pelo writer na
+    mesma transação das mudanças. Base dos ETags: todos os processos leem
+    o mesmo número (ver app/core/versions.py).
+    """
+
+    __tablename__ = "resource_version"
+
+    name: str = Field(primary_key=True)
+    version: int = Field(default=0)
@@ -3,6 +3,7 @@ from __future__ import annotations
 from datetime import datetime
 from typing import Optional
 
+from sqlalchemy import Index
 from sqlmodel import Field, SQLModel
 
 
@@ -36,6 +37,12 @@ class TradeBase(SQLModel):
 
 
 class Trade(TradeBase, table=True):
+    # Índices compostos para paginação keyset (ver app/api/pagination.py)
+    __table_args__ = (
+        Index("ix_trade_bot_id_id", "bot_id", "id"),
+        Index("ix_trade_symbol_id", "symbol", "id"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     created_at: datetime = Field(
         default_factory=datetime.utcnow,
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+from datetime import datetime
+from sqlalchemy import delete
+from sqlmodel import Session, select
+
+from app.models.stats import TradeRollup
+from app.models.trade import Trade
+
+
+BUCKETS = ("minute", "hour", "day")
+GLOBAL_BOT_ID = 0
+
+
+def bucket_start(dt: datetime, bucket: str) -> datetime:
+    """Trunca o datetime no início do bucket."""
+    if bucket == "minute":
+        return dt.replace(second=0, microsecond=0)
+    if bucket == "hour":
+        return dt.replace(minute=0, second=0, microsecond=0)
+    if bucket == "day":
+        return dt.replace(hour=0, minute=0, second=0, microsecond=0)
+    raise ValueError(f"Bucket inválido: {bucket}")
+
+
+def _trade_values(trade: Trade) -> tuple[float, float, float]:
+    pnl = float(trade.realized_pnl or 0.0)
+    fee = (
+        float(trade.fee_amount)
+        if trade.fee_amount is not None and (trade.fee_asset or "").upper() == "USDT"
+        else 0.0
+    )
+    volume = float(trade.quote_qty or 0.0)
+    return pnl, fee, volume
+
+
+def _bump(row: TradeRollup, pnl: float, fee: float, volume: float) -> None:
+    row.num_trades += 1
+    row.realized_pnl += pnl
+    row.fees_usdt += fee
+    row.quote_volume += volume
+
+
+def apply_trade_to_rollups(session: Session, trade: Trade) -> None:
+    """
+    Soma o trade nos buckets minuto/hora/dia do bot e do global.
+    Roda na mesma transação do insert do trade.
+    """
+    created_at = trade.created_at or datetime.utcnow()
+    pnl, fee, volume = _trade_values(trade)
+
+    for bucket in BUCKETS:
+        start = bucket_start(created_at, bucket)
+        for bot_id in (trade.bot_id, GLOBAL_BOT_ID):
+            row = session.get(TradeRollup, (bucket, bot_id, start))
+            if row is None:
+                row = TradeRollup(bucket=bucket, bot_id=bot_id, bucket_start=start)
+            _bump(row, pnl, fee, volume)
+            session.add(row)
+
+
+def rebuild_rollups(session: Session) -> int:
+    """
+    Recalcula trade_rollup a partir da tabela trade (backfill).
+
+    Lê os trades em streaming (yield_per); a memória é proporcional ao
+    número de buckets, não ao número de trades. Retorna quantos buckets
+    foram gravados.
+    """
+    session.execute(delete(TradeRollup))
+
+    trades = session.exec(
+        select(Trade).order_by(Trade.id).execution_options(yield_per=1000)
+    )
+
+    rows: dict[tuple[str, int, datetime], TradeRollup] = {}
+    for trade in trades:
+        created_at = trade.created_at or datetime.utcnow()
+        pnl, fee, volume = _trade_values(trade)
+        for bucket in BUCKETS:
+            start = bucket_start(created_at, bucket)
+            for bot_id in (trade.bot_id, GLOBAL_BOT_ID):
+                key = (bucket, bot_id, start)
+                row = rows.get(key)
+                if row is None:
+                    row = rows[key] = TradeRollup(
+                        bucket=bucket, bot_id=bot_id, bucket_start=start
+                    )
+                _bump(row, pnl, fee, volume)
+
+    session.add_all(rows.values())
+    session.flush()
+    return len(rows)
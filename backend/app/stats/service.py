@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+from sqlalchemy import case, delete, func
+from sqlmodel import Session, select
+
+from app.core.versions import mark_changed
+from app.models.stats import BotStats, GlobalStats, TradeRollup, TradeStatsBase
+from app.models.trade import Trade
+from app.stats.rollups import GLOBAL_BOT_ID, apply_trade_to_rollups, rebuild_rollups
+
+
+GLOBAL_STATS_ID = 1
+
+
+def _apply_trade(stats: TradeStatsBase, trade: Trade) -> None:
+    stats.num_trades += 1
+    if trade.side == "BUY":
+        stats.num_buys += 1
+    elif trade.side == "SELL":
+        stats.num_sells += 1
+
+    if trade.realized_pnl is not None:
+        stats.realized_pnl += float(trade.realized_pnl)
+
+    if trade.fee_amount is not None and (trade.fee_asset or "").upper() == "USDT":
+        stats.total_fees_usdt += float(trade.fee_amount)
+
+    if trade.created_at and (
+        stats.last_trade_at is None or trade.created_at > stats.last_trade_at
+    ):
+        stats.last_trade_at = trade.created_at
+
+
+def record_trade(session: Session, trade: Trade) -> None:
+    """
+    Registra o trade na sessão e atualiza bot_stats + global_stats
+    + trade_rollup na MESMA transação (quem commita é o chamador / writer).
+    """
+    session.add(trade)
+
+    bot_stats = session.get(BotStats, trade.bot_id)
+    if bot_stats is None:
+        bot_stats = BotStats(bot_id=trade.bot_id)
+    _apply_trade(bot_stats, trade)
+    session.add(bot_stats)
+
+    global_stats = session.get(GlobalStats, GLOBAL_STATS_ID)
+    if global_stats is None:
+        global_stats = GlobalStats(id=GLOBAL_STATS_ID)
+    _apply_trade(global_stats, trade)
+    session.add(global_stats)
+
+    apply_trade_to_rollups(session, trade)
+
+
+def remove_bot_stats(session: Session, bot_id: int) -> None:
+    """
+    Tira os trades do bot dos agregados: subtrai bot_stats do global_stats
+    e cada bucket do bot do bucket global, e apaga as linhas do bot.
+    Chamar na mesma transação que apaga os trades (last_trade_at global é
+    recalculado sobre os trades que restam).
+    """
+    bot_stats = session.get(BotStats, bot_id)
+    global_stats = session.get(GlobalStats, GLOBAL_STATS_ID)
+    if bot_stats is not None:
+        if global_stats is not None:
+            global_stats.num_trades -= bot_stats.num_trades
+            global_stats.num_buys -= bot_stats.num_buys
+            global_stats.num_sells -= bot_stats.num_sells
+            global_stats.realized_pnl -= bot_stats.realized_pnl
+            global_stats.total_fees_usdt -= bot_stats.total_fees_usdt
+            global_stats.last_trade_at = session.exec(
+                select(func.max(Trade.created_at)).where(Trade.bot_id != bot_id)
+            ).one()
+            session.add(global_stats)
+        session.delete(bot_stats)
+
+    bot_rows = session.exec(select(TradeRollup).where(TradeRollup.bot_id == bot_id)).all()
+    for row in bot_rows:
+        total = session.get(TradeRollup, (row.bucket, GLOBAL_BOT_ID, row.bucket_start))
+        if total is not None:
+            total.num_trades -= row.num_trades
+            total.realized_pnl -= row.realized_pnl
+            total.fees_usdt -= row.fees_usdt
+            total.quote_volume -= row.quote_volume
+            if total.num_trades <= 0:
+                session.delete(total)
+            else:
+                session.add(total)
+        session.delete(row)
+
+
+def trade_aggregate_columns():
+    """
+    Colunas agregadas (COUNT/SUM com CASE/MAX) na mesma ordem dos campos
+    de TradeStatsBase: num_trades, num_buys, num_sells, realized_pnl,
+    total_fees_usdt, last_trade_at.
+    """
+    fee_usdt = case(
+        (func.upper(Trade.fee_asset) == "USDT", func.coalesce(Trade.fee_amount, 0.0)),
+        else_=0.0,
+    )
+    return (
+        func.count(Trade.id),
+        func.coalesce(func.sum(case((Trade.side == "BUY", 1), else_=0)), 0),
+        func.coalesce(func.sum(case((Trade.side == "SELL", 1), else_=0)), 0),
+        func.coalesce(func.sum(Trade.realized_pnl), 0.0),
+        func.coalesce(func.sum(fee_usdt), 0.0),
+        func.max(Trade.created_at),
+    )
+
+
+def rebuild_stats(session: Session) -> int:
+    """
+    Recalcula bot_stats, global_stats e trade_rollup a partir da tabela
+    trade (backfill).
+
+    Os agregados por bot usam um único GROUP BY no banco.
+    Retorna quantos bots foram agregados.
+    """
+    session.execute(delete(BotStats))
+    session.execute(delete(GlobalStats))
+    mark_changed(session, "trades")
+
+    rows = session.exec(
+        select(Trade.bot_id, *trade_aggregate_columns()).group_by(Trade.bot_id)
+    ).all()
+
+    global_stats = GlobalStats(id=GLOBAL_STATS_ID)
+    for bot_id, n, buys, sells, pnl, fees, last_at in rows:
+        session.add(
+            BotStats(
+                bot_id=bot_id,
+                num_trades=n,
+                num_buys=buys,
+                num_sells=sells,
+                realized_pnl=pnl,
+                total_fees_usdt=fees,
+                last_trade_at=last_at,
+            )
+        )
+        global_stats.num_trades += n
+        global_stats.num_buys += buys
+        global_stats.num_sells += sells
+        global_stats.realized_pnl += pnl
+        global_stats.total_fees_usdt += fees
+        if last_at and (
+            global_stats.last_trade_at is None or last_at > global_stats.last_trade_at
+        ):
+            global_stats.last_trade_at = last_at
+
+    session.add(global_stats)
+    rebuild_rollups(session)
+    session.flush()
+    return len(rows)
+
+
+def stats_need_backfill(session: Session) -> bool:
+    """True se existem trades mas os agregados (rollup global/buckets) ainda não foram criados."""
+    if (
+        session.get(GlobalStats, GLOBAL_STATS_ID) is not None
+        and session.exec(select(TradeRollup.bot_id).limit(1)).first() is not None
+    ):
+        return False
+    return session.exec(select(Trade.id).limit(1)).first() is not None
+
+
+if __name__ == "__main__":
+    # Backfill manual: python -m app.stats.service
+    from app.db.base import init_db
+    from app.db.writer import run_write
+
+    init_db()
+    total = run_write(rebuild_stats)
+    print(f"[STATS] bot_stats reconstruído para {total} bot(s).")
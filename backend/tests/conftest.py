@@ -0,0 +1,18 @@
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Banco, journal e dados de mercado isolados, definidos antes de qualquer
+# import do app (settings e engine do SQLAlchemy são criados no import).
+_DATA_DIR = Path(tempfile.mkdtemp(prefix="bbot-tests-"))
+os.environ["DATABASE_URL"] = f"sqlite:///{_DATA_DIR / 'bbot.db'}"
+os.environ["TRADE_JOURNAL_DIR"] = str(_DATA_DIR / "journal")
+os.environ["MARKET_DATA_DIR"] = str(_DATA_DIR / "market")
+os.environ["SWEEPS_DIR"] = str(_DATA_DIR / "sweeps")
+os.environ["MARKET_RECORDER_ENABLED"] = "false"
+os.environ["APP_MODE"] = "simulation"
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import pytest
+from sqlmodel import Session
+
+from app.core import events, versions
+from app.db.base import init_db
+from app.db.session import engine
+from app.db.writer import run_write
+from app.engine.records import BotDiff, apply_bot_diffs, bot_snapshot, stale_diffs
+from app.models import Bot
+
+
+@pytest.fixture
+def bot_ids():
+    init_db()
+
+    def _setup(session: Session) -> list[int]:
+        bots = [
+            Bot(name=f"diff{i}", symbol="BTCUSDT", saldo_usdt_limit=100.0, valor_de_trade_usdt=10.0)
+            for i in range(3)
+        ]
+        session.add_all(bots)
+        session.flush()
+        return [b.id for b in bots]
+
+    return run_write(_setup)
+
+
+def test_apply_bot_diffs_updates_rows_and_queues_events(bot_ids):
+    a, b, c = bot_ids
+    version = versions.get_version("bots")
+    diffs = [
+        # dois conjuntos de colunas -> dois UPDATE executemany
+        BotDiff(a, {"valor_inicial": 101.0}),
+        BotDiff(b, {"has_open_position": True, "qty_moeda": 0.5, "last_buy_price": 20.0}),
+        BotDiff(c, {"valor_inicial": 99.0}),
+    ]
+
+    def _apply(session: Session) -> tuple:
+        loaded = session.get(Bot, b)
+        assert not loaded.has_open_position
+        before = events.pending_count(session)
+        applied = apply_bot_diffs(session, diffs)
+        # Bot já carregado na sessão não fica com o valor antigo
+        return applied, events.pending_count(session) - before, loaded.qty_moeda
+
+    applied, queued, qty = run_write(_apply)
+    assert (applied, queued, qty) == (3, 3, 0.5)
+    assert versions.get_version("bots") > version
+
+    with Session(engine) as session:
+        bots = {bot_id: session.get(Bot, bot_id) for bot_id in bot_ids}
+        assert bots[a].valor_inicial == 101.0
+        assert bots[c].valor_inicial == 99.0
+        assert bots[b].has_open_position and bots[b].last_buy_price == 20.0
+        assert bots[a].qty_moeda == 0 and not bots[a].has_open_position
+
+
+def test_stale_diffs(bot_ids):
+    a, b, _ = bot_ids
+    with Session(engine) as session:
+        before = {bot_id: bot_snapshot(session.get(Bot, bot_id))._asdict() for bot_id in (a, b)}
+
+    run_write(lambda session: apply_bot_diffs(session, [BotDiff(a, {"saldo_usdt_livre": 1.0})]))
+
+    diffs = [
+        BotDiff(a, {"valor_inicial": 1.0}, before=before[a]),  # decidido antes da mudança
+        BotDiff(b, {"valor_inicial": 1.0}, before=before[b]),
+        BotDiff(-1, {"valor_inicial": 1.0}, before=before[b]),  # bot não existe mais
+        BotDiff(a, {"valor_inicial": 1.0}),  # sem before: não é conferido
+    ]
+    with Session(engine) as session:
+        assert stale_diffs(session, diffs) == {a, -1}
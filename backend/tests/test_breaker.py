@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import httpx
+import pytest
+
+from app.binance import breaker as breaker_module
+from app.binance.breaker import CircuitBreaker, CircuitOpenError
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(breaker_module.time, "monotonic", lambda: now[0])
+    return now
+
+
+def _call(breaker: CircuitBreaker, exc: BaseException = None, budgeted: bool = False) -> None:
+    with breaker.guard(budgeted=budgeted):
+        if exc is not None:
+            raise exc
+
+
+def _fail(breaker: CircuitBreaker) -> None:
+    with pytest.raises(httpx.ConnectError):
+        _call(breaker, httpx.ConnectError("down"))
+
+
+def _status(code: int) -> httpx.HTTPStatusError:
+    request = httpx.Request("GET", "https://api.binance.com/api/v3/ticker/price")
+    return httpx.HTTPStatusError("erro", request=request, response=httpx.Response(code, request=request))
+
+
+def test_opens_after_threshold_then_half_open_and_closes(clock):
+    breaker = CircuitBreaker("t", failure_threshold=3, base_backoff=2.0, max_backoff=60.0)
+    _fail(breaker)
+    _fail(breaker)
+    assert breaker.state == "closed"
+    _fail(breaker)
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        _call(breaker)
+
+    clock[0] += 2.0
+    assert breaker.state == "half_open"
+    with breaker.guard():
+        # só a chamada de teste passa enquanto ela não termina
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+    assert breaker.state == "closed"
+    assert breaker.to_dict()["consecutive_failures"] == 0
+
+
+def test_failed_probe_doubles_backoff(clock):
+    breaker = CircuitBreaker("t", failure_threshold=1, base_backoff=2.0, max_backoff=5.0)
+    _fail(breaker)
+    clock[0] += 2.0
+    _fail(breaker)  # teste do half-open falhou
+    assert breaker.to_dict()["open_seconds_remaining"] == 4.0
+    clock[0] += 4.0
+    _fail(breaker)
+    assert breaker.to_dict()["open_seconds_remaining"] == 5.0  # max_backoff
+
+
+def test_what_counts_as_failure(clock):
+    breaker = CircuitBreaker("t", failure_threshold=1)
+    # 4xx comum: o endpoint respondeu
+    with pytest.raises(httpx.HTTPStatusError):
+        _call(breaker, _status(400))
+    assert breaker.state == "closed"
+
+    with pytest.raises(httpx.HTTPStatusError):
+        _call(breaker, _status(429))
+    assert breaker.state == "open"
+
+
+def test_budgeted_timeout_is_not_a_failure(clock):
+    breaker = CircuitBreaker("t", failure_threshold=1)
+    with pytest.raises(httpx.ReadTimeout):
+        _call(breaker, httpx.ReadTimeout("orçamento"), budgeted=True)
+    assert breaker.state == "closed"
+
+    with pytest.raises(httpx.ReadTimeout):
+        _call(breaker, httpx.ReadTimeout("timeout do cliente"))
+    assert breaker.state == "open"
+
+    # timeout do orçamento na chamada de teste libera o half-open sem reabrir
+    clock[0] += 2.0
+    with pytest.raises(httpx.ReadTimeout):
+        _call(breaker, httpx.ReadTimeout("orçamento"), budgeted=True)
+    assert breaker.state == "half_open"
+    _call(breaker)
+    assert breaker.state == "closed"
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+from sqlalchemy import delete
+from sqlmodel import Session
+
+from app.db.base import init_db
+from app.db.session import engine
+from app.db.writer import DbWriter, run_write
+from app.models.system import SystemState
+
+
+@pytest.fixture
+def writer():
+    init_db()
+
+    def _reset(session: Session) -> None:
+        session.execute(delete(SystemState).where(SystemState.key.like("writer-test-%")))
+
+    run_write(_reset)
+    # janela larga: as mutações enviadas em seguida caem no mesmo lote
+    w = DbWriter(batch_size=64, batch_window_ms=500.0)
+    yield w
+    w.stop()
+
+
+def _put(key: str):
+    def _mutation(session: Session) -> str:
+        session.add(SystemState(key=key, value=json.dumps(key)))
+        session.flush()
+        return key
+
+    return _mutation
+
+
+def _visible(key: str) -> bool:
+    with Session(engine) as session:
+        return session.get(SystemState, key) is not None
+
+
+def test_batch_is_invisible_until_commit_and_failure_is_isolated(writer):
+    def _fails(session: Session) -> None:
+        session.add(SystemState(key="writer-test-b", value="null"))
+        session.flush()
+        raise RuntimeError("falha simulada")
+
+    def _peek(session: Session) -> bool:
+        # outra conexão, no meio do lote: nada do lote foi commitado ainda
+        return _visible("writer-test-a")
+
+    futures = [
+        writer.submit(_put("writer-test-a")),
+        writer.submit(_fails),
+        writer.submit(_peek),
+        writer.submit(_put("writer-test-c")),
+    ]
+
+    assert futures[0].result(5) == "writer-test-a"
+    with pytest.raises(RuntimeError):
+        futures[1].result(5)
+    assert futures[2].result(5) is False
+    assert futures[3].result(5) == "writer-test-c"
+
+    # depois do commit: só o SAVEPOINT da mutação que falhou foi desfeito
+    assert _visible("writer-test-a")
+    assert not _visible("writer-test-b")
+    assert _visible("writer-test-c")
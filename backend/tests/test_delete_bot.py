@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import delete
+from sqlmodel import Session, select
+
+from app.api.routes_bots import delete_bot
+from app.db.base import init_db
+from app.db.session import engine
+from app.db.writer import run_write
+from app.models import Bot, Trade
+from app.models.order import BotOrder
+from app.models.stats import BotStats, GlobalStats, TradeRollup
+from app.stats.service import GLOBAL_STATS_ID, record_trade, rebuild_stats
+
+
+def _trade(bot_id: int, side: str, created_at: datetime, pnl=None) -> Trade:
+    return Trade(
+        bot_id=bot_id,
+        symbol="BTCUSDT",
+        side=side,
+        price=100.0,
+        qty=1.0,
+        quote_qty=100.0,
+        is_simulated=True,
+        realized_pnl=pnl,
+        fee_amount=0.1,
+        fee_asset="USDT",
+        created_at=created_at,
+    )
+
+
+@pytest.fixture
+def bots():
+    """Dois bots com trades; o segundo tem o trade mais recente."""
+    init_db()
+
+    def _setup(session: Session) -> tuple[int, int]:
+        for model in (Trade, BotOrder, BotStats, GlobalStats, TradeRollup, Bot):
+            session.execute(delete(model))
+        keep = Bot(name="fica", symbol="BTCUSDT", saldo_usdt_limit=100.0, valor_de_trade_usdt=10.0)
+        gone = Bot(name="sai", symbol="BTCUSDT", saldo_usdt_limit=100.0, valor_de_trade_usdt=10.0)
+        session.add(keep)
+        session.add(gone)
+        session.flush()
+        record_trade(session, _trade(keep.id, "BUY", datetime(2024, 1, 1, 10, 0)))
+        record_trade(session, _trade(keep.id, "SELL", datetime(2024, 1, 1, 10, 30), pnl=2.0))
+        record_trade(session, _trade(gone.id, "BUY", datetime(2024, 1, 1, 10, 5)))
+        record_trade(session, _trade(gone.id, "SELL", datetime(2024, 1, 1, 11, 0), pnl=-1.0))
+        return keep.id, gone.id
+
+    return run_write(_setup)
+
+
+def _aggregates(session: Session) -> tuple:
+    g = session.get(GlobalStats, GLOBAL_STATS_ID)
+    rollups = sorted(
+        (r.bucket, r.bot_id, r.bucket_start, r.num_trades, round(r.realized_pnl, 9),
+         round(r.fees_usdt, 9), round(r.quote_volume, 9))
+        for r in session.exec(select(TradeRollup)).all()
+    )
+    totals = (g.num_trades, g.num_buys, g.num_sells, round(g.realized_pnl, 9))
+    return (*totals, round(g.total_fees_usdt, 9), g.last_trade_at, rollups)
+
+
+def test_delete_bot_removes_trades_and_adjusts_global_stats(bots):
+    keep, gone = bots
+    delete_bot(gone)
+
+    with Session(engine) as session:
+        assert session.get(Bot, gone) is None
+        assert session.exec(select(Trade).where(Trade.bot_id == gone)).first() is None
+        assert session.get(BotStats, gone) is None
+        after = _aggregates(session)
+
+    # os agregados ficam iguais a um rebuild a partir dos trades que restaram
+    run_write(rebuild_stats)
+    with Session(engine) as session:
+        assert after == _aggregates(session)
+        assert after[0] == 2
+        assert after[5] == datetime(2024, 1, 1, 10, 30)
+
+
+def test_delete_bot_with_open_order_is_refused(bots):
+    _keep, gone = bots
+
+    def _order(session: Session) -> None:
+        session.add(
+            BotOrder(bot_id=gone, symbol="BTCUSDT", side="SELL", client_order_id="t-open")
+        )
+
+    run_write(_order)
+    with pytest.raises(HTTPException) as exc:
+        delete_bot(gone)
+    assert exc.value.status_code == 409
+
+    with Session(engine) as session:
+        assert session.get(Bot, gone) is not None
+        assert session.get(GlobalStats, GLOBAL_STATS_ID).num_trades == 4
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import pytest
+
+from app.binance.exchange_info import SymbolFilters, normalize_order
+
+BTCUSDT = SymbolFilters.from_exchange_info(
+    {
+        "symbol": "BTCUSDT",
+        "status": "TRADING",
+        "baseAsset": "BTC",
+        "quoteAsset": "USDT",
+        "quoteAssetPrecision": 2,
+        "filters": [
+            {"filterType": "PRICE_FILTER", "minPrice": "0.01", "maxPrice": "1000000.00", "tickSize": "0.01"},
+            {"filterType": "LOT_SIZE", "minQty": "0.00001", "maxQty": "9000.0", "stepSize": "0.00001"},
+            {"filterType": "MARKET_LOT_SIZE", "minQty": "0", "maxQty": "50.0", "stepSize": "0"},
+            {"filterType": "NOTIONAL", "minNotional": "5.00", "applyMinToMarket": True},
+        ],
+    }
+)
+
+
+def test_rounds_to_step_tick_and_quote_precision():
+    order = normalize_order(BTCUSDT, order_type="LIMIT", quantity=0.123456789, price=43210.126)
+    assert order.quantity == "0.12345"  # stepSize, para baixo
+    assert order.price == "43210.13"  # tickSize, mais próximo
+    assert order.quote_order_qty is None
+
+    order = normalize_order(BTCUSDT, order_type="MARKET", quote_order_qty=10.999)
+    assert order.quote_order_qty == "10.99"  # quote_precision, para baixo
+
+    # sem ruído binário do float: 0.3 não vira 0.29999
+    assert normalize_order(BTCUSDT, order_type="MARKET", quantity=0.3).quantity == "0.3"
+
+
+def test_lot_size_limits():
+    with pytest.raises(ValueError, match="abaixo do mínimo"):
+        normalize_order(BTCUSDT, order_type="MARKET", quantity=0.000009)
+    # MARKET_LOT_SIZE vale só para ordens a mercado
+    with pytest.raises(ValueError, match="acima do máximo 50"):
+        normalize_order(BTCUSDT, order_type="MARKET", quantity=60.0)
+    normalize_order(BTCUSDT, order_type="LIMIT", quantity=60.0, price=100.0)
+
+
+def test_min_notional():
+    with pytest.raises(ValueError, match="MIN_NOTIONAL"):
+        normalize_order(BTCUSDT, order_type="LIMIT", quantity=0.0001, price=40000.0)
+    normalize_order(BTCUSDT, order_type="LIMIT", quantity=0.0002, price=40000.0)
+
+    with pytest.raises(ValueError, match="MIN_NOTIONAL"):
+        normalize_order(BTCUSDT, order_type="MARKET", quote_order_qty=4.99)
+
+    # venda a mercado por quantidade: confere com o preço de referência
+    with pytest.raises(ValueError, match="MIN_NOTIONAL"):
+        normalize_order(BTCUSDT, order_type="MARKET", quantity=0.0001, reference_price=40000.0)
+    normalize_order(BTCUSDT, order_type="MARKET", quantity=0.0002, reference_price=40000.0)
+    # sem referência não há como estimar: a Binance decide
+    normalize_order(BTCUSDT, order_type="MARKET", quantity=0.0001)
+
+
+def test_min_notional_not_applied_to_market():
+    filters = SymbolFilters.from_exchange_info(
+        {
+            "symbol": "XYZUSDT",
+            "status": "TRADING",
+            "filters": [{"filterType": "MIN_NOTIONAL", "minNotional": "10", "applyToMarket": False}],
+        }
+    )
+    normalize_order(filters, order_type="MARKET", quote_order_qty=1.0)
+    with pytest.raises(ValueError, match="MIN_NOTIONAL"):
+        normalize_order(filters, order_type="LIMIT", quantity=1.0, price=1.0)
+
+
+def test_not_trading():
+    filters = SymbolFilters.from_exchange_info({"symbol": "OLDUSDT", "status": "BREAK"})
+    with pytest.raises(ValueError, match="não está em negociação"):
+        normalize_order(filters, order_type="MARKET", quantity=1.0)
@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+import io
+from datetime import datetime
+
+import pyarrow.parquet as pq
+
+from app.export.columnar import TRADE_COLUMNS, build_schema, iter_record_batches, stream_parquet
+
+
+def _partitions(total: int, batch: int) -> list[list[tuple]]:
+    rows = [
+        (i, 1, "BTCUSDT", "BUY", 100.0, 0.1, 10.0, None, None, None, True, None,
+         datetime(2024, 1, 1))
+        for i in range(total)
+    ]
+    return [rows[i : i + batch] for i in range(0, total, batch)]
+
+
+def test_parquet_row_groups_span_many_batches():
+    schema = build_schema(TRADE_COLUMNS)
+    batches = iter_record_batches(schema, _partitions(3500, 1000))
+    data = b"".join(stream_parquet(schema, batches, row_group_rows=1500))
+
+    parquet = pq.ParquetFile(io.BytesIO(data))
+    sizes = [parquet.metadata.row_group(i).num_rows for i in range(parquet.metadata.num_row_groups)]
+    assert sizes == [1500, 1500, 500]
+    assert parquet.read().column("id").to_pylist() == list(range(3500))
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.core import versions
+from app.core.http_cache import cached_json
+from app.db.base import init_db
+from app.db.session import engine
+from app.db.writer import run_write
+from app.models import Bot
+
+
+@pytest.fixture
+def client():
+    init_db()
+    calls = {"n": 0}
+    app = FastAPI()
+
+    @app.get("/bots")
+    def _bots(request: Request):
+        def _build():
+            calls["n"] += 1
+            return {"n": calls["n"]}
+
+        return cached_json(request, ("bots",), _build)
+
+    with TestClient(app) as c:
+        c.calls = calls
+        yield c
+
+
+def _touch_bots() -> None:
+    def _add(session: Session) -> None:
+        session.add(
+            Bot(name="etag", symbol="BTCUSDT", saldo_usdt_limit=10.0, valor_de_trade_usdt=1.0)
+        )
+
+    run_write(_add)
+
+
+def test_etag_304_and_change(client):
+    first = client.get("/bots")
+    etag = first.headers["etag"]
+    assert first.status_code == 200
+
+    again = client.get("/bots", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.headers["etag"] == etag
+    assert client.calls["n"] == 1
+
+    _touch_bots()
+    changed = client.get("/bots", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert client.calls["n"] == 2
+
+
+def test_etag_is_the_same_in_another_process(client, monkeypatch):
+    _touch_bots()
+    etag = client.get("/bots").headers["etag"]
+
+    # outro worker: versões em memória zeradas, carregadas do banco no boot
+    monkeypatch.setattr(versions, "_versions", {})
+    with Session(engine) as session:
+        versions.load_versions(session)
+    assert client.get("/bots").headers["etag"] == etag
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import numpy as np
+
+from app.marketdata.archive import KLINE_FIELDS, KlineArchive
+
+
+def _candles(start: int, n: int) -> dict[str, np.ndarray]:
+    open_time = (start + np.arange(n)) * 60_000
+    close = 100.0 + np.arange(start, start + n, dtype=float)
+    return {
+        "open_time": open_time,
+        "open": close - 0.5,
+        "high": close + 1.0,
+        "low": close - 1.0,
+        "close": close,
+        "volume": np.full(n, 2.0),
+        "close_time": open_time + 59_999,
+    }
+
+
+def test_append_is_idempotent(tmp_path):
+    archive = KlineArchive("btcusdt", "1m", root=tmp_path)
+    assert archive.append(_candles(0, 3)) == 3
+    assert archive.append(_candles(1, 4)) == 2  # 1 e 2 já gravados
+    assert archive.count == 5
+    assert archive.columns()["close"].tolist() == [100.0, 101.0, 102.0, 103.0, 104.0]
+
+
+def test_append_truncates_partial_tail(tmp_path):
+    archive = KlineArchive("BTCUSDT", "1m", root=tmp_path)
+    archive.append(_candles(0, 3))
+
+    # escrita interrompida: bytes a mais nas colunas, index.json não atualizado
+    for name, dtype in KLINE_FIELDS:
+        with open(archive.path / f"{name}.{dtype[1:]}", "ab") as f:
+            f.write(b"\xff" * 13)
+    assert archive.count == 3
+    assert archive.columns()["close"].tolist() == [100.0, 101.0, 102.0]
+
+    assert archive.append(_candles(3, 2)) == 2
+    for name, dtype in KLINE_FIELDS:
+        assert (archive.path / f"{name}.{dtype[1:]}").stat().st_size == 5 * 8
+    cols = archive.columns()
+    assert cols["open_time"].tolist() == [i * 60_000 for i in range(5)]
+    assert cols["close"].tolist() == [100.0, 101.0, 102.0, 103.0, 104.0]
@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import asyncio
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import delete
+from sqlmodel import Session
+
+from app.binance.async_client import BinanceAPIError
+from app.binance.exchange_info import SymbolFilters
+from app.db.base import init_db
+from app.db.session import engine
+from app.db.writer import run_write
+from app.engine import orders as orders_mod
+from app.engine.orders import OrderExecutor, apply_order_result
+from app.marketdata import ticks as ticks_mod
+from app.models import Bot, Trade
+from app.models.order import BotOrder
+from app.models.stats import BotStats, GlobalStats, TradeRollup
+
+FILTERS = SymbolFilters(
+    symbol="BTCUSDT",
+    status="TRADING",
+    base_asset="BTC",
+    quote_asset="USDT",
+    min_qty=Decimal("0.00001"),
+    step_size=Decimal("0.00001"),
+    min_notional=Decimal("5"),
+)
+
+
+@pytest.fixture
+def bot_id() -> int:
+    init_db()
+
+    def _setup(session: Session) -> int:
+        for model in (Trade, BotOrder, BotStats, GlobalStats, TradeRollup, Bot):
+            session.execute(delete(model))
+        bot = Bot(
+            name="orders",
+            symbol="BTCUSDT",
+            saldo_usdt_limit=100.0,
+            saldo_usdt_livre=100.0,
+            valor_de_trade_usdt=10.0,
+        )
+        session.add(bot)
+        session.flush()
+        return bot.id
+
+    return run_write(_setup)
+
+
+def _order(bot_id: int, side: str, status: str = "submitted", **fields) -> int:
+    def _add(session: Session) -> int:
+        order = BotOrder(
+            bot_id=bot_id,
+            symbol="BTCUSDT",
+            side=side,
+            client_order_id=f"t-{side}-{status}",
+            status=status,
+            **fields,
+        )
+        session.add(order)
+        session.flush()
+        return order.id
+
+    return run_write(_add)
+
+
+def _fill(qty: str, quote: str, commission: str, asset: str) -> dict:
+    return {
+        "orderId": 1,
+        "status": "FILLED",
+        "executedQty": qty,
+        "cummulativeQuoteQty": quote,
+        "fills": [{"commission": commission, "commissionAsset": asset}],
+    }
+
+
+def _apply(order_id: int, resp: dict):
+    return run_write(
+        lambda s: apply_order_result(s, order_id, resp, FILTERS, attempts=1, latency_ms=5.0)
+    )
+
+
+def test_buy_fee_in_base_asset_reduces_position(bot_id):
+    order_id = _order(bot_id, "BUY", quote_order_qty=10.0)
+    assert _apply(order_id, _fill("0.0002", "10", "0.0000002", "BTC")) is not None
+
+    with Session(engine) as session:
+        bot = session.get(Bot, bot_id)
+        assert bot.qty_moeda == pytest.approx(0.0002 - 0.0000002)
+        assert bot.saldo_usdt_livre == pytest.approx(90.0)
+        assert bot.last_buy_price == pytest.approx(50000.0)
+        assert session.get(BotOrder, order_id).status == "filled"
+    # idempotente: a mesma resposta de novo não gera outro trade
+    assert _apply(order_id, _fill("0.0002", "10", "0.0000002", "BTC")) is None
+
+
+def test_sell_fee_in_quote_asset_reduces_proceeds(bot_id):
+    _apply(_order(bot_id, "BUY", quote_order_qty=10.0), _fill("0.0002", "10", "0.01", "USDT"))
+    sell_id = _order(bot_id, "SELL", status="pending", quantity=0.0002)
+    trade_id = _apply(sell_id, _fill("0.0002", "12", "0.012", "USDT"))
+
+    with Session(engine) as session:
+        bot = session.get(Bot, bot_id)
+        trade = session.get(Trade, trade_id)
+        assert bot.saldo_usdt_livre == pytest.approx(90.0 + 12.0 - 0.012)
+        assert not bot.has_open_position
+        assert trade.realized_pnl == pytest.approx(2.0)
+        assert (trade.fee_amount, trade.fee_asset) == (pytest.approx(0.012), "USDT")
+
+
+class _Cache:
+    def ensure_loaded(self) -> None:
+        pass
+
+    def get(self, symbol: str) -> SymbolFilters:
+        return FILTERS
+
+
+class _Client:
+    def __init__(self, price: float = 50000.0, query_error=None) -> None:
+        self.price = price
+        self.query_error = query_error
+        self.sent: list[dict] = []
+
+    async def get_symbol_price(self, symbol: str, timeout=None) -> float:
+        return self.price
+
+    async def query_order(self, *, symbol: str, client_order_id: str):
+        raise self.query_error
+
+    async def new_order(self, **params) -> dict:
+        self.sent.append(params)
+        return _fill(params["quantity"], "10", "0", "USDT")
+
+
+def _execute(monkeypatch, order_id: int, client: _Client) -> None:
+    monkeypatch.setattr(orders_mod, "get_exchange_info_cache", lambda: _Cache())
+    monkeypatch.setattr(ticks_mod, "get_tick_store", lambda: None)
+    executor = OrderExecutor.__new__(OrderExecutor)
+    executor.settings = orders_mod.get_settings()
+    executor.client = client
+    with Session(engine) as session:
+        order = session.get(BotOrder, order_id)
+    asyncio.run(executor._execute(order))
+
+
+def test_failed_query_of_uncertain_order_keeps_it_submitted(bot_id, monkeypatch):
+    order_id = _order(bot_id, "SELL", quantity=0.0002)
+    client = _Client(query_error=BinanceAPIError(400, -1021, "Timestamp fora da janela"))
+    _execute(monkeypatch, order_id, client)
+
+    with Session(engine) as session:
+        assert session.get(BotOrder, order_id).status == "submitted"
+    assert client.sent == []
+
+
+def test_dust_market_sell_is_rejected_before_sending(bot_id, monkeypatch):
+    # 0.00005 BTC a 50000 = 2.5 USDT < MIN_NOTIONAL 5
+    order_id = _order(bot_id, "SELL", status="pending", quantity=0.00005)
+    client = _Client(price=50000.0)
+    _execute(monkeypatch, order_id, client)
+
+    with Session(engine) as session:
+        order = session.get(BotOrder, order_id)
+        assert order.status == "rejected"
+        assert "MIN_NOTIONAL" in order.error
+    assert client.sent == []
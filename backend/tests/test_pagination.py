@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import pytest
+from sqlmodel import Session, select
+
+from app.api.pagination import keyset_paginate
+from app.db.base import init_db
+from app.db.session import engine
+from app.db.writer import run_write
+from app.models import Bot
+
+
+@pytest.fixture
+def bots(request):
+    """Sete bots com um nome só deste teste, para paginar só eles."""
+    init_db()
+    name = request.node.name
+
+    def _setup(session: Session) -> list[int]:
+        bots = [
+            Bot(name=name, symbol="BTCUSDT", saldo_usdt_limit=10.0, valor_de_trade_usdt=1.0)
+            for _ in range(7)
+        ]
+        session.add_all(bots)
+        session.flush()
+        return [b.id for b in bots]
+
+    return name, run_write(_setup)
+
+
+def _page(name: str, **kwargs):
+    with Session(engine) as session:
+        page = keyset_paginate(
+            session, select(Bot).where(Bot.name == name), Bot.id, limit=3, **kwargs
+        )
+    return [b.id for b in page.items], page.next_cursor, page.prev_cursor
+
+
+def test_descending_forward_and_back(bots):
+    name, ids = bots
+    newest = sorted(ids, reverse=True)
+
+    items, next_cursor, prev_cursor = _page(name, descending=True)
+    assert items == newest[:3]
+    assert prev_cursor is None
+
+    items, next_cursor, prev_cursor = _page(name, descending=True, before=next_cursor)
+    assert items == newest[3:6]
+
+    last, end, back = _page(name, descending=True, before=next_cursor)
+    assert last == newest[6:]
+    assert end is None
+
+    # voltar a partir da última página devolve a do meio, na mesma ordem
+    items, _, _ = _page(name, descending=True, after=back)
+    assert items == newest[3:6]
+
+    # e voltar da do meio chega à primeira, sem página anterior
+    items, _, first_prev = _page(name, descending=True, after=prev_cursor)
+    assert items == newest[:3]
+    assert first_prev is None
+
+
+def test_ascending_forward_and_back(bots):
+    name, ids = bots
+    oldest = sorted(ids)
+
+    items, next_cursor, _ = _page(name, after=oldest[0] - 1)
+    assert items == oldest[:3]
+
+    items, next_cursor, prev_cursor = _page(name, after=next_cursor)
+    assert items == oldest[3:6]
+
+    items, _, first_prev = _page(name, before=prev_cursor)
+    assert items == oldest[:3]
+    assert first_prev is None
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parents[1]
+
+# Gravação ao vivo num processo próprio (banco e journal vazios, mercado
+# falso determinístico com erros de preço no meio); imprime os trades em JSON.
+_RECORD = textwrap.dedent(
+    """
+    import asyncio, contextlib, io, json, random
+    from datetime import datetime, timedelta
+
+    import app.api.routes_bots as routes_bots
+    import app.engine.market as market
+    import app.engine.runner as runner
+    from fastapi.testclient import TestClient
+    from app.core.state import set_system_running
+    from app.main import create_app
+    from app.marketdata.recorder import get_market_recorder
+
+    random.seed(3)
+    prices = {"BTCUSDT": 100.0, "ETHUSDT": 50.0}
+    t0 = datetime(2025, 1, 1)
+
+    def get_symbol_price(symbol, timeout=None):
+        if random.random() < 0.05:
+            raise RuntimeError("timeout")
+        prices[symbol] *= 1 + random.gauss(0, 0.01)
+        return prices[symbol]
+
+    def get_klines(symbol, interval, limit, timeout=None):
+        base = prices[symbol]
+        return [
+            dict(
+                open_time=t0 + timedelta(minutes=5 * i),
+                close_time=t0 + timedelta(minutes=5 * i + 5) - timedelta(milliseconds=1),
+                open=base, high=base, low=base,
+                close=base * (1 + 0.01 * ((i * 7) % 5 - 2)),
+                volume=1.0,
+            )
+            for i in range(limit)
+        ]
+
+    class AsyncClient:
+        async def get_symbol_price(self, symbol, timeout=None):
+            return get_symbol_price(symbol)
+
+    market.get_symbol_price = get_symbol_price
+    market.get_async_binance_client = AsyncClient
+    market.get_klines = get_klines
+    routes_bots.binance_validate_symbol = lambda symbol: True
+
+    with TestClient(create_app()) as client:
+        for i, symbol in enumerate(["btcusdt", "ethusdt", "btcusdt", "ethusdt"]):
+            client.post("/bots/", json=dict(
+                name=f"r{i}", symbol=symbol, saldo_usdt_limit=100, valor_de_trade_usdt=10,
+                comprar_ao_iniciar=i % 2 == 0, compra_mercado=i < 2, venda_mercado=False,
+                porcentagem_compra=1, porcentagem_venda=1, stop_loss_percent=5,
+            ))
+        client.post("/bots/actions/start_all")
+        set_system_running(True)
+        with contextlib.redirect_stdout(io.StringIO()):
+            for _ in range(150):
+                asyncio.run(runner.run_engine_cycle())
+            asyncio.run(runner.wait_projection())
+        trades = [
+            t
+            for bot_id in (1, 2, 3, 4)
+            for t in client.get(f"/bots/{bot_id}/trades?limit=5000").json()["items"]
+        ]
+    get_market_recorder().close()
+    print(json.dumps(trades))
+    """
+)
+
+
+def _run(args: list[str], env: dict[str, str]) -> str:
+    result = subprocess.run(
+        [sys.executable, *args],
+        cwd=BACKEND,
+        env={**os.environ, **env},
+        capture_output=True,
+        text=True,
+        timeout=240,
+    )
+    assert result.returncode == 0, result.stderr
+    return result.stdout
+
+
+def _key(trade: dict) -> tuple:
+    return (trade["bot_id"], trade["side"], trade["price"], trade["qty"], trade["realized_pnl"])
+
+
+def test_record_then_replay_gives_the_same_trades(tmp_path):
+    record_dir = tmp_path / "rec"
+    live = json.loads(
+        _run(
+            ["-c", _RECORD],
+            {
+                "DATABASE_URL": f"sqlite:///{tmp_path / 'live.db'}",
+                "TRADE_JOURNAL_DIR": str(tmp_path / "journal"),
+                "MARKET_RECORDER_ENABLED": "true",
+                "MARKET_RECORDER_DIR": str(record_dir),
+            },
+        ).splitlines()[-1]
+    )
+    assert live, "a gravação não gerou trades"
+    (log,) = record_dir.glob("*.bblog")
+
+    out = _run(
+        [
+            "-m", "app.engine.replay", str(log),
+            "--db", f"sqlite:///{tmp_path / 'replay.db'}",
+            "--trades",
+        ],
+        {"MARKET_RECORDER_ENABLED": "false"},
+    )
+    replayed = [json.loads(line) for line in out.splitlines() if line.startswith("{")]
+    assert sorted(map(_key, replayed)) == sorted(map(_key, live))
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import json
+
+import numpy as np
+
+from app.backtest.sweep import (
+    ParamRange,
+    SweepSpec,
+    combo_key,
+    create_sweep,
+    load_results,
+    rank_results,
+    run_sweep,
+    sweep_path,
+)
+
+
+def _row(net_pnl: float, drawdown: float, trades: int) -> dict:
+    return {"net_pnl": net_pnl, "max_drawdown_pct": drawdown, "num_trades": trades}
+
+
+def test_rank_results_orders_and_breaks_ties():
+    rows = [_row(5.0, 3.0, 2), _row(5.0, 1.0, 4), _row(-1.0, 0.5, 9), _row(8.0, 6.0, 4)]
+
+    assert rank_results(rows, "pnl") == [rows[3], rows[1], rows[0], rows[2]]
+    assert rank_results(rows, "drawdown") == [rows[2], rows[1], rows[0], rows[3]]
+    assert rank_results(rows, "trades", top=2) == [rows[2], rows[3]]
+
+
+def _market(n: int = 200) -> dict[str, np.ndarray]:
+    t = np.arange(n, dtype=np.float64)
+    return {
+        "prices": 100.0 + 5.0 * np.sin(t / 7.0),
+        "buy": np.zeros(n, dtype=bool),
+        "sell": np.zeros(n, dtype=bool),
+    }
+
+
+def test_resume_after_partial_line_keeps_every_row():
+    spec = SweepSpec(
+        symbol="BTCUSDT",
+        porcentagem_compra=ParamRange(start=1.0, stop=3.0, step=1.0),
+        porcentagem_venda=[1.0, 2.0],
+        comprar_ao_iniciar=[True],
+    )
+    sweep_id = create_sweep(spec, _market())
+    assert run_sweep(sweep_id, workers=1) == "done"
+
+    results = sweep_path(sweep_id) / "results.jsonl"
+    lines = results.read_text().splitlines(keepends=True)
+    assert len(lines) == 6
+
+    # processo morto no meio da escrita: 3 linhas inteiras e um fragmento
+    results.write_text("".join(lines[:3]) + lines[3][:10])
+    assert len(load_results(sweep_path(sweep_id))) == 3
+
+    assert run_sweep(sweep_id, workers=1) == "done"
+    rows = load_results(sweep_path(sweep_id))
+    assert len(rows) == 6
+    assert {combo_key(r["params"]) for r in rows} == {combo_key(c) for c in spec.grid()}
+    for line in results.read_text().splitlines():
+        json.loads(line)
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from app.marketdata import ticks
+from app.marketdata.ticks import TickRing, TickStore, window_stats
+
+
+def test_window_stats():
+    ts = np.array([0.0, 10.0, 40.0])
+    price = np.array([100.0, 110.0, 99.0])
+    stats = window_stats(ts, price, now=60.0)
+
+    assert stats["count"] == 3
+    assert (stats["first"], stats["last"], stats["min"], stats["max"]) == (100.0, 99.0, 99.0, 110.0)
+    # cada preço vale até o próximo tick; o último, até "agora"
+    assert stats["twap"] == pytest.approx((100 * 10 + 110 * 30 + 99 * 20) / 60)
+    assert stats["change_pct"] == pytest.approx(-1.0)
+    returns = np.diff(np.log(price))
+    assert stats["volatility_pct"] == pytest.approx(returns.std(ddof=1) * 100)
+
+    assert window_stats(np.empty(0), np.empty(0), now=60.0) == {"count": 0}
+    single = window_stats(np.array([5.0]), np.array([7.0]), now=5.0)
+    assert single["twap"] == 7.0 and single["volatility_pct"] is None
+
+
+def test_ring_wraps_in_chronological_order(tmp_path):
+    ring = TickRing(tmp_path / "BTCUSDT.ticks", capacity=4, writable=True)
+    for i in range(6):
+        ring.append(float(i), 100.0 + i)
+    assert ring.total == 6
+
+    # leitor num mapeamento separado vê os mesmos ticks
+    reader = TickRing(tmp_path / "BTCUSDT.ticks", capacity=4, writable=False)
+    ts, price = reader.snapshot()
+    assert ts.tolist() == [2.0, 3.0, 4.0, 5.0]
+    assert price.tolist() == [102.0, 103.0, 104.0, 105.0]
+
+    # outra capacidade: o escritor recria o arquivo e o leitor percebe
+    TickRing(tmp_path / "BTCUSDT.ticks", capacity=8, writable=True)
+    assert reader.is_stale()
+
+
+def test_store_windows(tmp_path, monkeypatch):
+    writer = TickStore(tmp_path, capacity=100, max_symbols=1)
+    for i in range(10):
+        writer.append("btcusdt", 100.0 + i, ts=1000.0 + i * 10)
+    # limite só vale para os anéis de escrita
+    writer.append("ETHUSDT", 1.0, ts=1000.0)
+    assert not (tmp_path / "ETHUSDT.ticks").exists()
+
+    monkeypatch.setattr(ticks.time, "time", lambda: 1095.0)
+    reader = TickStore(tmp_path, capacity=100, max_symbols=1)
+    stats = reader.stats("BTCUSDT", (30, 3600))
+    assert stats["total_ticks"] == 10
+    assert stats["last"] == {"ts": 1090.0, "price": 109.0, "age_seconds": 5.0}
+    assert stats["windows"]["30s"]["count"] == 3  # ticks em 1070, 1080, 1090
+    assert stats["windows"]["30s"]["twap"] == pytest.approx((107 * 10 + 108 * 10 + 109 * 5) / 25)
+    assert stats["windows"]["3600s"]["count"] == 10
+    assert reader.last("BTCUSDT") == (1090.0, 109.0)
+
+    assert reader.stats("ETHUSDT", (30,)) is None
+    assert reader.stats("../BTCUSDT", (30,)) is None
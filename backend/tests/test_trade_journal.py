@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime
+
+import pytest
+from sqlalchemy import delete
+from sqlmodel import Session, select
+
+from app.db.base import init_db
+from app.db.session import engine
+from app.db.writer import run_write
+from app.engine import journal as journal_mod
+from app.engine import runner
+from app.engine.journal import (
+    JRN_FILLS,
+    JournalSequenceError,
+    TradeJournal,
+    encode_fills,
+    get_trade_journal,
+    project_fills,
+    projected_seq,
+    recover_journal,
+)
+from app.engine.market import MarketData
+from app.engine.records import load_bot_snapshots
+from app.models import Bot, JournalCursor, Trade
+
+
+class FixedMarket(MarketData):
+    """Preço fixo e sem candles: o suficiente para a compra inicial."""
+
+    def __init__(self, price: float = 100.0) -> None:
+        self.price = price
+
+    def now(self) -> datetime:
+        return datetime(2024, 1, 1, 12, 0, 0)
+
+    def get_price(self, symbol: str) -> float:
+        return self.price
+
+    def get_klines(self, symbol: str, interval: str, limit: int) -> list[dict]:
+        return []
+
+
+@pytest.fixture
+def journal(monkeypatch):
+    """Journal e banco zerados, engine ligado, um ciclo por chamada."""
+    init_db()
+    old = get_trade_journal()
+    if old is not None:
+        old.close()
+        for path in old.directory.glob(f"{old.name}.*"):
+            path.unlink()
+    get_trade_journal.cache_clear()
+
+    def _reset(session: Session) -> None:
+        session.execute(delete(JournalCursor))
+        session.execute(delete(Trade))
+        session.execute(delete(Bot))
+
+    run_write(_reset)
+    monkeypatch.setattr(runner, "is_engine_running", lambda: True)
+    monkeypatch.setattr(runner, "_pending_projection", None)
+    monkeypatch.setattr(runner, "_needs_recovery", False)
+    runner._last_indicator_sync_by_symbol.clear()
+    runner._last_price_by_symbol.clear()
+    yield get_trade_journal()
+    asyncio.run(runner.wait_projection())
+
+
+def _create_bot() -> int:
+    def _create(session: Session) -> int:
+        bot = Bot(
+            name="journal",
+            symbol="BTCUSDT",
+            saldo_usdt_limit=100.0,
+            saldo_usdt_livre=100.0,
+            valor_de_trade_usdt=10.0,
+            comprar_ao_iniciar=True,
+            compra_mercado=False,
+            status="online",
+        )
+        session.add(bot)
+        session.flush()
+        return bot.id
+
+    return run_write(_create)
+
+
+def _buys(bot_id: int) -> int:
+    with Session(engine) as session:
+        return len(
+            session.exec(select(Trade).where(Trade.bot_id == bot_id, Trade.side == "BUY")).all()
+        )
+
+
+def _fail_projection(monkeypatch, times: int) -> None:
+    real = journal_mod.project_diffs
+    remaining = {"n": times}
+
+    def _flaky(session, diffs):
+        if remaining["n"] > 0:
+            remaining["n"] -= 1
+            raise RuntimeError("falha simulada na projeção")
+        return real(session, diffs)
+
+    monkeypatch.setattr(journal_mod, "project_diffs", _flaky)
+
+
+def _cycle() -> None:
+    asyncio.run(runner.run_engine_cycle(FixedMarket()))
+
+
+def test_failed_projection_blocks_decisions_until_reprojected(journal, monkeypatch):
+    bot_id = _create_bot()
+    # projeção do ciclo 1 e a primeira reprojeção falham
+    _fail_projection(monkeypatch, times=2)
+
+    _cycle()  # COMPRA inicial: seq 1 no journal, projeção falha
+    _cycle()  # reprojeção falha: o ciclo não decide nada
+    assert journal.last_seq == 1
+    assert _buys(bot_id) == 0
+
+    _cycle()  # reprojeção do seq 1 dá certo; o bot já está posicionado
+    asyncio.run(runner.wait_projection())
+    assert journal.last_seq == 1
+    assert projected_seq() == 1
+    assert _buys(bot_id) == 1
+
+
+def test_recover_after_crash_between_fsync_and_commit(journal):
+    bot_id = _create_bot()
+    with Session(engine) as session:
+        (bot,) = load_bot_snapshots(session, bot_ids=[bot_id])
+    diffs = runner._decide_cycle(
+        Session(engine), [(bot_id, 100.0, None, False)], runner.get_settings(), now=FixedMarket().now(), writes=False
+    )
+    assert diffs and diffs[0].before == bot._asdict()
+
+    # confirmado no journal, processo "morre" antes da projeção
+    assert journal.append(JRN_FILLS, encode_fills(diffs)).result() == 1
+    assert projected_seq() == 0
+
+    assert recover_journal() == 1
+    assert recover_journal() == 0
+    assert projected_seq() == 1
+    assert _buys(bot_id) == 1
+
+
+def test_projection_rejects_out_of_order_entries(journal):
+    with pytest.raises(JournalSequenceError):
+        run_write(lambda session: project_fills(session, seq=2, diffs=[]))
+    assert run_write(lambda session: project_fills(session, seq=1, diffs=[])) == 0
+    with pytest.raises(JournalSequenceError):
+        run_write(lambda session: project_fills(session, seq=1, diffs=[]))
+    assert projected_seq() == 1
+
+
+def test_stale_diff_is_discarded(journal):
+    bot_id = _create_bot()
+    diffs = runner._decide_cycle(
+        Session(engine), [(bot_id, 100.0, None, False)], runner.get_settings(), now=FixedMarket().now(), writes=False
+    )
+
+    assert diffs
+
+    # a API mexe no bot entre a decisão e a projeção
+    def _edit(session: Session) -> None:
+        bot = session.get(Bot, bot_id)
+        bot.saldo_usdt_livre = 50.0
+        session.add(bot)
+
+    run_write(_edit)
+    assert run_write(lambda session: project_fills(session, seq=1, diffs=diffs)) == 0
+    assert projected_seq() == 1
+    assert _buys(bot_id) == 0
+    with Session(engine) as session:
+        assert session.get(Bot, bot_id).saldo_usdt_livre == 50.0
+
+
+def test_torn_tail_is_truncated(journal):
+    assert journal.append(JRN_FILLS, encode_fills([])).result() == 1
+    journal.close()
+    with open(journal.path, "ab") as f:
+        f.write(b"\x01incompleto")
+    reopened = TradeJournal(journal.directory, journal.name)
+    assert reopened.last_seq == 1
+    assert [seq for seq, *_ in reopened.read()] == [1]
+    reopened.close()
+
+
+def test_read_starts_at_cursor_segment_and_prune_drops_projected(journal):
+    small = TradeJournal(journal.directory, "segments", segment_bytes=64)
+    payload = encode_fills([])
+    for expected in range(1, 6):
+        assert small.append(JRN_FILLS, payload).result() == expected
+    first_seqs = [first for first, _path in small._segments]
+    assert len(first_seqs) > 1
+
+    assert [seq for seq, *_ in small.read(2)] == [3, 4, 5]
+    assert small.prune(3) == sum(1 for s in first_seqs[1:] if s <= 4)
+    assert [seq for seq, *_ in small.read(3)] == [4, 5]
+    small.close()
+
+    # reaberto sem os segmentos antigos: o seq continua de onde parou
+    reopened = TradeJournal(journal.directory, "segments", segment_bytes=64)
+    assert reopened.last_seq == 5
+    assert reopened.append(JRN_FILLS, payload).result() == 6
+    reopened.close()
+    for path in journal.directory.glob("segments.*"):
+        path.unlink()
@@ -17,6 +17,7 @@ import {
   closeBotPosition,
 } from "./api/bots";
 import { getAccountSummary } from "./api/binance";
+import { subscribeEvents } from "./api/events";
 import BotForm from "./components/BotForm";
 import BotList from "./components/BotList";
 import ActiveBotsPanel from "./components/ActiveBotsPanel";
@@ -74,6 +75,28 @@ function App() {
     fetchInitialData();
   }, []);
 
+  // Deltas em tempo real do engine (em vez de recarregar a lista inteira)
+  useEffect(() => {
+    const unsubscribe = subscribeEvents({
+      bot: (delta) => {
+        setBots((prev) => {
+          if (!prev.some((b) => b.id === delta.id)) {
+            return delta.name ? [...prev, delta] : prev;
+          }
+          return prev.map((b) => (b.id === delta.id ? { ...b, ...delta } : b));
+        });
+      },
+      bot_deleted: ({ id }) => {
+        setBots((prev) => prev.filter((b) => b.id !== id));
+      },
+      resync: () => {
+        fetchBots().catch((err) => console.error(err));
+      },
+    });
+    return unsubscribe;
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, []);
+
   const handleToggleSystem = async () => {
     try {
       const res = await toggleSystemState();
@@ -4,3 +4,13 @@ import { apiGet } from "./client";
 export function getBotAnalysis(botId) {
   return apiGet(`/analysis/bot/${botId}`);
 }
+
+// Análise de todos os bots (ou filtrados) em uma única requisição
+export function getBotsAnalysis({ status, symbol, blocked } = {}) {
+  const params = new URLSearchParams();
+  if (status) params.set("status", status);
+  if (symbol) params.set("symbol", symbol);
+  if (blocked !== undefined && blocked !== null) params.set("blocked", String(blocked));
+  const qs = params.toString();
+  return apiGet(`/analysis/bots${qs ? `?${qs}` : ""}`);
+}
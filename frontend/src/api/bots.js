@@ -1,7 +1,23 @@
 import { apiGet, apiPost, apiDelete } from "./client";
 
+// Listagens paginadas por cursor retornam { items, next_cursor, prev_cursor }
+async function fetchAllPages(path, params = {}) {
+  const items = [];
+  let cursor = null;
+
+  do {
+    const qs = new URLSearchParams(params);
+    if (cursor != null) qs.set("after", String(cursor));
+    const page = await apiGet(`${path}?${qs.toString()}`);
+    items.push(...page.items);
+    cursor = page.next_cursor;
+  } while (cursor != null);
+
+  return items;
+}
+
 export function listBots() {
-  return apiGet("/bots/");
+  return fetchAllPages("/bots/", { limit: "1000" });
 }
 
 export function createBot(botData) {
@@ -36,8 +52,12 @@ export function stopAllBots() {
   return apiPost("/bots/actions/stop_all");
 }
 
-export function getBotTrades(id) {
-  return apiGet(`/bots/${id}/trades`);
+// Uma página de trades do bot ({ items, next_cursor, prev_cursor }): quem
+// chama guarda o next_cursor e pede a próxima página sob demanda (after).
+export function getBotTrades(id, { after = null, limit = 200 } = {}) {
+  const qs = new URLSearchParams({ limit: String(limit) });
+  if (after != null) qs.set("after", String(after));
+  return apiGet(`/bots/${id}/trades?${qs.toString()}`);
 }
 
 export function closeBotPosition(id) {
@@ -0,0 +1,58 @@
+const API_BASE_URL = import.meta.env.VITE_API_BASE_URL || "http://localhost:8000";
+
+const EVENT_TYPES = ["bot", "bot_deleted", "trade", "indicator", "resync"];
+
+// Uma única conexão SSE por aba, compartilhada por todos os componentes:
+// cada subscribeEvents só registra seus handlers; a conexão abre com o
+// primeiro inscrito e fecha quando o último sai (no próximo tick, para um
+// componente que só troca de filtros não derrubar e reabrir a conexão).
+let source = null;
+let closeTimer = null;
+const subscribers = new Set();
+
+function dispatch(type, e) {
+  let data;
+  try {
+    data = JSON.parse(e.data);
+  } catch (err) {
+    console.error(err);
+    return;
+  }
+  subscribers.forEach((handlers) => {
+    const handler = handlers[type];
+    if (!handler) return;
+    try {
+      handler(data);
+    } catch (err) {
+      console.error(err);
+    }
+  });
+}
+
+function connect() {
+  source = new EventSource(`${API_BASE_URL}/events/stream`);
+  EVENT_TYPES.forEach((type) => {
+    source.addEventListener(type, (e) => dispatch(type, e));
+  });
+}
+
+// Assina /events/stream (SSE). O EventSource reconecta sozinho e manda
+// Last-Event-ID, então o backend reenvia o que foi perdido.
+// handlers: { bot, bot_deleted, trade, indicator, resync } -> fn(data)
+export function subscribeEvents(handlers) {
+  subscribers.add(handlers);
+  clearTimeout(closeTimer);
+  if (!source) connect();
+
+  return () => {
+    subscribers.delete(handlers);
+    if (subscribers.size > 0) return;
+    clearTimeout(closeTimer);
+    closeTimer = setTimeout(() => {
+      if (subscribers.size === 0 && source) {
+        source.close();
+        source = null;
+      }
+    }, 0);
+  };
+}
@@ -7,3 +7,14 @@ export function getStatsSummary() {
 export function getStatsByBot() {
   return apiGet("/stats/by_bot");
 }
+
+export function getStatsTimeseries({ bucket = "hour", botId, since, until } = {}) {
+  const params = new URLSearchParams();
+
+  params.set("bucket", bucket);
+  if (botId != null && botId !== "") params.set("bot_id", String(botId));
+  if (since) params.set("since", since);
+  if (until) params.set("until", until);
+
+  return apiGet(`/stats/timeseries?${params.toString()}`);
+}
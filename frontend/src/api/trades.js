@@ -1,14 +1,16 @@
 import { apiGet } from "./client";
 
-export function getRecentTrades({ limit = 50, botId, symbol } = {}) {
+export async function getRecentTrades({ limit = 50, botId, symbol, before } = {}) {
   const params = new URLSearchParams();
 
   if (limit) params.set("limit", String(limit));
   if (botId != null && botId !== "") params.set("bot_id", String(botId));
   if (symbol) params.set("symbol", symbol.toUpperCase().trim());
+  if (before != null) params.set("before", String(before));
 
   const qs = params.toString();
   const path = qs ? `/trades/recent?${qs}` : "/trades/recent";
 
-  return apiGet(path);
+  const page = await apiGet(path);
+  return page.items;
 }
@@ -77,17 +77,31 @@ function ActiveBotsPanel({ bots }) {
       return;
     }
 
+    if (await loadTrades(botId)) {
+      setOpenTradesBotId(botId);
+    }
+  };
+
+  // Uma página de trades por vez; com after, anexa à lista já carregada
+  const loadTrades = async (botId, after = null) => {
     try {
       setLoadingTradesBotId(botId);
-      const trades = await getBotTrades(botId);
+      const page = await getBotTrades(botId, { after });
       setTradesByBot((prev) => ({
         ...prev,
-        [botId]: trades,
+        [botId]: {
+          items:
+            after != null
+              ? [...(prev[botId]?.items || []), ...page.items]
+              : page.items,
+          nextCursor: page.next_cursor,
+        },
       }));
-      setOpenTradesBotId(botId);
+      return true;
     } catch (err) {
       console.error(err);
       alert("Erro ao carregar trades do bot.");
+      return false;
     } finally {
       setLoadingTradesBotId(null);
     }
@@ -132,7 +146,8 @@ function ActiveBotsPanel({ bots }) {
     <div>
       {bots.map((bot) => {
         const stats = statsByBot[bot.id];
-        const botTrades = tradesByBot[bot.id] || [];
+        const botTrades = tradesByBot[bot.id]?.items || [];
+        const tradesCursor = tradesByBot[bot.id]?.nextCursor;
         const analysis = analysisByBot[bot.id];
 
         return (
@@ -475,6 +490,17 @@ function ActiveBotsPanel({ bots }) {
                     ))}
                   </tbody>
                 </table>
+                {tradesCursor != null && (
+                  <button
+                    className="w-full px-2 py-1 text-[11px] text-slate-600 hover:bg-slate-100 disabled:opacity-50"
+                    disabled={loadingTradesBotId === bot.id}
+                    onClick={() => loadTrades(bot.id, tradesCursor)}
+                  >
+                    {loadingTradesBotId === bot.id
+                      ? "Carregando..."
+                      : "Carregar mais"}
+                  </button>
+                )}
               </div>
             )}
           </div>
@@ -1,5 +1,6 @@
 import { useState, Fragment } from "react";
 import { getBotTrades } from "../api/bots";
+import { getStatsByBot } from "../api/stats";
 
 function BotList({
   bots,
@@ -13,24 +14,14 @@ function BotList({
   onClosePosition,
 }) {
   const [openTrades, setOpenTrades] = useState({}); // { [id]: true/false }
-  const [tradesData, setTradesData] = useState({}); // { [id]: { loading, error, trades } }
+  const [tradesData, setTradesData] = useState({}); // { [id]: { loading, error, trades, nextCursor, stats } }
 
   if (!bots.length) {
     return <p>Nenhum bot cadastrado ainda.</p>;
   }
 
-  const handleToggleTrades = async (bot) => {
-    const id = bot.id;
-    const isOpen = !!openTrades[id];
-
-    // Se já está aberto, só fecha
-    if (isOpen) {
-      setOpenTrades((prev) => ({ ...prev, [id]: false }));
-      return;
-    }
-
-    // Abre e carrega trades
-    setOpenTrades((prev) => ({ ...prev, [id]: true }));
+  // Carrega uma página de trades; com after, anexa à lista já carregada
+  const loadTrades = async (id, after = null) => {
     setTradesData((prev) => ({
       ...prev,
       [id]: {
@@ -41,14 +32,18 @@ function BotList({
     }));
 
     try {
-      const trades = await getBotTrades(id);
+      const page = await getBotTrades(id, { after });
       setTradesData((prev) => ({
         ...prev,
         [id]: {
           ...(prev[id] || {}),
           loading: false,
           error: null,
-          trades,
+          trades:
+            after != null
+              ? [...(prev[id]?.trades || []), ...page.items]
+              : page.items,
+          nextCursor: page.next_cursor,
         },
       }));
     } catch (err) {
@@ -57,13 +52,42 @@ function BotList({
         [id]: {
           ...(prev[id] || {}),
           loading: false,
-          trades: [],
+          trades: after != null ? prev[id]?.trades || [] : [],
           error: err?.message || "Erro ao carregar trades.",
         },
       }));
     }
   };
 
+  const loadStats = async (id) => {
+    try {
+      const rows = await getStatsByBot();
+      const stats = rows.find((row) => row.bot_id === id) || null;
+      setTradesData((prev) => ({
+        ...prev,
+        [id]: { ...(prev[id] || {}), stats },
+      }));
+    } catch (err) {
+      console.error(err);
+    }
+  };
+
+  const handleToggleTrades = async (bot) => {
+    const id = bot.id;
+    const isOpen = !!openTrades[id];
+
+    // Se já está aberto, só fecha
+    if (isOpen) {
+      setOpenTrades((prev) => ({ ...prev, [id]: false }));
+      return;
+    }
+
+    // Abre e carrega a primeira página; os totais vêm de bot_stats
+    // (histórico completo, não só as páginas carregadas)
+    setOpenTrades((prev) => ({ ...prev, [id]: true }));
+    await Promise.all([loadTrades(id), loadStats(id)]);
+  };
+
   return (
     <div>
       <div
@@ -156,29 +180,12 @@ function BotList({
               onClick: () => onDelete(bot.id),
             });
 
-            // P/L realizado acumulado para este bot (só SELL tem realized_pnl)
-            const realizedPnl =
-              trades && trades.length
-                ? trades.reduce(
-                    (sum, t) =>
-                      sum +
-                      (t.realized_pnl != null ? Number(t.realized_pnl) : 0),
-                    0
-                  )
-                : 0;
-
-            // Soma de taxas em USDT (ignorando outras moedas de taxa)
-            const totalFeesUsdt =
-              trades && trades.length
-                ? trades.reduce(
-                    (sum, t) =>
-                      sum +
-                      (t.fee_asset === "USDT" && t.fee_amount != null
-                        ? Number(t.fee_amount)
-                        : 0),
-                    0
-                  )
-                : 0;
+            // P/L realizado e taxas em USDT de todo o histórico (bot_stats)
+            const stats = data.stats;
+            const realizedPnl = stats ? Number(stats.realized_pnl || 0) : null;
+            const totalFeesUsdt = stats
+              ? Number(stats.total_fees_usdt || 0)
+              : null;
 
             return (
               <Fragment key={bot.id}>
@@ -233,13 +240,17 @@ function BotList({
                           <span>
                             P/L realizado:{" "}
                             <strong>
-                              {realizedPnl.toFixed(6)} USDT
+                              {realizedPnl != null
+                                ? `${realizedPnl.toFixed(6)} USDT`
+                                : "-"}
                             </strong>
                           </span>
                           <span>
                             Taxas (USDT):{" "}
                             <strong>
-                              {totalFeesUsdt.toFixed(6)} USDT
+                              {totalFeesUsdt != null
+                                ? `${totalFeesUsdt.toFixed(6)} USDT`
+                                : "-"}
                             </strong>
                           </span>
                         </div>
@@ -267,67 +278,75 @@ function BotList({
                             </p>
                           )}
 
-                        {!data.loading &&
-                          !data.error &&
-                          trades &&
-                          trades.length > 0 && (
-                            <div className="bot-trades-table-wrapper">
-                              <table
-                                className="bot-table"
-                                style={{ marginTop: "0.25rem" }}
-                              >
-                                <thead>
-                                  <tr>
-                                    <th>Data</th>
-                                    <th>Lado</th>
-                                    <th>Preço</th>
-                                    <th>Qtd</th>
-                                    <th>Valor (USDT)</th>
-                                    <th>Simulado</th>
-                                    <th>Taxa</th>
-                                    <th>P/L realizado</th>
+                        {trades && trades.length > 0 && (
+                          <div className="bot-trades-table-wrapper">
+                            <table
+                              className="bot-table"
+                              style={{ marginTop: "0.25rem" }}
+                            >
+                              <thead>
+                                <tr>
+                                  <th>Data</th>
+                                  <th>Lado</th>
+                                  <th>Preço</th>
+                                  <th>Qtd</th>
+                                  <th>Valor (USDT)</th>
+                                  <th>Simulado</th>
+                                  <th>Taxa</th>
+                                  <th>P/L realizado</th>
+                                </tr>
+                              </thead>
+                              <tbody>
+                                {trades.map((t) => (
+                                  <tr key={t.id}>
+                                    <td>
+                                      {t.created_at
+                                        ? new Date(
+                                            t.created_at
+                                          ).toLocaleString()
+                                        : "-"}
+                                    </td>
+                                    <td>{t.side}</td>
+                                    <td>{t.price.toFixed(4)}</td>
+                                    <td>{t.qty}</td>
+                                    <td>{t.quote_qty}</td>
+                                    <td>{t.is_simulated ? "Sim" : "Não"}</td>
+                                    <td>
+                                      {t.fee_amount != null ? (
+                                        <>
+                                          {Number(
+                                            t.fee_amount
+                                          ).toFixed(6)}{" "}
+                                          {t.fee_asset || ""}
+                                        </>
+                                      ) : (
+                                        "-"
+                                      )}
+                                    </td>
+                                    <td>
+                                      {t.realized_pnl != null
+                                        ? Number(
+                                            t.realized_pnl
+                                          ).toFixed(6)
+                                        : "-"}
+                                    </td>
                                   </tr>
-                                </thead>
-                                <tbody>
-                                  {trades.map((t) => (
-                                    <tr key={t.id}>
-                                      <td>
-                                        {t.created_at
-                                          ? new Date(
-                                              t.created_at
-                                            ).toLocaleString()
-                                          : "-"}
-                                      </td>
-                                      <td>{t.side}</td>
-                                      <td>{t.price.toFixed(4)}</td>
-                                      <td>{t.qty}</td>
-                                      <td>{t.quote_qty}</td>
-                                      <td>{t.is_simulated ? "Sim" : "Não"}</td>
-                                      <td>
-                                        {t.fee_amount != null ? (
-                                          <>
-                                            {Number(
-                                              t.fee_amount
-                                            ).toFixed(6)}{" "}
-                                            {t.fee_asset || ""}
-                                          </>
-                                        ) : (
-                                          "-"
-                                        )}
-                                      </td>
-                                      <td>
-                                        {t.realized_pnl != null
-                                          ? Number(
-                                              t.realized_pnl
-                                            ).toFixed(6)
-                                          : "-"}
-                                      </td>
-                                    </tr>
-                                  ))}
-                                </tbody>
-                              </table>
-                            </div>
-                          )}
+                                ))}
+                              </tbody>
+                            </table>
+                          </div>
+                        )}
+
+                        {data.nextCursor != null && (
+                          <button
+                            className="btn btn-secondary"
+                            style={{ marginTop: "0.25rem" }}
+                            disabled={data.loading}
+                            onClick={() => loadTrades(bot.id, data.nextCursor)}
+                          >
+                            Carregar mais
+                          </button>
+                        )}
                       </div>
                     </td>
                   </tr>
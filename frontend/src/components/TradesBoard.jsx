@@ -1,5 +1,6 @@
 import { useEffect, useState } from "react";
 import { getRecentTrades } from "../api/trades";
+import { subscribeEvents } from "../api/events";
 
 const apiBase = import.meta.env.VITE_API_BASE_URL || "http://localhost:8000";
 
@@ -37,6 +38,25 @@ function TradesBoard() {
     // eslint-disable-next-line react-hooks/exhaustive-deps
   }, []);
 
+  // Novos trades chegam por SSE e entram no topo da lista (respeitando filtros)
+  useEffect(() => {
+    const max = Number(limit) || 50;
+    const wantedSymbol = symbol ? symbol.toUpperCase().trim() : null;
+    const wantedBot = botId !== "" ? Number(botId) : null;
+
+    return subscribeEvents({
+      trade: (trade) => {
+        if (wantedSymbol && trade.symbol !== wantedSymbol) return;
+        if (wantedBot != null && trade.bot_id !== wantedBot) return;
+        setTrades((prev) => [trade, ...prev].slice(0, max));
+      },
+      resync: () => {
+        loadTrades();
+      },
+    });
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [limit, botId, symbol]);
+
   const handleSubmit = (e) => {
     e.preventDefault();
     loadTrades();